@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache
+Persistent per-file cache of analyzer statistics keyed on path, size, mtime and analyzer version
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from instrumentation import init_from_cli
+from lake_catalog import CACHE_ROOT
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class AnalysisCache:
+    """SQLite-backed store of per-file analysis results with LRU size-bounded eviction.
+
+    An entry is returned only when the file's current size and mtime and the
+    caller's analyzer version all match what was stored, so rewritten files and
+    analyzer upgrades are treated as misses automatically.
+    """
+
+    def __init__(self, cache_dir=CACHE_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'analysis_cache.sqlite')
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                analyzer TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                payload_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (analyzer, path)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, analyzer, path, version, stat=None):
+        """Return the cached result dict for path, or None on a miss or stale entry."""
+        stat = stat or os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, version, payload FROM entries WHERE analyzer = ? AND path = ?",
+            (analyzer, path),
+        ).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns or row[2] != version:
+            return None
+        self.conn.execute(
+            "UPDATE entries SET last_access = ? WHERE analyzer = ? AND path = ?",
+            (time.time(), analyzer, path),
+        )
+        return json.loads(row[3])
+
+    def get_many(self, analyzer, paths, version):
+        """Split paths into ({path: result} hits, [path] misses)."""
+        hits, misses = {}, []
+        for path in paths:
+            try:
+                result = self.get(analyzer, path, version)
+            except FileNotFoundError:
+                result = None
+            if result is None:
+                misses.append(path)
+            else:
+                hits[path] = result
+        self.conn.commit()
+        return hits, misses
+
+    def put_many(self, analyzer, results, version):
+        """Store {path: result} pairs, stamping each with the file's current size and mtime."""
+        now = time.time()
+        rows = []
+        for path, result in results.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            payload = json.dumps(result, default=str)
+            rows.append((analyzer, path, stat.st_size, stat.st_mtime_ns, version, payload, len(payload), now))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self.conn.commit()
+        self.evict()
+
+    def put(self, analyzer, path, result, version):
+        self.put_many(analyzer, {path: result}, version)
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used entries until the stored payloads fit in max_bytes."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.conn.execute("SELECT COALESCE(SUM(payload_bytes), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        doomed = []
+        for analyzer, path, payload_bytes in self.conn.execute(
+            "SELECT analyzer, path, payload_bytes FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= max_bytes:
+                break
+            doomed.append((analyzer, path))
+            total -= payload_bytes
+        self.conn.executemany("DELETE FROM entries WHERE analyzer = ? AND path = ?", doomed)
+        self.conn.commit()
+        return len(doomed)
+
+    def invalidate(self, path_prefix=None, analyzer=None):
+        """Delete entries under path_prefix (all paths if None), optionally for one analyzer."""
+        clauses, params = [], []
+        if path_prefix:
+            clauses.append("substr(path, 1, ?) = ?")
+            params.extend([len(path_prefix), path_prefix])
+        if analyzer:
+            clauses.append("analyzer = ?")
+            params.append(analyzer)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        deleted = self.conn.execute(f"DELETE FROM entries{where}", params).rowcount
+        self.conn.commit()
+        return deleted
+
+    def stats(self):
+        """Return entry counts and payload bytes per analyzer."""
+        return self.conn.execute(
+            "SELECT analyzer, version, COUNT(*), SUM(payload_bytes) FROM entries GROUP BY analyzer, version"
+        ).fetchall()
+
+
+def print_cache_stats(cache):
+    """Print entry counts and payload sizes per analyzer."""
+    print("🗄️ ANALYSIS CACHE")
+    print("-" * 60)
+    print(f"Database: {cache.path}")
+    print(f"Database Size: {os.path.getsize(cache.path) / (1024*1024):.2f} MB")
+    print(f"Payload Limit: {cache.max_bytes / (1024*1024):.0f} MB")
+    print(f"{'Analyzer':<25} {'Version':<10} {'Entries':>10} {'Payload':>12}")
+    for analyzer, version, count, payload_bytes in cache.stats():
+        print(f"{analyzer:<25} {version:<10} {count:>10,} {payload_bytes / 1024:>10.0f} KB")
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+
+    with AnalysisCache() as cache:
+        if command == 'stats':
+            print_cache_stats(cache)
+        elif command == 'invalidate':
+            # invalidate [path_prefix] [analyzer]
+            prefix = os.path.expanduser(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] != 'all' else None
+            analyzer = sys.argv[3] if len(sys.argv) > 3 else None
+            print(f"🗑️ Invalidated {cache.invalidate(prefix, analyzer):,} entries")
+        elif command == 'evict':
+            max_mb = float(sys.argv[2]) if len(sys.argv) > 2 else cache.max_bytes / (1024*1024)
+            print(f"🗑️ Evicted {cache.evict(int(max_mb * 1024 * 1024)):,} entries")
+        else:
+            print(f"Unknown command: {command} (expected stats, invalidate, evict)")
+            sys.exit(1)
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Records
+Typed result records returned by the analyzers and viewers, a bulk Parquet results writer and the shared text helpers
+"""
+
+import dataclasses
+import json
+import os
+import sys
+import typing
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from instrumentation import count, init_from_cli, phase
+from lake_catalog import RESULTS_ROOT, parse_lake_filename
+
+DEFAULT_FLUSH_ROWS = 10_000
+# Bump when collect_parquet_file changes what it records, so cached results are recomputed
+PARQUET_FILE_RESULT_VERSION = '1'
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclasses.dataclass
+class ParquetFileResult:
+    """Structure and statistics of one lake parquet file (analyze_* scripts)."""
+    analyzer: str
+    path: str
+    file: str
+    size_bytes: int
+    valid_parquet: bool
+    data_type: Optional[str]
+    stamp: Optional[str]
+    file_index: Optional[int]
+    mode: str
+    rows: Optional[int] = None
+    row_groups: Optional[int] = None
+    ts_min: Optional[int] = None
+    ts_max: Optional[int] = None
+    duration_s: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    column_names: List[str] = dataclasses.field(default_factory=list)
+    column_types: List[str] = dataclasses.field(default_factory=list)
+    column_samples: List[str] = dataclasses.field(default_factory=list)
+    row_group_rows: List[int] = dataclasses.field(default_factory=list)
+    created_by: Optional[str] = None
+    timestamp_source: Optional[str] = None
+    error: Optional[str] = None
+    error_kind: Optional[str] = None
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+    def column_type(self, name):
+        return self.column_types[self.column_names.index(name)]
+
+    def sample(self, name):
+        """Sample value of a column as text ('N/A' for an empty file)."""
+        return self.column_samples[self.column_names.index(name)]
+
+    def sample_float(self, name):
+        value = self.sample(name)
+        try:
+            return float(value)
+        except ValueError:
+            return float('nan')
+
+
+@dataclasses.dataclass
+class SnapshotFrequencyResult:
+    """Snapshot cadence profile of one book_snapshot_5 file."""
+    path: str
+    file: str
+    snapshots: int
+    intervals: int
+    out_of_order: int
+    start_us: Optional[int]
+    end_us: Optional[int]
+    duration_s: Optional[float]
+    snapshots_per_second: Optional[float]
+    mean_ms: float
+    std_ms: float
+    min_ms: float
+    max_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    p999_ms: float
+    activity_labels: List[str]
+    activity_counts: List[int]
+    histogram_edges_ms: List[float]
+    histogram_counts: List[int]
+    hourly_hours: List[int]
+    hourly_p50_ms: List[float]
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+
+@dataclasses.dataclass
+class FailedDownloadsResult:
+    """Shape and totals of one *_failed_downloads.json file."""
+    viewer: str
+    path: str
+    file: str
+    size_bytes: int
+    sources: List[str]
+    datasets: List[str]
+    symbols: int
+    records: int
+    permanent: int
+    reasons: List[str]
+    reason_counts: List[int]
+    error_msgs: List[str]
+    error_msg_counts: List[int]
+    retry_min: Optional[int]
+    retry_max: Optional[int]
+    retry_mean: Optional[float]
+    sample_json: str
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+
+@dataclasses.dataclass
+class QualityStateResult:
+    """Contents of one _quality_state/<dataset>/<SYMBOL>/state.json."""
+    path: str
+    dataset: Optional[str]
+    symbol: Optional[str]
+    size_bytes: int
+    fields: List[str]
+    last_processed_date: Optional[str]
+    last_updated_utc: Optional[str]
+    last_processed_timestamp: Optional[int]
+    partitions_checked: int
+    first_partition: Optional[str]
+    last_partition: Optional[str]
+    check_names: List[str]
+    check_summaries: List[str]
+    sample_json: str
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+
+@dataclasses.dataclass
+class FundingDayResult:
+    """Mark/index basis, funding and last-vs-mark summary of one symbol-day of derivative_ticker updates."""
+    date: str
+    symbol: str
+    updates: int
+    start_us: Optional[int]
+    end_us: Optional[int]
+    mark_open: Optional[float]
+    mark_close: Optional[float]
+    basis_bps_mean: Optional[float]
+    basis_bps_std: Optional[float]
+    basis_bps_min: Optional[float]
+    basis_bps_max: Optional[float]
+    basis_abs_bps_p99: Optional[float]
+    last_mark_bps_mean: Optional[float]
+    last_mark_abs_bps_max: Optional[float]
+    last_mark_abs_bps_p99: Optional[float]
+    funding_rate_first: Optional[float]
+    funding_rate_last: Optional[float]
+    funding_rate_mean: Optional[float]
+    funding_rate_changes: int
+    funding_boundaries: int
+    funding_boundary_us: List[int]
+    open_interest_last: Optional[float]
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+
+@dataclasses.dataclass
+class SpreadDayResult:
+    """Top-of-book spread, price range and inferred tick size of one symbol-day of book_snapshot_5."""
+    date: str
+    symbol: str
+    files: int
+    snapshots: int
+    start_us: Optional[int]
+    end_us: Optional[int]
+    bid_min: Optional[float]
+    bid_max: Optional[float]
+    ask_min: Optional[float]
+    ask_max: Optional[float]
+    mid_open: Optional[float]
+    mid_close: Optional[float]
+    price_range_bps: Optional[float]
+    spread_min: Optional[float]
+    spread_max: Optional[float]
+    spread_mean: Optional[float]
+    spread_p50: Optional[float]
+    spread_p99: Optional[float]
+    spread_bps_mean: Optional[float]
+    crossed: int
+    tick_size: Optional[float]
+    tick_bps: Optional[float]
+    spread_ticks_mean: Optional[float]
+    one_tick_share: Optional[float]
+    analyzed_at: str = dataclasses.field(default_factory=utc_now)
+
+
+def _arrow_type(hint):
+    import pyarrow as pa
+
+    origin = typing.get_origin(hint)
+    if origin is typing.Union:
+        return _arrow_type(next(arg for arg in typing.get_args(hint) if arg is not type(None)))
+    if origin in (list, List):
+        return pa.list_(_arrow_type(typing.get_args(hint)[0]))
+    return {int: pa.int64(), float: pa.float64(), str: pa.string(), bool: pa.bool_()}[hint]
+
+
+def arrow_schema(record_type):
+    """Arrow schema derived from a result dataclass's type hints."""
+    import pyarrow as pa
+
+    hints = typing.get_type_hints(record_type)
+    return pa.schema([pa.field(f.name, _arrow_type(hints[f.name])) for f in dataclasses.fields(record_type)])
+
+
+def table_name(record_type):
+    """Results table directory name for a record type, e.g. ParquetFileResult -> parquet_file."""
+    name = record_type.__name__[:-len('Result')] if record_type.__name__.endswith('Result') else record_type.__name__
+    return ''.join(f'_{c.lower()}' if c.isupper() else c for c in name).lstrip('_')
+
+
+class ResultWriter:
+    """Buffers result records and appends them as Parquet part files, one directory per record type.
+
+    Each flush writes <root>/<table>/part-<utc>-<pid>-<n>.parquet atomically,
+    so concurrent writers never collide and every table is readable as a
+    dataset with read_results().
+    """
+
+    def __init__(self, root=RESULTS_ROOT, flush_rows=DEFAULT_FLUSH_ROWS):
+        self.root = root
+        self.flush_rows = flush_rows
+        self._buffers = {}
+        self._parts = 0
+
+    def append(self, record):
+        buffer = self._buffers.setdefault(type(record), [])
+        buffer.append(record)
+        if len(buffer) >= self.flush_rows:
+            self._flush_type(type(record))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def _flush_type(self, record_type):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        from atomic_io import atomic_output_path
+
+        records = self._buffers.pop(record_type, [])
+        if not records:
+            return None
+        table = pa.Table.from_pylist([dataclasses.asdict(r) for r in records], schema=arrow_schema(record_type))
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(self.root, table_name(record_type), f'part-{stamp}-{os.getpid()}-{self._parts}.parquet')
+        self._parts += 1
+        with atomic_output_path(path) as tmp_path:
+            pq.write_table(table, tmp_path, compression='zstd')
+        count('result_rows', table.num_rows)
+        return path
+
+    def flush(self):
+        """Write every buffered record; returns the part files written."""
+        return [path for path in (self._flush_type(t) for t in list(self._buffers)) if path]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def read_results(record_type, root=RESULTS_ROOT, columns=None):
+    """Every part file of one results table as a DataFrame."""
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(root, table_name(record_type))
+    if not os.path.isdir(directory):
+        import pandas as pd
+        return pd.DataFrame(columns=columns or [f.name for f in dataclasses.fields(record_type)])
+    return pq.read_table(directory, columns=columns, schema=arrow_schema(record_type)).to_pandas()
+
+
+def results_root_from_argv(argv=None):
+    """RESULTS_ROOT for a bare --results, the given directory for --results=<dir>, None if absent."""
+    for arg in sys.argv[1:] if argv is None else argv:
+        if arg == '--results':
+            return RESULTS_ROOT
+        if arg.startswith('--results='):
+            return os.path.expanduser(arg.split('=', 1)[1])
+    return None
+
+
+def collect_parquet_file(file_path, analyzer, metadata_only=False, use_cache=True):
+    """Build a ParquetFileResult for one file: a full decode, or footer plus one sample row with metadata_only.
+
+    With use_cache, a result stored in the AnalysisCache for the same
+    analyzer and mode is returned while the file's size and mtime and
+    PARQUET_FILE_RESULT_VERSION still match; results without errors are stored.
+    """
+    if not use_cache:
+        return _collect_parquet_file(file_path, analyzer, metadata_only)
+    from analysis_cache import AnalysisCache
+
+    cache_key = f"{analyzer}.{'metadata' if metadata_only else 'full'}"
+    path = os.path.abspath(file_path)
+    with AnalysisCache() as cache:
+        hits, _ = cache.get_many(cache_key, [path], PARQUET_FILE_RESULT_VERSION)
+        if path in hits:
+            count('cache_hits')
+            return ParquetFileResult(**hits[path])
+        result = _collect_parquet_file(file_path, analyzer, metadata_only)
+        if result.error is None:
+            cache.put(cache_key, path, dataclasses.asdict(result), PARQUET_FILE_RESULT_VERSION)
+    return result
+
+
+def _collect_parquet_file(file_path, analyzer, metadata_only):
+    phase('open')
+    size_bytes = os.path.getsize(file_path)
+    count('file_bytes', size_bytes)
+    try:
+        with open(file_path, 'rb') as f:
+            valid = b'PAR1' in f.read(100)
+    except OSError:
+        valid = False
+    data_type, stamp, file_index = parse_lake_filename(os.path.basename(file_path))
+    result = ParquetFileResult(
+        analyzer=analyzer, path=os.path.abspath(file_path), file=os.path.basename(file_path),
+        size_bytes=size_bytes, valid_parquet=valid, data_type=data_type, stamp=stamp, file_index=file_index,
+        mode='metadata' if metadata_only else 'full',
+    )
+
+    try:
+        phase('import')
+        import pandas as pd
+        if metadata_only:
+            phase(None)
+            from parquet_metadata import read_footer_summary
+            footer = read_footer_summary(file_path)
+            df = footer['sample']
+            result.rows = footer['num_rows']
+            result.row_groups = footer['num_row_groups']
+            result.row_group_rows = [int(rows) for rows in footer['row_group_rows']]
+            result.created_by = footer['created_by']
+            result.timestamp_source = footer['timestamp_source']
+            ts_min, ts_max = footer['timestamp_min'], footer['timestamp_max']
+        else:
+            phase('decode')
+            df = pd.read_parquet(file_path)
+            result.rows = len(df)
+            ts_min = ts_max = None
+            if 'timestamp' in df.columns and len(df):
+                ts_min, ts_max = df['timestamp'].min(), df['timestamp'].max()
+        phase('compute')
+        count('rows', result.rows)
+
+        result.column_names = [str(col) for col in df.columns]
+        result.column_types = [str(df[col].dtype) for col in df.columns]
+        result.column_samples = [str(df[col].iloc[0]) if len(df) > 0 else 'N/A' for col in df.columns]
+        if ts_min is not None and ts_max is not None and not pd.isna(ts_min):
+            result.ts_min, result.ts_max = int(ts_min), int(ts_max)
+            result.duration_s = (result.ts_max - result.ts_min) / 1e6
+            if result.duration_s > 0:
+                result.rows_per_second = result.rows / result.duration_s
+    except ImportError as e:
+        result.error, result.error_kind = str(e), 'import'
+    except Exception as e:
+        result.error, result.error_kind = str(e), 'read'
+    return result
+
+
+def render_file_header(result, title):
+    """Print the title, file statistics and filename sections shared by the analyze_* reports."""
+    size_mb = result.size_bytes / (1024*1024)
+    print(title)
+    print("=" * 60)
+    print(f"File: {result.file}")
+    print(f"Full Path: {result.path}")
+    print()
+
+    print("📊 FILE STATISTICS")
+    print("-" * 60)
+    print(f"File Size: {size_mb:.2f} MB")
+    print(f"File Size: {size_mb * 1024:.0f} KB")
+    print(f"File Size: {result.size_bytes:,} bytes")
+    print()
+    if result.valid_parquet:
+        print("✅ Valid Parquet file (contains PAR1 magic number)")
+    else:
+        print("❓ File format unclear")
+    print()
+
+    if result.stamp is not None:
+        print("📝 FILENAME ANALYSIS")
+        print("-" * 60)
+        stamp = result.stamp
+        if result.data_type == 'composite':
+            print(f"Symbol: {result.file.split('-')[0]}")
+            print(f"Date: {stamp}")
+            print(f"File Index: {result.file_index}")
+            print(f"Parsed Date: {stamp[:4]}-{stamp[5:7]}-{stamp[8:10]}")
+        else:
+            print(f"Data Type: {result.data_type}")
+            print(f"Timestamp: {stamp}")
+            print(f"File Index: {result.file_index}")
+            if len(stamp) == 14:
+                print(f"Parsed Date: {stamp[:4]}-{stamp[4:6]}-{stamp[6:8]} {stamp[8:10]}:{stamp[10:12]}:{stamp[12:14]}")
+        print()
+
+
+def render_data_statistics(result, noun):
+    """Print the row group layout (metadata mode) and the DATA STATISTICS section."""
+    if result.mode == 'metadata':
+        from parquet_metadata import print_row_group_layout
+        print_row_group_layout({'num_row_groups': result.row_groups, 'row_group_rows': result.row_group_rows,
+                                'created_by': result.created_by, 'timestamp_source': result.timestamp_source})
+
+    print("📈 DATA STATISTICS")
+    print("-" * 60)
+    print(f"Total Rows ({noun.title()}): {result.rows:,}")
+    print(f"Total Columns: {len(result.column_names)}")
+    print(f"Data Shape: {result.rows:,} rows × {len(result.column_names)} columns")
+    if result.ts_min is not None:
+        import pandas as pd
+        start_time = pd.to_datetime(result.ts_min, unit='us')
+        end_time = pd.to_datetime(result.ts_max, unit='us')
+        print(f"Time Range: {start_time} to {end_time}")
+        print(f"Duration: {end_time - start_time}")
+        if result.rows_per_second is not None:
+            print(f"Average {noun.lower()} per second: {result.rows_per_second:.1f}")
+    print()
+
+
+def write_results(records, results_root=RESULTS_ROOT):
+    """Append records to the results store and report where they went."""
+    with ResultWriter(results_root) as writer:
+        writer.extend(records)
+    print(f"💾 {len(records):,} result record(s) written to {results_root}")
+
+
+def run_file_analyzer(analyze, default_path):
+    """Shared analyze_* CLI: [paths...] [--metadata] [--quiet] [--no-cache] [--results[=dir]].
+
+    Reports are printed unless --quiet; with --results every record is also
+    appended to the results store. --no-cache bypasses the analysis cache.
+    """
+    init_from_cli()
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith('--')] or [default_path]
+    metadata_only = '--metadata' in sys.argv[1:]
+    render = '--quiet' not in sys.argv[1:]
+    results_root = results_root_from_argv()
+    use_cache = '--no-cache' not in sys.argv[1:]
+
+    records = []
+    for path in paths:
+        records.append(analyze(os.path.expanduser(path), metadata_only=metadata_only, render=render,
+                               use_cache=use_cache))
+        if render and len(paths) > 1:
+            print()
+    if results_root is not None:
+        write_results(records, results_root)
+    return records
+
+
+def _is_leaf_object(value):
+    return isinstance(value, dict) and not any(isinstance(v, (dict, list)) for v in value.values())
+
+
+def render_json_tree(value, name='JSON Root Object', max_keys=2, max_items=3, max_leaf_keys=6, indent=''):
+    """Print a +-- tree of real JSON data.
+
+    Objects holding nested values show their first max_keys keys, arrays their
+    first max_items items and flat objects (records) up to max_leaf_keys
+    fields; the rest is summarized as '... (N more)'.
+    """
+    if indent == '':
+        print(name)
+
+    def describe(item):
+        if isinstance(item, dict):
+            return 'Object'
+        if isinstance(item, list):
+            return f'Array[{len(item)}]'
+        return json.dumps(item)
+
+    if isinstance(value, dict):
+        children = list(value.items())
+        limit = max_leaf_keys if _is_leaf_object(value) else max_keys
+    elif isinstance(value, list):
+        children = [(f'[{i}]', item) for i, item in enumerate(value)]
+        limit = max_items
+    else:
+        return
+    shown = children[:limit]
+    hidden = len(children) - len(shown)
+
+    for position, (key, item) in enumerate(shown):
+        last = position == len(shown) - 1 and hidden == 0
+        print(f"{indent}+-- {key}: {describe(item)}")
+        render_json_tree(item, max_keys=max_keys, max_items=max_items, max_leaf_keys=max_leaf_keys,
+                         indent=indent + ('    ' if last else '|   '))
+    if hidden:
+        print(f"{indent}+-- ... ({hidden} more)")
+
+
+def json_sample(value, max_keys=2, max_items=3, max_leaf_keys=6):
+    """Trimmed copy of JSON data with the same limits as render_json_tree."""
+    if isinstance(value, dict):
+        limit = max_leaf_keys if _is_leaf_object(value) else max_keys
+        return {k: json_sample(v, max_keys, max_items, max_leaf_keys) for k, v in list(value.items())[:limit]}
+    if isinstance(value, list):
+        return [json_sample(v, max_keys, max_items, max_leaf_keys) for v in value[:max_items]]
+    return value
+
+
+def render_field_table(rows):
+    """Print the TABLE FORMAT section from (field, type, value, description) rows."""
+    print("📊 TABLE FORMAT")
+    print("-" * 50)
+    print(f"{'Field':<30} {'Type':<15} {'Value':<20} {'Description'}")
+    print("-" * 50)
+    for field, kind, value, description in rows:
+        print(f"{field:<30} {kind:<15} {value:<20} {description}")
+    print()
+
+
+def json_type_name(value):
+    """JSON type name of a decoded value, as shown in the viewers' tables."""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, list):
+        return 'array'
+    if isinstance(value, dict):
+        return 'object'
+    return 'null'
+
+
+if __name__ == "__main__":
+    # Query a results table: analysis_results.py <table> [root]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    record_types = {table_name(t): t for t in (ParquetFileResult, SnapshotFrequencyResult,
+                                               FailedDownloadsResult, QualityStateResult, FundingDayResult,
+                                               SpreadDayResult)}
+    name = args[0] if args else 'parquet_file'
+    root = os.path.expanduser(args[1]) if len(args) > 1 else RESULTS_ROOT
+    if name not in record_types:
+        print(f"Unknown table {name!r}; choose from {', '.join(record_types)}")
+        sys.exit(2)
+
+    df = read_results(record_types[name], root)
+    print(f"📚 Results table: {name}")
+    print("=" * 60)
+    print(f"Rows: {len(df):,}")
+    print()
+    print(df.head(20).to_string())
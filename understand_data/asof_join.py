@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Trade / Book As-Of Join
+Tags every trade with the last book_snapshot_5 state at or before it, streaming day by day with the boundary snapshot carried over
+"""
+
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from atomic_io import atomic_output_path
+from bar_kernels import sort_order
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, LakeCatalog
+
+TRADE_DATASET = 'raw.binance-usdt-futures.Trade'
+BOOK_DATASET = 'raw.binance-usdt-futures.BookDepth'
+JOINED_DATASET = 'joined.binance-usdt-futures.TradeBook'
+TOP_OF_BOOK = ['bid_price_1', 'bid_volume_1', 'ask_price_1', 'ask_volume_1']
+
+
+def asof_indices(book_ts, trade_ts):
+    """Index of the last book timestamp <= each trade timestamp (-1 if none); both inputs sorted."""
+    return np.searchsorted(book_ts, trade_ts, side='right') - 1
+
+
+def read_sorted(paths, columns=None):
+    """Concatenate parquet files (optionally projected) into one table sorted by timestamp."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(path, columns=columns) for path in paths]
+    table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+    order = sort_order(table.column('timestamp').to_numpy())
+    return table if order is None else table.take(order)
+
+
+class BookCarry:
+    """Book state that survives a day boundary: the last snapshot seen so far."""
+
+    def __init__(self, book_columns):
+        self.book_columns = book_columns
+        self.timestamp = None
+        self.values = {name: np.nan for name in book_columns}
+
+    def update(self, book_ts, book_values):
+        if book_ts.size:
+            self.timestamp = int(book_ts[-1])
+            self.values = {name: book_values[name][-1] for name in self.book_columns}
+
+
+def join_day(trades, book_ts, book_values, carry):
+    """As-of join one day's trades (pyarrow Table) against sorted book arrays.
+
+    Trades before the day's first snapshot take the carried state from the
+    previous day. Returns the trades table with book_timestamp and the book
+    columns appended; trades with no prior snapshot at all get nulls.
+    """
+    import pyarrow as pa
+
+    trade_ts = trades.column('timestamp').to_numpy()
+    # Prepend the carried snapshot so index -1 maps onto it
+    idx = asof_indices(book_ts, trade_ts) + 1
+    missing = idx == 0 if carry.timestamp is None else np.zeros(idx.size, dtype=bool)
+
+    ext_ts = np.concatenate(([carry.timestamp if carry.timestamp is not None else 0], book_ts))
+    joined = trades.append_column('book_timestamp', pa.array(ext_ts[idx], mask=missing))
+    for name in carry.book_columns:
+        ext = np.concatenate(([carry.values[name]], book_values[name]))
+        joined = joined.append_column(name, pa.array(ext[idx], mask=missing))
+    return joined
+
+
+def iter_asof_join(symbol, start_date=None, end_date=None, book_columns=TOP_OF_BOOK, data_root=DATA_ROOT):
+    """Yield (date, joined table) per trade day for one symbol in date order."""
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh([TRADE_DATASET, BOOK_DATASET])
+        trade_files = catalog.lookup_files(TRADE_DATASET, symbol, start_date, end_date)
+        # The day before start_date seeds the carry for the first trades
+        book_files = catalog.lookup_files(BOOK_DATASET, symbol, None, end_date)
+
+    trades_by_date, books_by_date = {}, {}
+    for date, _, path in trade_files:
+        trades_by_date.setdefault(date, []).append(path)
+    for date, _, path in book_files:
+        books_by_date.setdefault(date, []).append(path)
+
+    def read_book(date):
+        book = read_sorted(books_by_date[date], ['timestamp'] + list(book_columns))
+        return (book.column('timestamp').to_numpy(),
+                {name: book.column(name).to_numpy(zero_copy_only=False) for name in book_columns})
+
+    carry = BookCarry(book_columns)
+    book_dates = sorted(books_by_date)
+    carried_date = None
+    for date in sorted(trades_by_date):
+        # Book-only days since the last trade day still move the state on; only the latest one matters
+        lo = 0 if carried_date is None else bisect_right(book_dates, carried_date)
+        hi = bisect_left(book_dates, date)
+        if hi > lo:
+            carry.update(*read_book(book_dates[hi - 1]))
+        if date in books_by_date:
+            book_ts, book_values = read_book(date)
+        else:
+            book_ts = np.zeros(0, dtype=np.int64)
+            book_values = {name: np.zeros(0) for name in book_columns}
+
+        trades = read_sorted(trades_by_date[date])
+        yield date, join_day(trades, book_ts, book_values, carry)
+        carry.update(book_ts, book_values)
+        carried_date = date
+
+
+def run_asof_join(symbol, start_date=None, end_date=None, write=False, data_root=DATA_ROOT):
+    """Join a symbol's trades with book state day by day, optionally writing a Hive-partitioned output."""
+    import pyarrow.parquet as pq
+
+    print("🔗 Trade / Book As-Of Join")
+    print("=" * 60)
+    print(f"Symbol: {symbol}")
+    print(f"Range: {start_date or 'start'} to {end_date or 'end'}")
+    print()
+
+    start = time.perf_counter()
+    total_trades = total_unmatched = days = 0
+    for date, joined in iter_asof_join(symbol, start_date, end_date, data_root=data_root):
+        unmatched = joined.column('book_timestamp').null_count
+        total_trades += joined.num_rows
+        total_unmatched += unmatched
+        days += 1
+        if write:
+            out = os.path.join(data_root, JOINED_DATASET, f'date={date}', f'symbol={symbol}', 'trades_book-0.parquet')
+            with atomic_output_path(out) as tmp_path:
+                pq.write_table(joined, tmp_path, compression='zstd')
+        print(f"{date}: {joined.num_rows:,} trades, {unmatched:,} without prior snapshot")
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("📊 JOIN SUMMARY")
+    print("-" * 60)
+    print(f"Days: {days:,}")
+    print(f"Trades joined: {total_trades:,}")
+    print(f"Trades without prior snapshot: {total_unmatched:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({total_trades / elapsed if elapsed > 0 else 0:,.0f} trades/s)")
+    print()
+    print("✅ As-of join complete")
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    symbol = args[0] if len(args) > 0 else 'BTCUSDT'
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+
+    run_asof_join(symbol, start_date, end_date, write='--write' in sys.argv[1:])
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Atomic File Writes
+Write-to-temp-then-rename helpers so readers never observe half-written state or data files
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_output_path(path):
+    """Yield a temporary path in the target directory and rename it over path on success."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path, data, indent=2):
+    """Serialize data to path atomically, fsyncing before the rename."""
+    with atomic_output_path(path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_feature_table(columns, path, symbol):
+    """Write a dict of arrays as parquet atomically, with symbol as a dictionary column."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table(columns)
+    table = table.append_column('symbol', pa.array([symbol] * table.num_rows).dictionary_encode())
+    with atomic_output_path(path) as tmp_path:
+        pq.write_table(table, tmp_path, compression='zstd')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bar Kernels
+Segment reductions over sorted timestamp columns for fixed-interval bar aggregation
+"""
+
+import re
+
+import numpy as np
+
+_BAR_RE = re.compile(r'^(\d+)(us|ms|s|m|h|d)$')
+_UNIT_US = {'us': 1, 'ms': 1_000, 's': 1_000_000, 'm': 60_000_000, 'h': 3_600_000_000, 'd': 86_400_000_000}
+
+
+def parse_bar(bar):
+    """Bar length in microseconds from strings like '1s', '1m', '5m', '1h'."""
+    match = _BAR_RE.match(bar)
+    if not match:
+        raise ValueError(f"Unrecognized bar size: {bar!r} (expected e.g. 1s, 1m, 5m, 1h)")
+    return int(match.group(1)) * _UNIT_US[match.group(2)]
+
+
+def sort_order(timestamps):
+    """None if timestamps are already non-decreasing, else a stable argsort."""
+    ts = np.asarray(timestamps)
+    if ts.size < 2 or (ts[1:] >= ts[:-1]).all():
+        return None
+    return np.argsort(ts, kind='stable')
+
+
+def bar_segments(timestamps, bar_us):
+    """Segment layout of sorted timestamps into bars of bar_us.
+
+    Returns (bar_start_us, starts, counts): the start time of every non-empty
+    bar, the index of its first row and its row count. starts is suitable for
+    np.ufunc.reduceat.
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if ts.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    bar_id = ts // bar_us
+    starts = np.concatenate(([0], np.flatnonzero(bar_id[1:] != bar_id[:-1]) + 1))
+    counts = np.diff(np.append(starts, ts.size))
+    return bar_id[starts] * bar_us, starts, counts
+
+
+def segment_first(values, starts):
+    """First value of each segment."""
+    return np.asarray(values)[starts]
+
+
+def segment_last(values, starts, counts):
+    """Last value of each segment."""
+    return np.asarray(values)[starts + counts - 1]
+
+
+def segment_sum(values, starts):
+    """Sum of each segment."""
+    return np.add.reduceat(np.asarray(values), starts) if len(starts) else np.zeros(0)
+
+
+def segment_max(values, starts):
+    """Maximum of each segment."""
+    return np.maximum.reduceat(np.asarray(values), starts) if len(starts) else np.zeros(0)
+
+
+def segment_min(values, starts):
+    """Minimum of each segment."""
+    return np.minimum.reduceat(np.asarray(values), starts) if len(starts) else np.zeros(0)
+
+
+def segment_nanmean(values, starts):
+    """Per-segment mean ignoring NaN (NaN for all-NaN segments)."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(starts):
+        return np.zeros(0)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    n = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, sums / n, np.nan)
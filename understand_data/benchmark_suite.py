@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Analyzer Benchmark Suite
+Generates a synthetic Hive-partitioned lake and times every analyzer and viewer against it, keeping a JSON history
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from atomic_io import write_json_atomic
+from lake_catalog import RESULTS_ROOT
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(RESULTS_ROOT, 'benchmark_history.json')
+BOOK_DATASET = 'raw.binance-usdt-futures.BookDepth'
+TRADE_DATASET = 'raw.binance-usdt-futures.Trade'
+MARK_DATASET = 'raw.binance-usdt-futures.MarkPrice'
+COMPOSITE_DATASET = 'raw.binance-usdt-futures.Composite'
+
+DEFAULT_SYMBOLS = ('BTCUSDT', 'DOTUSDT')
+SNAPSHOT_INTERVAL_MS = (10, 50)
+TRADES_PER_SECOND = 20
+MARK_INTERVAL_MS = 1_000
+US_PER_DAY = 86_400_000_000
+
+
+def _day_start_us(date):
+    return int(datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+
+
+def _cadence(rng, start_us, span_us, low_ms, high_ms):
+    """Timestamps from start_us with uniform low..high ms gaps, truncated to span_us."""
+    expected = int(span_us / ((low_ms + high_ms) / 2 * 1_000) * 1.05) + 1
+    ts = start_us + np.cumsum(rng.integers(low_ms * 1_000, high_ms * 1_000 + 1, size=expected))
+    return ts[ts < start_us + span_us]
+
+
+def _random_walk(rng, n, start, step):
+    return start + np.cumsum(rng.normal(0, step, size=n))
+
+
+def synth_book(rng, symbol, start_us, span_us, base_price, tick):
+    ts = _cadence(rng, start_us, span_us, *SNAPSHOT_INTERVAL_MS)
+    n = ts.size
+    # Work in whole ticks so every level sits on the tick grid, as real quotes do
+    mid_ticks = np.round(_random_walk(rng, n, base_price, tick) / tick).astype(np.int64)
+    spread_ticks = rng.integers(1, 4, size=n)
+    bid_ticks = mid_ticks - spread_ticks // 2
+    ask_ticks = bid_ticks + spread_ticks
+    columns = {
+        'exchange': ['binance-futures'] * n,
+        'symbol': [symbol] * n,
+        'timestamp': ts,
+        'local_timestamp': ts + rng.integers(1_000, 20_000, size=n),
+    }
+    for level in range(1, 6):
+        columns[f'ask_price_{level}'] = np.round((ask_ticks + level - 1) * tick, 8)
+        columns[f'ask_volume_{level}'] = np.round(rng.exponential(5, size=n), 3)
+    for level in range(1, 6):
+        columns[f'bid_price_{level}'] = np.round((bid_ticks - level + 1) * tick, 8)
+        columns[f'bid_volume_{level}'] = np.round(rng.exponential(5, size=n), 3)
+    return columns
+
+
+def synth_trades(rng, symbol, start_us, span_us, base_price, tick):
+    n = rng.poisson(TRADES_PER_SECOND * span_us / 1_000_000)
+    ts = np.sort(start_us + rng.integers(0, span_us, size=n))
+    return {
+        'exchange': ['binance-futures'] * n,
+        'symbol': [symbol] * n,
+        'timestamp': ts,
+        'local_timestamp': ts + rng.integers(1_000, 20_000, size=n),
+        'id': np.arange(n, dtype=np.int64).astype(str),
+        'side': np.where(rng.random(n) < 0.5, 'buy', 'sell'),
+        'price': np.round(np.round(_random_walk(rng, n, base_price, tick) / tick) * tick, 8),
+        'amount': np.round(rng.exponential(0.5, size=n), 3),
+    }
+
+
+def synth_mark(rng, symbol, start_us, span_us, base_price, tick):
+    ts = np.arange(start_us, start_us + span_us, MARK_INTERVAL_MS * 1_000, dtype=np.int64)
+    n = ts.size
+    index = _random_walk(rng, n, base_price, tick)
+    mark = index * (1 + rng.normal(0, 1e-4, size=n))
+    eight_hours = 8 * 3_600_000_000
+    return {
+        'exchange': ['binance-futures'] * n,
+        'symbol': [symbol] * n,
+        'timestamp': ts,
+        'local_timestamp': ts + rng.integers(1_000, 20_000, size=n),
+        'funding_timestamp': (ts // eight_hours + 1) * eight_hours,
+        'funding_rate': np.round(np.full(n, 1e-4) + rng.normal(0, 2e-5, size=n).cumsum() / np.sqrt(n), 8),
+        'predicted_funding_rate': np.round(np.full(n, 1e-4), 8),
+        'open_interest': np.round(_random_walk(rng, n, 1e5, 10), 3),
+        'last_price': np.round(mark + rng.normal(0, tick, size=n), 8),
+        'index_price': np.round(index, 8),
+        'mark_price': np.round(mark, 8),
+    }
+
+
+def generate_synthetic_lake(home, symbols=DEFAULT_SYMBOLS, dates=('2022-07-07',), hours=24, seed=7):
+    """Write a synthetic lake and JSON state under <home>/data, laid out like the real ~/data.
+
+    Returns a manifest of the written files with their row counts.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from composite_builder import build_composite
+
+    rng = np.random.default_rng(seed)
+    data_root = os.path.join(home, 'data')
+    span_us = int(hours * 3_600_000_000)
+    manifest = {}
+    for date in dates:
+        start_us = _day_start_us(date)
+        stamp = date.replace('-', '') + '000000'
+        for i, symbol in enumerate(symbols):
+            base_price, tick = (20_000.0, 0.1) if i == 0 else (10.0 + i, 0.001)
+            written = {}
+            for dataset, prefix, synth in ((BOOK_DATASET, 'book_snapshot_5', synth_book),
+                                           (TRADE_DATASET, 'trades', synth_trades),
+                                           (MARK_DATASET, 'derivative_ticker', synth_mark)):
+                path = os.path.join(data_root, dataset, f'date={date}', f'symbol={symbol}', f'{prefix}-{stamp}-0.parquet')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                table = pa.table(synth(rng, symbol, start_us, span_us, base_price, tick))
+                pq.write_table(table, path)
+                written[dataset] = [path]
+                manifest.setdefault(dataset, []).append({'path': path, 'rows': table.num_rows})
+
+            composite = build_composite(written[BOOK_DATASET], written[TRADE_DATASET], written[MARK_DATASET])
+            composite = composite.add_column(0, 'symbol', pa.array([symbol] * composite.num_rows))
+            path = os.path.join(data_root, COMPOSITE_DATASET, f'date={date}', f'symbol={symbol}', f'{symbol}-{date}-0.parquet')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(composite, path)
+            manifest.setdefault(COMPOSITE_DATASET, []).append({'path': path, 'rows': composite.num_rows})
+
+    manifest.update(_write_synthetic_json(data_root, symbols, dates, rng))
+    return manifest
+
+
+def _write_synthetic_json(data_root, symbols, dates, rng):
+    """Failed-download and quality-state JSON shaped like the production files."""
+    now = datetime.now(timezone.utc)
+    manifest = {}
+    for source, dataset in (('binance', 'metrics'), ('tardis', 'book_snapshot_5')):
+        failures = {}
+        for symbol in symbols:
+            for date in dates:
+                failures.setdefault(symbol, {})[date] = {
+                    'reason': 'no_data',
+                    'timestamp': (now - timedelta(days=int(rng.integers(1, 30)))).isoformat(),
+                    'retry_count': int(rng.integers(1, 4)),
+                    'permanent': bool(rng.random() < 0.5),
+                    'error_msg': 'No data available (404)',
+                }
+        path = os.path.join(data_root, f'{source}_failed_downloads.json')
+        write_json_atomic(path, {source: {dataset: failures}})
+        manifest[f'{source}_failed_downloads'] = [{'path': path, 'rows': len(symbols) * len(dates)}]
+
+    last_date = max(dates)
+    state = {
+        'last_processed_date': last_date,
+        'last_updated_utc': now.isoformat(),
+        'partitions_checked_in_last_run': sorted(dates),
+        'check_results': [
+            {'check_name': 'Date Coverage', 'summary': f'Found {len(dates)}/{len(dates)} days.', 'details': {}},
+            {'check_name': 'Timestamp Continuity', 'summary': 'Found 0 total gaps.', 'details': {}},
+            {'check_name': 'Column Nullness', 'summary': 'No nulls found in any columns.', 'details': {}},
+        ],
+        'last_processed_timestamp': (_day_start_us(last_date) + US_PER_DAY) // 1_000 - 1,
+    }
+    path = os.path.join(data_root, '_quality_state', BOOK_DATASET, symbols[0], 'state.json')
+    write_json_atomic(path, state)
+    manifest['quality_state'] = [{'path': path, 'rows': 1}]
+    return manifest
+
+
+def benchmark_cases(manifest):
+    """(name, script, args, rows) for every analyzer, the frequency analyzer and the viewers."""
+    book, trade, mark, composite = (manifest[d][0] for d in (BOOK_DATASET, TRADE_DATASET, MARK_DATASET, COMPOSITE_DATASET))
+    cases = []
+    for name, script, entry in (('bookdepth', 'analyze_bookdepth.py', book), ('trade', 'analyze_trade.py', trade),
+                                ('markprice', 'analyze_markprice.py', mark), ('composite', 'analyze_composite.py', composite)):
+        # --no-cache: every repeat must decode the file, not hit the analysis cache filled by the first
+        cases.append((f'analyze_{name}', script, [entry['path'], '--no-cache'], entry['rows']))
+        cases.append((f'analyze_{name} --metadata', script, [entry['path'], '--metadata', '--no-cache'], entry['rows']))
+    cases.append(('snapshot_frequency', 'snapshot_frequency_analyzer.py', [book['path']], book['rows']))
+    for name, script, key in (('binance_failed_viewer', 'binance_failed_viewer.py', 'binance_failed_downloads'),
+                              ('tardis_failed_viewer', 'tardis_failed_viewer.py', 'tardis_failed_downloads'),
+                              ('quality_state_viewer', 'quality_state_viewer.py', 'quality_state')):
+        entry = manifest[key][0]
+        cases.append((name, script, [entry['path']], entry['rows']))
+    return cases
+
+
+def _track_peak_rss(pid, done, peak_kb):
+    """Poll a running child's VmHWM (its own peak RSS, reset on exec) until done is set."""
+    path = f'/proc/{pid}/status'
+    while not done.is_set():
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peak_kb[0] = max(peak_kb[0], int(line.split()[1]))
+                        break
+        except OSError:
+            return
+        done.wait(0.005)
+
+
+def time_script(script, args, home):
+    """Run one script in a child process; (wall seconds, peak RSS in MB, exit code).
+
+    On Linux the peak comes from polling /proc/<pid>/status VmHWM on a side
+    thread: wait4's ru_maxrss also counts the parent's RSS at fork, which
+    after generating the lake dwarfs small children. Elsewhere ru_maxrss is
+    the best available.
+    """
+    env = dict(os.environ, HOME=home)
+    start = time.perf_counter()
+    # Popen returns once the child has exec'd, so VmHWM no longer reflects this process
+    proc = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, script)] + list(args),
+                            cwd=SCRIPT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    done, peak_kb = threading.Event(), [0]
+    tracker = None
+    if os.path.exists(f'/proc/{proc.pid}/status'):
+        tracker = threading.Thread(target=_track_peak_rss, args=(proc.pid, done, peak_kb), daemon=True)
+        tracker.start()
+    # wait4 gives this child's own rusage rather than the max over all children
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    done.set()
+    if tracker is not None:
+        tracker.join()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if peak_kb[0]:
+        rss_mb = peak_kb[0] / 1024
+    else:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return wall, rss_mb, proc.returncode
+
+
+def run_benchmarks(cases, home, repeats=3):
+    """Best-of-repeats wall time and peak RSS per case."""
+    results = []
+    for name, script, args, rows in cases:
+        runs = [time_script(script, args, home) for _ in range(repeats)]
+        wall = min(run[0] for run in runs)
+        results.append({
+            'case': name,
+            'rows': rows,
+            'wall_s': round(wall, 4),
+            'peak_rss_mb': round(max(run[1] for run in runs), 1),
+            'rows_per_s': round(rows / wall, 1) if wall > 0 else None,
+            'exit_code': max(run[2] for run in runs),
+        })
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(run, history_path=HISTORY_PATH):
+    """Append a run to the JSON history; returns the most recent earlier run with the same params (or None)."""
+    history = []
+    if os.path.exists(history_path):
+        with open(history_path, 'r') as f:
+            history = json.load(f)
+    previous = next((entry for entry in reversed(history) if entry.get('params') == run['params']), None)
+    history.append(run)
+    write_json_atomic(history_path, history)
+    return previous
+
+
+def print_results(results, previous=None):
+    before = {r['case']: r for r in previous['results']} if previous else {}
+    print(f"{'Case':<34} {'Rows':>11} {'Wall (s)':>9} {'RSS (MB)':>9} {'Rows/s':>13} {'vs last':>8}")
+    print("-" * 90)
+    for r in results:
+        prior = before.get(r['case'])
+        change = f"{(r['wall_s'] / prior['wall_s'] - 1) * 100:+.0f}%" if prior and prior['wall_s'] else ''
+        status = '' if r['exit_code'] == 0 else f"  ❌ exit {r['exit_code']}"
+        print(f"{r['case']:<34} {r['rows']:>11,} {r['wall_s']:>9.3f} {r['peak_rss_mb']:>9.1f} "
+              f"{r['rows_per_s'] or 0:>13,.0f} {change:>8}{status}")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    hours = float(options.get('hours', 24))
+    repeats = int(options.get('repeats', 3))
+    symbols = tuple(options['symbols'].split(',')) if 'symbols' in options else DEFAULT_SYMBOLS
+    home = os.path.expanduser(args[0]) if args else tempfile.mkdtemp(prefix='understand_data_bench_')
+
+    print("⏱️ Analyzer Benchmark Suite")
+    print("=" * 60)
+    print(f"Synthetic home: {home}")
+    print(f"Symbols: {', '.join(symbols)}  Hours: {hours:g}  Repeats: {repeats}")
+    start = time.perf_counter()
+    manifest = generate_synthetic_lake(home, symbols, hours=hours)
+    print(f"Generated lake in {time.perf_counter() - start:.1f}s")
+    print()
+
+    results = run_benchmarks(benchmark_cases(manifest), home, repeats)
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': {'symbols': list(symbols), 'hours': hours, 'repeats': repeats},
+        'results': results,
+    }
+    previous = append_history(run)
+    print_results(results, previous)
+    print()
+    print(f"History: {HISTORY_PATH}")
+    print("✅ Benchmark complete")
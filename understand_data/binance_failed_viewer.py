@@ -4,71 +4,38 @@ Binance Failed Downloads Viewer
 Simple script to view the essential structure of binance_failed_downloads.json files.
 """
 
-import json
 import os
+import sys
 
+from analysis_results import results_root_from_argv, write_results
+from failed_downloads_store import collect_failed_downloads, read_json, render_failed_downloads_report
+from instrumentation import count, init_from_cli, phase
 
-def view_binance_failed_downloads():
-    """Show a quick overview of the binance failed downloads JSON structure."""
-    file_path = os.path.expanduser('~/data/binance_failed_downloads.json')
-    
-    print("🔍 Binance Failed Downloads Structure Viewer")
-    print("=" * 50)
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    print(f"📁 File: {os.path.basename(file_path)}")
-    print()
-    
-    # Display Table Format
-    print("📊 TABLE FORMAT")
-    print("-" * 50)
-    print(f"{'Field':<30} {'Type':<15} {'Value':<20} {'Description'}")
-    print("-" * 50)
-    
-    # Root level fields
-    print(f"{'binance':<30} {'object':<15} {'{metrics}':<20} {'Root object containing data sources'}")
-    
-    print()
-    
-    # Display Organizational Chart
-    print("📋 ORGANIZATIONAL CHART")
-    print("-" * 50)
-    print("JSON Root Object")
-    print("+-- binance: Object")
-    print("    +-- metrics: Object")
-    print("        +-- BTCUSDT: Object")
-    print("        |   +-- 2025-07-15: Object")
-    print("        |   |   +-- reason: \"no_data\"")
-    print("        |   |   +-- timestamp: \"2025-07-16T03:21:03.447082+00:00\"")
-    print("        |   |   +-- retry_count: 1")
-    print("        |   |   +-- permanent: true")
-    print("        |   |   +-- error_msg: \"No data available (404)\"")
-    print("        |   +-- 2025-07-16: Object")
-    print("        |       +-- reason: \"no_data\"")
-    print("        |       +-- timestamp: \"2025-07-17T02:52:47.655582+00:00\"")
-    print("        |       +-- retry_count: 1")
-    print("        |       +-- permanent: true")
-    print("        |       +-- error_msg: \"No data available (404)\"")
-    print("        +-- BTCDOMUSDT: Object")
-    print("        |   +-- 2025-07-15: Object")
-    print("        |   |   +-- reason: \"no_data\"")
-    print("        |   |   +-- timestamp: \"2025-07-16T03:22:08.873557+00:00\"")
-    print("        |   |   +-- retry_count: 1")
-    print("        |   |   +-- permanent: true")
-    print("        |   |   +-- error_msg: \"No data available (404)\"")
-    print("        |   +-- 2025-07-16: Object")
-    print("        |       +-- reason: \"no_data\"")
-    print("        |       +-- timestamp: \"2025-07-17T02:52:47.436509+00:00\"")
-    print("        |       +-- retry_count: 1")
-    print("        |       +-- permanent: true")
-    print("        |       +-- error_msg: \"No data available (404)\"")
-    print("        +-- ... (more symbols)")
-    
-    print()
-    print("✅ Binance failed downloads structure overview complete")
+
+def view_binance_failed_downloads(file_path=None, render=True):
+    """Show a quick overview of the binance failed downloads JSON structure; returns a FailedDownloadsResult."""
+    if file_path is None:
+        file_path = os.path.expanduser('~/data/binance_failed_downloads.json')
+    
+    phase('decode')
+    count('bytes', os.path.getsize(file_path))
+    data = read_json(file_path)
+    phase('compute')
+    result = collect_failed_downloads(data, file_path, 'binance')
+    
+    if render:
+        phase('report')
+        render_failed_downloads_report(result, data, "🔍 Binance Failed Downloads Structure Viewer")
+        print("✅ Binance failed downloads structure overview complete")
+    return result
 
 
 if __name__ == "__main__":
-    view_binance_failed_downloads() 
\ No newline at end of file
+    # binance_failed_viewer.py [path] [--quiet] [--results[=dir]]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    results_root = results_root_from_argv()
+    result = view_binance_failed_downloads(os.path.expanduser(args[0]) if args else None,
+                                           render='--quiet' not in sys.argv[1:])
+    if results_root is not None:
+        write_results([result], results_root)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Composite Builder
+Builds derived.binance-usdt-futures.Composite per-symbol/day files from BookDepth + Trade + MarkPrice, rebuilding only missing or stale partitions
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from asof_join import asof_indices, read_sorted
+from atomic_io import atomic_output_path
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, LakeCatalog, partition_dir
+from trade_bars import resolve_trade_columns
+
+BOOK_DATASET = 'raw.binance-usdt-futures.BookDepth'
+TRADE_DATASET = 'raw.binance-usdt-futures.Trade'
+MARK_DATASET = 'raw.binance-usdt-futures.MarkPrice'
+# Built composites go to their own dataset: the vendor's raw Composite files have a richer schema and are never overwritten
+COMPOSITE_DATASET = 'derived.binance-usdt-futures.Composite'
+SOURCE_DATASETS = (BOOK_DATASET, TRADE_DATASET, MARK_DATASET)
+
+BOOK_COLUMNS = ['timestamp'] + [f'{side}_{field}_{level}' for side in ('bid', 'ask')
+                                for field in ('price', 'volume') for level in range(1, 6)]
+MARK_COLUMNS = ('mark_price', 'index_price', 'last_price', 'funding_rate', 'predicted_funding_rate',
+                'funding_timestamp', 'open_interest')
+
+
+def composite_path(data_root, date, symbol):
+    """Path of one composite file: <symbol>-<date>-0.parquet in its date=/symbol= partition."""
+    return os.path.join(partition_dir(data_root, COMPOSITE_DATASET, date, symbol), f'{symbol}-{date}-0.parquet')
+
+
+def asof_column(spine_ts, source_ts, values):
+    """values as of each spine timestamp, plus a mask of spine rows with no prior source row."""
+    idx = asof_indices(source_ts, spine_ts)
+    missing = idx < 0
+    return values[np.maximum(idx, 0)] if values.size else np.zeros(idx.size, dtype=values.dtype), missing
+
+
+def build_composite(book_paths, trade_paths, mark_paths):
+    """One composite table: every book snapshot with the trade and mark state prevailing at it.
+
+    Trade columns are the last trade at or before the snapshot plus the count
+    and volume of trades since the previous snapshot; mark columns are the
+    last derivative_ticker update at or before it.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    book = read_sorted(book_paths, BOOK_COLUMNS)
+    spine_ts = book.column('timestamp').to_numpy()
+    table = book
+
+    if trade_paths:
+        price_col, size_col, _ = resolve_trade_columns(set(pq.read_schema(trade_paths[0]).names))
+        trades = read_sorted(trade_paths, ['timestamp', price_col, size_col])
+        trade_ts = trades.column('timestamp').to_numpy()
+        price = trades.column(price_col).to_numpy().astype(np.float64)
+        size = trades.column(size_col).to_numpy().astype(np.float64)
+        for name, values in (('last_trade_price', price), ('last_trade_amount', size)):
+            column, missing = asof_column(spine_ts, trade_ts, values)
+            table = table.append_column(name, pa.array(column, mask=missing))
+        # Interval aggregates from cumulative sums at each snapshot boundary
+        upto = np.searchsorted(trade_ts, spine_ts, side='right')
+        since = np.concatenate(([0], upto[:-1]))
+        cum_volume = np.concatenate(([0.0], np.cumsum(size)))
+        table = table.append_column('trade_count', pa.array(upto - since))
+        table = table.append_column('trade_volume', pa.array(cum_volume[upto] - cum_volume[since]))
+
+    if mark_paths:
+        available = set(pq.read_schema(mark_paths[0]).names)
+        columns = [name for name in MARK_COLUMNS if name in available]
+        marks = read_sorted(mark_paths, ['timestamp'] + columns)
+        mark_ts = marks.column('timestamp').to_numpy()
+        for name in columns:
+            column, missing = asof_column(spine_ts, mark_ts, marks.column(name).to_numpy(zero_copy_only=False))
+            table = table.append_column(name, pa.array(column, mask=missing))
+    return table
+
+
+def build_partition(task):
+    """Build and atomically write one (date, symbol) composite."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    date, symbol, sources, data_root = task
+    try:
+        if not sources.get(BOOK_DATASET):
+            return date, symbol, 'no book', 0
+        table = build_composite(sources[BOOK_DATASET], sources.get(TRADE_DATASET), sources.get(MARK_DATASET))
+        table = table.add_column(0, 'symbol', pa.array([symbol] * table.num_rows).dictionary_encode())
+        with atomic_output_path(composite_path(data_root, date, symbol)) as tmp_path:
+            pq.write_table(table, tmp_path, compression='zstd')
+        return date, symbol, 'written', table.num_rows
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0
+
+
+def plan_partitions(catalog, symbols=None, start_date=None, end_date=None, force=False):
+    """(date, symbol) -> {dataset: [paths]} for composites that are missing or older than any source file."""
+    sources, newest = {}, {}
+    for dataset in SOURCE_DATASETS:
+        for record in catalog.file_records(dataset, start_date=start_date, end_date=end_date):
+            if symbols is not None and record['symbol'] not in symbols:
+                continue
+            key = (record['date'], record['symbol'])
+            sources.setdefault(key, {}).setdefault(dataset, []).append(record['path'])
+            newest[key] = max(newest.get(key, 0), record['mtime_ns'])
+
+    built = {(r['date'], r['symbol']): r['mtime_ns']
+             for r in catalog.file_records(COMPOSITE_DATASET, start_date=start_date, end_date=end_date)
+             if r['name'] == f"{r['symbol']}-{r['date']}-0.parquet"}
+    return {key: paths for key, paths in sources.items()
+            if BOOK_DATASET in paths and (force or built.get(key, -1) < newest[key])}
+
+
+def run_composite_build(symbols=None, start_date=None, end_date=None, force=False, data_root=DATA_ROOT, workers=None):
+    """Rebuild every stale composite partition across a process pool."""
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh(SOURCE_DATASETS + (COMPOSITE_DATASET,))
+        plan = plan_partitions(catalog, symbols, start_date, end_date, force)
+
+    print("🧩 Composite Builder")
+    print("=" * 60)
+    print(f"Stale or missing partitions: {len(plan):,}")
+    print(f"Output: {os.path.join(data_root, COMPOSITE_DATASET)}")
+    print()
+
+    start = time.perf_counter()
+    tasks = [(date, symbol, paths, data_root) for (date, symbol), paths in sorted(plan.items())]
+    written = rows = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, status, n in pool.map(build_partition, tasks, chunksize=1):
+            if status == 'written':
+                written += 1
+                rows += n
+            else:
+                print(f"❌ {date} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    if written:
+        with LakeCatalog(data_root) as catalog:
+            catalog.refresh([COMPOSITE_DATASET])
+
+    print("📊 BUILD SUMMARY")
+    print("-" * 60)
+    print(f"Written: {written:,} of {len(plan):,}")
+    print(f"Composite rows: {rows:,}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    print()
+    print("✅ Composite build complete")
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    symbols = set(args[0].split(',')) if len(args) > 0 and args[0] != 'all' else None
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+
+    run_composite_build(symbols, start_date, end_date, force='--force' in sys.argv[1:])
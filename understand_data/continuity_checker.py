@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Incremental Quality State Checker
+Resumes from last_processed_timestamp in _quality_state/<dataset>/<SYMBOL>/state.json and checks only new partitions
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_cls, datetime, timezone
+
+import numpy as np
+
+from atomic_io import write_json_atomic
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, LakeCatalog
+from parquet_metadata import column_null_counts, row_group_column_ranges
+from rowgroup_stream import iter_row_group_batches
+
+QUALITY_STATE_ROOT = os.path.join(DATA_ROOT, '_quality_state')
+DEFAULT_GAP_THRESHOLD_MS = 60_000
+KEY_COLUMNS = ('symbol', 'timestamp')
+
+
+def state_path(dataset, symbol, state_root=QUALITY_STATE_ROOT):
+    """Path of the quality state file for one dataset/symbol."""
+    return os.path.join(state_root, dataset, symbol, 'state.json')
+
+
+def load_state(path):
+    """Load a state.json, or an empty state for a symbol that was never checked."""
+    if not os.path.exists(path):
+        return {'check_results': []}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ContinuityScan:
+    """Gap detection over a timestamp stream that is carried across file and day boundaries."""
+
+    def __init__(self, last_ts_us=None, gap_threshold_ms=DEFAULT_GAP_THRESHOLD_MS):
+        self.last_ts_us = last_ts_us
+        self.gap_threshold_us = gap_threshold_ms * 1_000
+        self.total_gaps = 0
+        self.max_gap_us = 0
+        self.rows = 0
+
+    def update(self, timestamps):
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if ts.size == 0:
+            return
+        self.rows += ts.size
+        chained = ts if self.last_ts_us is None else np.concatenate(([self.last_ts_us], ts))
+        if chained.size > 1:
+            deltas = np.diff(chained)
+            self.total_gaps += int((deltas > self.gap_threshold_us).sum())
+            self.max_gap_us = max(self.max_gap_us, int(deltas.max()))
+        self.last_ts_us = int(ts[-1]) if self.last_ts_us is None else max(self.last_ts_us, int(ts[-1]))
+
+
+def replace_check(state, check):
+    """Replace the check with the same check_name in place, appending it if absent."""
+    results = state.setdefault('check_results', [])
+    for i, existing in enumerate(results):
+        if existing.get('check_name') == check['check_name']:
+            results[i] = check
+            return
+    results.append(check)
+
+
+def find_check(state, name):
+    """Return the check result named name, or None."""
+    for check in state.get('check_results', []):
+        if check.get('check_name') == name:
+            return check
+    return None
+
+
+def has_rows_from(file_path, ts_us):
+    """True if a file may hold timestamps >= ts_us, judged from its footer statistics."""
+    import pyarrow.parquet as pq
+
+    ranges = row_group_column_ranges(pq.ParquetFile(file_path).metadata, 'timestamp')
+    return any(bounds is None or bounds[1] >= ts_us for bounds in ranges)
+
+
+def check_symbol(dataset, symbol, data_root=DATA_ROOT, state_root=QUALITY_STATE_ROOT,
+                 gap_threshold_ms=DEFAULT_GAP_THRESHOLD_MS, refresh=True):
+    """Check the partitions newer than the stored state for one symbol and update state.json.
+
+    The last processed day is checked again when its files hold rows after
+    last_processed_timestamp (a day that was still being written), scanning
+    only those rows for continuity and nullness. refresh=False skips the
+    catalog refresh for callers that already refreshed it.
+    """
+    path = state_path(dataset, symbol, state_root)
+    state = load_state(path)
+    last_date = state.get('last_processed_date')
+    # last_processed_timestamp is stored in milliseconds; the data is in microseconds
+    last_ts_ms = state.get('last_processed_timestamp')
+    last_ts_us = last_ts_ms * 1_000 if last_ts_ms is not None else None
+    # The stored value is truncated to the millisecond, so the first unseen row is at or after the next one
+    resume_us = (last_ts_ms + 1) * 1_000 if last_ts_ms is not None else None
+
+    with LakeCatalog(data_root) as catalog:
+        if refresh:
+            catalog.refresh([dataset])
+        new_files = catalog.lookup_files(dataset, symbol, start_date=last_date)
+    files_by_date = {}
+    for date, _, file_path in new_files:
+        files_by_date.setdefault(date, []).append(file_path)
+    resumed = last_date in files_by_date and (
+        resume_us is None or any(has_rows_from(file_path, resume_us) for file_path in files_by_date[last_date]))
+    if last_date in files_by_date and not resumed:
+        del files_by_date[last_date]
+    if not files_by_date:
+        return {'symbol': symbol, 'new_dates': 0, 'gaps': 0, 'status': 'up to date'}
+
+    scan = ContinuityScan(last_ts_us, gap_threshold_ms)
+    null_counts, row_counts = {}, {}
+    checked = []
+    for date, files in sorted(files_by_date.items()):
+        since_us = resume_us if date == last_date else None
+        rows_before = scan.rows
+        for file_path in files:
+            for batch in iter_row_group_batches(file_path, columns=['timestamp']):
+                ts = batch.column(0).to_numpy()
+                if since_us is not None:
+                    ts = ts[ts >= since_us]
+                scan.update(ts)
+            num_rows, nulls, _ = column_null_counts(file_path, exclude=KEY_COLUMNS, since_us=since_us)
+            for name, count in nulls.items():
+                null_counts[name] = null_counts.get(name, 0) + count
+                row_counts[name] = row_counts.get(name, 0) + num_rows
+        # A resumed day whose statistics could not rule out new rows may still have none
+        if since_us is None or scan.rows > rows_before:
+            checked.append(date)
+    if not checked:
+        return {'symbol': symbol, 'new_dates': 0, 'gaps': 0, 'status': 'up to date'}
+
+    # Date Coverage: extend the previous window with the newly found days; a resumed day was already counted
+    coverage = find_check(state, 'Date Coverage')
+    previous = coverage['details'] if coverage else {}
+    new_dates = [date for date in checked if date != last_date] if coverage else checked
+    start_date = previous.get('start_date', checked[0])
+    end_date = checked[-1]
+    expected_days = (date_cls.fromisoformat(end_date) - date_cls.fromisoformat(start_date)).days + 1
+    actual_days = previous.get('actual_days', 0) + len(new_dates)
+    missing_days = expected_days - actual_days
+    replace_check(state, {
+        'check_name': 'Date Coverage',
+        'summary': f"Coverage from {start_date} to {end_date}. Found {actual_days}/{expected_days} days. Missing: {missing_days} days.",
+        'details': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'expected_days': expected_days,
+            'actual_days': actual_days,
+            'missing_days': missing_days,
+        },
+    })
+
+    # Timestamp Continuity: gaps within this batch of partitions, including the boundary with the last run
+    max_gap_ms = scan.max_gap_us // 1_000
+    replace_check(state, {
+        'check_name': 'Timestamp Continuity',
+        'summary': f"Found {scan.total_gaps} total gaps. Max gap within batch: {max_gap_ms / 1000:.2f}s.",
+        'details': {
+            'max_intra_batch_gap_ms': max_gap_ms,
+            'total_gaps': scan.total_gaps,
+            'gap_threshold_ms': gap_threshold_ms,
+        },
+    })
+
+    # Column Nullness: null rate per value column over the new partitions
+    null_rates = {name: null_counts[name] / row_counts[name] if row_counts[name] else 0.0 for name in null_counts}
+    columns_with_nulls = [name for name, rate in null_rates.items() if rate > 0]
+    replace_check(state, {
+        'check_name': 'Column Nullness',
+        'summary': "No nulls found in any columns." if not columns_with_nulls
+                   else f"Nulls found in {len(columns_with_nulls)} columns: {', '.join(columns_with_nulls)}.",
+        'details': null_rates,
+    })
+
+    state['last_processed_date'] = checked[-1]
+    state['last_updated_utc'] = datetime.now(timezone.utc).isoformat()
+    state['partitions_checked_in_last_run'] = checked
+    # Partitions without rows leave the scan empty; keep the stored timestamp then
+    if scan.last_ts_us is not None:
+        state['last_processed_timestamp'] = scan.last_ts_us // 1_000
+    write_json_atomic(path, state)
+
+    return {'symbol': symbol, 'new_dates': len(new_dates), 'gaps': scan.total_gaps, 'status': 'updated'}
+
+
+def _check_symbol_task(args):
+    dataset, symbol = args
+    try:
+        return check_symbol(dataset, symbol, refresh=False)
+    except Exception as e:
+        return {'symbol': symbol, 'new_dates': 0, 'gaps': 0, 'status': f"error: {type(e).__name__}: {e}"}
+
+
+def run_incremental_checks(dataset, symbols=None, workers=None):
+    """Run check_symbol for each symbol (all symbols with a state directory by default) in parallel."""
+    if symbols is None:
+        symbols = sorted(os.listdir(os.path.join(QUALITY_STATE_ROOT, dataset)))
+
+    # Refresh once here so the workers only read the catalog
+    with LakeCatalog() as catalog:
+        catalog.refresh([dataset])
+
+    print("🔍 Incremental Quality Check")
+    print("=" * 60)
+    print(f"Dataset: {dataset}")
+    print(f"Symbols: {len(symbols):,}")
+    print()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(_check_symbol_task, [(dataset, s) for s in symbols]))
+
+    print(f"{'Symbol':<15} {'New Days':>9} {'Gaps':>6}  Status")
+    print("-" * 60)
+    for result in results:
+        print(f"{result['symbol']:<15} {result['new_dates']:>9} {result['gaps']:>6}  {result['status']}")
+    print()
+    print("✅ Incremental quality check complete")
+    return results
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    dataset = sys.argv[1] if len(sys.argv) > 1 else 'raw.binance-usdt-futures.BookDepth'
+    symbols = sys.argv[2].split(',') if len(sys.argv) > 2 and sys.argv[2] != 'all' else None
+
+    run_incremental_checks(dataset, symbols)
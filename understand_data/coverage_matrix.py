@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Coverage Matrix
+Dataset x symbol x date bitmaps of present partitions, permanent download failures and quality-checked days, stored as packed bits
+"""
+
+import json
+import os
+import sys
+from datetime import date as date_cls, timedelta
+
+import numpy as np
+
+from atomic_io import atomic_output_path
+from continuity_checker import QUALITY_STATE_ROOT, find_check, load_state
+from failed_downloads_store import FailedDownloadIndex
+from instrumentation import init_from_cli, span
+from lake_catalog import CACHE_ROOT, DATA_ROOT, DATASETS, LakeCatalog
+
+MATRIX_PATH = os.path.join(CACHE_ROOT, 'coverage_matrix.npz')
+LAYERS = ('present', 'failed', 'checked')
+# Failed-download JSON data types -> lake datasets
+FAILED_DATASETS = {
+    'book_snapshot_5': 'raw.binance-usdt-futures.BookDepth',
+    'trades': 'raw.binance-usdt-futures.Trade',
+    'derivative_ticker': 'raw.binance-usdt-futures.MarkPrice',
+}
+
+
+def period_bounds(period):
+    """Inclusive (start, end) ISO dates of 'YYYY', 'YYYY-Qn', 'YYYY-MM' or 'YYYY-MM-DD'."""
+    if len(period) == 4:
+        return f'{period}-01-01', f'{period}-12-31'
+    if period[5] in 'Qq':
+        year, quarter = int(period[:4]), int(period[6])
+        first = date_cls(year, 3 * quarter - 2, 1)
+    elif len(period) == 7:
+        first = date_cls(int(period[:4]), int(period[5:7]), 1)
+    else:
+        return period, period
+    months = 3 if period[5] in 'Qq' else 1
+    next_month = first.month + months
+    after = date_cls(first.year + (next_month - 1) // 12, (next_month - 1) % 12 + 1, 1)
+    return first.isoformat(), (after - timedelta(days=1)).isoformat()
+
+
+class CoverageMatrix:
+    """Boolean layers of shape (datasets, symbols, days) over a contiguous day range.
+
+    Layers are kept packed along the day axis (np.packbits) and unpacked on
+    first use, so a multi-year, several-hundred-symbol universe is a few MB
+    on disk and loads with one np.load.
+    """
+
+    def __init__(self, datasets, symbols, first_date, n_days, packed):
+        self.datasets = list(datasets)
+        self.symbols = list(symbols)
+        self.first_date = date_cls.fromisoformat(first_date)
+        self.n_days = n_days
+        self.packed = packed
+        self._layers = {}
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def build(cls, data_root=DATA_ROOT, datasets=DATASETS, state_root=QUALITY_STATE_ROOT):
+        """Build every layer from the catalog, the failed-download index and the quality state files."""
+        with span('stat'):
+            with LakeCatalog(data_root) as catalog:
+                catalog.refresh(datasets)
+                present = {dataset: {(symbol, date) for date, symbol, _ in catalog.lookup_files(dataset)}
+                           for dataset in datasets}
+            with FailedDownloadIndex() as index:
+                failed = {dataset: set() for dataset in datasets}
+                for failed_type, symbol, date in index.permanent_failures():
+                    dataset = FAILED_DATASETS.get(failed_type)
+                    if dataset in failed:
+                        failed[dataset].add((symbol, date))
+            checked = {dataset: cls._checked_days(dataset, present[dataset], state_root) for dataset in datasets}
+
+        # Checked pairs come from whatever state dirs exist, so they can name symbols or dates outside the other layers
+        keys = set().union(*present.values(), *failed.values(), *checked.values())
+        if not keys:
+            return cls(datasets, [], date_cls.today().isoformat(), 0,
+                       {layer: np.zeros((len(datasets), 0, 0), dtype=np.uint8) for layer in LAYERS})
+        symbols = sorted({symbol for symbol, _ in keys})
+        dates = sorted({date for _, date in keys})
+        first = date_cls.fromisoformat(dates[0])
+        n_days = (date_cls.fromisoformat(dates[-1]) - first).days + 1
+        matrix = cls(datasets, symbols, first.isoformat(), n_days, {})
+
+        packed = {}
+        for layer, source in (('present', present), ('failed', failed), ('checked', checked)):
+            bits = np.zeros((len(datasets), len(symbols), n_days), dtype=bool)
+            for d, dataset in enumerate(datasets):
+                pairs = source[dataset]
+                if pairs:
+                    s_idx = np.fromiter((matrix._symbol_index[s] for s, _ in pairs), dtype=np.int64, count=len(pairs))
+                    t_idx = np.fromiter((matrix.day_index(t) for _, t in pairs), dtype=np.int64, count=len(pairs))
+                    bits[d, s_idx, t_idx] = True
+            packed[layer] = np.packbits(bits, axis=-1)
+            matrix._layers[layer] = bits
+        matrix.packed = packed
+        return matrix
+
+    @staticmethod
+    def _checked_days(dataset, present_pairs, state_root):
+        """(symbol, date) pairs covered by a symbol's quality state.
+
+        The incremental checker walks every present partition up to
+        last_processed_date, starting at the Date Coverage start_date, so
+        present days in that window count as checked, as do the dates listed
+        in partitions_checked_in_last_run.
+        """
+        root = os.path.join(state_root, dataset)
+        if not os.path.isdir(root):
+            return set()
+        by_symbol = {}
+        for symbol, date in present_pairs:
+            by_symbol.setdefault(symbol, []).append(date)
+        checked = set()
+        for symbol in os.listdir(root):
+            state = load_state(os.path.join(root, symbol, 'state.json'))
+            checked.update((symbol, date) for date in state.get('partitions_checked_in_last_run') or [])
+            coverage = find_check(state, 'Date Coverage')
+            start = (coverage or {}).get('details', {}).get('start_date')
+            end = state.get('last_processed_date')
+            if start and end:
+                checked.update((symbol, date) for date in by_symbol.get(symbol, ()) if start <= date <= end)
+        return checked
+
+    def save(self, path=MATRIX_PATH):
+        """Write the packed layers and axes as one .npz, atomically."""
+        with atomic_output_path(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, datasets=np.array(self.datasets), symbols=np.array(self.symbols),
+                         meta=np.array(json.dumps({'first_date': self.first_date.isoformat(), 'n_days': self.n_days})),
+                         **{f'layer_{layer}': self.packed[layer] for layer in LAYERS})
+        return path
+
+    @classmethod
+    def load(cls, path=MATRIX_PATH):
+        with np.load(path) as npz:
+            meta = json.loads(str(npz['meta']))
+            return cls(npz['datasets'].tolist(), npz['symbols'].tolist(), meta['first_date'], meta['n_days'],
+                       {layer: npz[f'layer_{layer}'] for layer in LAYERS})
+
+    def layer(self, name):
+        """Unpacked bool array (datasets, symbols, days) of one layer."""
+        if name not in self._layers:
+            self._layers[name] = np.unpackbits(self.packed[name], axis=-1, count=self.n_days).astype(bool)
+        return self._layers[name]
+
+    def day_index(self, date):
+        return (date_cls.fromisoformat(date) - self.first_date).days
+
+    def date_at(self, index):
+        return (self.first_date + timedelta(days=int(index))).isoformat()
+
+    def day_slice(self, start_date=None, end_date=None):
+        """Slice of the day axis for an inclusive date range, clipped to the matrix."""
+        lo = 0 if start_date is None else max(self.day_index(start_date), 0)
+        hi = self.n_days if end_date is None else min(self.day_index(end_date) + 1, self.n_days)
+        return slice(lo, max(lo, hi))
+
+    def view(self, layer, dataset, start_date=None, end_date=None):
+        """(symbols, days) bool view of one layer for one dataset and date range."""
+        return self.layer(layer)[self.datasets.index(dataset), :, self.day_slice(start_date, end_date)]
+
+    def gaps(self, missing, having, start_date=None, end_date=None, include_failed=False):
+        """(symbols, days) mask of days where `having` is present but `missing` is not.
+
+        Days where `missing` is a known permanent failure are excluded unless
+        include_failed is set, leaving only the gaps nobody has explained.
+        """
+        mask = self.view('present', having, start_date, end_date) & ~self.view('present', missing, start_date, end_date)
+        if not include_failed:
+            mask &= ~self.view('failed', missing, start_date, end_date)
+        return mask
+
+    def symbols_with_gaps(self, missing, having, start_date=None, end_date=None, include_failed=False):
+        """[(symbol, gap_days)] for every symbol with at least one gap day, most gaps first."""
+        counts = self.gaps(missing, having, start_date, end_date, include_failed).sum(axis=1)
+        order = np.argsort(-counts, kind='stable')
+        return [(self.symbols[i], int(counts[i])) for i in order if counts[i] > 0]
+
+    def coverage(self, dataset, start_date=None, end_date=None):
+        """Per-layer day counts per symbol for one dataset as {layer: int array over symbols}."""
+        return {layer: self.view(layer, dataset, start_date, end_date).sum(axis=1) for layer in LAYERS}
+
+    def nbytes(self):
+        return sum(bits.nbytes for bits in self.packed.values())
+
+
+def print_matrix_summary(matrix):
+    """Print axes, packed size and per-dataset layer totals."""
+    print("🧮 Coverage Matrix")
+    print("=" * 60)
+    print(f"Datasets: {len(matrix.datasets)}")
+    print(f"Symbols: {len(matrix.symbols):,}")
+    if matrix.n_days:
+        print(f"Days: {matrix.n_days:,} ({matrix.first_date} to {matrix.date_at(matrix.n_days - 1)})")
+    print(f"Packed size: {matrix.nbytes() / 1024:.1f} KB")
+    print()
+    print("📊 LAYER TOTALS (symbol-days)")
+    print("-" * 60)
+    print(f"{'Dataset':<40} {'Present':>9} {'Failed':>8} {'Checked':>8}")
+    for dataset in matrix.datasets:
+        totals = {layer: int(counts.sum()) for layer, counts in matrix.coverage(dataset).items()}
+        print(f"{dataset:<40} {totals['present']:>9,} {totals['failed']:>8,} {totals['checked']:>8,}")
+    print()
+
+
+if __name__ == "__main__":
+    # coverage_matrix.py [build]
+    # coverage_matrix.py gaps <missing> <having> [period] [--include-failed]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    command = args[0] if args else 'build'
+
+    if command == 'build' or not os.path.exists(MATRIX_PATH):
+        matrix = CoverageMatrix.build()
+        print(f"💾 Saved {matrix.save()}")
+    else:
+        matrix = CoverageMatrix.load()
+    print_matrix_summary(matrix)
+
+    if command == 'gaps':
+        missing, having = (name if '.' in name else f'raw.binance-usdt-futures.{name}' for name in args[1:3])
+        start_date, end_date = period_bounds(args[3]) if len(args) > 3 else (None, None)
+        rows = matrix.symbols_with_gaps(missing, having, start_date, end_date,
+                                        include_failed='--include-failed' in sys.argv[1:])
+        print(f"🔍 Symbols missing {missing} while having {having}"
+              + (f" ({start_date} to {end_date})" if start_date else ""))
+        print("-" * 60)
+        for symbol, days in rows:
+            print(f"{symbol:<20} {days:>5} days")
+        print(f"{len(rows):,} symbols")
+        print()
+    print("✅ Coverage matrix complete")
@@ -1,24 +1,48 @@
 #!/usr/bin/env python3
 """
 DOTUSDT Book Depth Data Analyzer
-Analyzes the structure and content of the DOTUSDT order book data
+Analyzes the structure and content of the DOTUSDT order book data, or spread/price/tick statistics per symbol-day across the lake in batch mode
 """
 
 import pandas as pd
+import numpy as np
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def analyze_dotusdt_data():
-    """Analyze the DOTUSDT book depth data structure."""
-    file_path = os.path.expanduser('~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet')
+from analysis_results import ResultWriter, SpreadDayResult, results_root_from_argv
+from bar_kernels import sort_order
+from instrumentation import init_from_cli, phase
+from lake_catalog import DATA_ROOT, RESULTS_ROOT, LakeCatalog
+from parquet_metadata import read_footer_summary
+from rowgroup_stream import stream_top_of_book
+
+SOURCE_DATASET = 'raw.binance-usdt-futures.BookDepth'
+TOP_OF_BOOK_COLUMNS = ['timestamp', 'bid_price_1', 'ask_price_1']
+
+def analyze_dotusdt_data(file_path=None):
+    """Analyze the book depth data structure of one file (the DOTUSDT sample by default)."""
+    if file_path is None:
+        file_path = os.path.expanduser('~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet')
+    
+    # Footer gives the shape and a one-row sample; statistics stream over three projected columns
+    footer = read_footer_summary(file_path)
+    df = footer['sample']
+    if 'symbol' in df.columns and len(df):
+        symbol = str(df['symbol'].iloc[0])
+    else:
+        symbol = os.path.basename(os.path.dirname(file_path)).replace('symbol=', '')
     
-    print("📊 DOTUSDT Book Depth Data Analysis")
+    print(f"📊 {symbol} Book Depth Data Analysis")
     print("=" * 60)
     
-    # Load the data
-    df = pd.read_parquet(file_path)
+    phase('compute')
+    timestamps, spread = stream_top_of_book(file_path)
+    phase('report')
     
     print(f"📁 File: {os.path.basename(file_path)}")
-    print(f"📏 Shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
+    print(f"📏 Shape: {footer['num_rows']:,} rows × {df.shape[1]} columns")
     print(f"💾 Size: {os.path.getsize(file_path) / (1024*1024):.2f} MB")
     print()
     
@@ -29,7 +53,7 @@ def analyze_dotusdt_data():
     print("-" * 60)
     
     # Core fields
-    print(f"{'symbol':<20} {'object':<10} {'DOTUSDT':<20} {'Trading pair symbol'}")
+    print(f"{'symbol':<20} {'object':<10} {symbol:<20} {'Trading pair symbol'}")
     print(f"{'timestamp':<20} {'int64':<10} {'1657152000082000':<20} {'Unix timestamp (microseconds)'}")
     
     # Bid levels
@@ -48,7 +72,7 @@ def analyze_dotusdt_data():
     print("📋 ORGANIZATIONAL CHART")
     print("-" * 60)
     print("Order Book Snapshot Data")
-    print("+-- symbol: \"DOTUSDT\"")
+    print(f"+-- symbol: \"{symbol}\"")
     print("+-- timestamp: Unix timestamp (microseconds)")
     print("+-- Bid Side (5 levels)")
     print("|   +-- bid_price_1: Best bid price")
@@ -78,23 +102,161 @@ def analyze_dotusdt_data():
     # Time range analysis
     print("⏰ TIME RANGE ANALYSIS")
     print("-" * 60)
-    start_time = pd.to_datetime(df['timestamp'].min(), unit='us')
-    end_time = pd.to_datetime(df['timestamp'].max(), unit='us')
+    start_time = pd.to_datetime(timestamps.min, unit='us')
+    end_time = pd.to_datetime(timestamps.max, unit='us')
     print(f"Start: {start_time}")
     print(f"End: {end_time}")
     print(f"Duration: {end_time - start_time}")
-    print(f"Total snapshots: {len(df):,}")
+    print(f"Total snapshots: {timestamps.count:,}")
     
     # Price analysis
     print()
     print("💰 PRICE ANALYSIS")
     print("-" * 60)
-    print(f"Bid price range: ${df['bid_price_1'].min():.3f} - ${df['bid_price_1'].max():.3f}")
-    print(f"Ask price range: ${df['ask_price_1'].min():.3f} - ${df['ask_price_1'].max():.3f}")
-    print(f"Spread range: ${(df['ask_price_1'] - df['bid_price_1']).min():.4f} - ${(df['ask_price_1'] - df['bid_price_1']).max():.4f}")
+    print(f"Bid price range: ${spread.bid.min:.3f} - ${spread.bid.max:.3f}")
+    print(f"Ask price range: ${spread.ask.min:.3f} - ${spread.ask.max:.3f}")
+    print(f"Spread range: ${spread.spread.min:.4f} - ${spread.spread.max:.4f}")
     
     print()
-    print("✅ DOTUSDT analysis complete")
+    print(f"✅ {symbol} analysis complete")
+
+
+def estimate_tick_size(prices):
+    """Smallest positive step between distinct observed prices, rounded to 6 significant digits (NaN if undetermined)."""
+    levels = np.unique(prices[np.isfinite(prices)])
+    if levels.size < 2:
+        return np.nan
+    steps = np.diff(levels)
+    steps = steps[steps > levels[-1] * 1e-12]
+    return float(f'{steps.min():.6g}') if steps.size else np.nan
+
+
+def _float(value):
+    return None if value is None or not np.isfinite(value) else float(value)
+
+
+def spread_day_stats(date, symbol, paths):
+    """SpreadDayResult for one symbol-day, reading only the timestamp and level-1 price columns."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(path, columns=TOP_OF_BOOK_COLUMNS) for path in paths]
+    table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+    ts = table.column('timestamp').to_numpy()
+    bid = table.column('bid_price_1').to_numpy(zero_copy_only=False).astype(np.float64)
+    ask = table.column('ask_price_1').to_numpy(zero_copy_only=False).astype(np.float64)
+    order = sort_order(ts)
+    if order is not None:
+        ts, bid, ask = ts[order], bid[order], ask[order]
+
+    valid = np.isfinite(bid) & np.isfinite(ask)
+    bid_v, ask_v = bid[valid], ask[valid]
+    spread = ask_v - bid_v
+    mid = (bid_v + ask_v) / 2
+    tick = estimate_tick_size(np.concatenate((bid_v, ask_v)))
+    has_quotes = spread.size > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spread_bps = spread / mid * 1e4
+        spread_ticks = spread / tick if np.isfinite(tick) else np.full(spread.size, np.nan)
+
+    return SpreadDayResult(
+        date=date,
+        symbol=symbol,
+        files=len(paths),
+        snapshots=int(ts.size),
+        start_us=int(ts[0]) if ts.size else None,
+        end_us=int(ts[-1]) if ts.size else None,
+        bid_min=_float(bid_v.min()) if has_quotes else None,
+        bid_max=_float(bid_v.max()) if has_quotes else None,
+        ask_min=_float(ask_v.min()) if has_quotes else None,
+        ask_max=_float(ask_v.max()) if has_quotes else None,
+        mid_open=_float(mid[0]) if has_quotes else None,
+        mid_close=_float(mid[-1]) if has_quotes else None,
+        price_range_bps=_float((mid.max() - mid.min()) / mid.min() * 1e4) if has_quotes and mid.min() > 0 else None,
+        spread_min=_float(spread.min()) if has_quotes else None,
+        spread_max=_float(spread.max()) if has_quotes else None,
+        spread_mean=_float(spread.mean()) if has_quotes else None,
+        spread_p50=_float(np.percentile(spread, 50)) if has_quotes else None,
+        spread_p99=_float(np.percentile(spread, 99)) if has_quotes else None,
+        spread_bps_mean=_float(np.nanmean(spread_bps)) if has_quotes else None,
+        crossed=int((spread < 0).sum()),
+        tick_size=_float(tick),
+        tick_bps=_float(tick / mid.mean() * 1e4) if has_quotes else None,
+        spread_ticks_mean=_float(np.nanmean(spread_ticks)) if has_quotes and np.isfinite(tick) else None,
+        one_tick_share=_float((np.rint(spread_ticks) == 1).mean()) if has_quotes and np.isfinite(tick) else None,
+    )
+
+
+def _spread_day_task(task):
+    date, symbol, paths = task
+    try:
+        result = spread_day_stats(date, symbol, paths)
+        return date, symbol, 'analyzed', result.snapshots, result
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0, None
+
+
+def run_batch_analysis(symbols=None, start_date=None, end_date=None, data_root=DATA_ROOT,
+                       results_root=RESULTS_ROOT, workers=None):
+    """Spread/price/tick statistics for every matching BookDepth symbol-day across a process pool, written as one results table."""
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh([SOURCE_DATASET])
+        files = catalog.lookup_files(SOURCE_DATASET, start_date=start_date, end_date=end_date)
+    partitions = {}
+    for date, symbol, path in files:
+        if symbols is None or symbol in symbols:
+            partitions.setdefault((date, symbol), []).append(path)
+
+    print("📊 Book Depth Spread Batch Analysis")
+    print("=" * 60)
+    print(f"Symbol-days: {len(partitions):,}")
+    print(f"Symbols: {len({symbol for _, symbol in partitions}):,}")
+    print(f"Results table: {os.path.join(results_root, 'spread_day')}")
+    print()
+
+    start = time.perf_counter()
+    tasks = [(date, symbol, paths) for (date, symbol), paths in sorted(partitions.items())]
+    analyzed = snapshots = 0
+    results = []
+    with ResultWriter(results_root) as writer, ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, status, rows, result in pool.map(_spread_day_task, tasks, chunksize=1):
+            if status == 'analyzed':
+                analyzed += 1
+                snapshots += rows
+                writer.append(result)
+                results.append(result)
+            else:
+                print(f"❌ {date} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    print("📈 BATCH SUMMARY")
+    print("-" * 60)
+    print(f"Analyzed: {analyzed:,} of {len(partitions):,}")
+    print(f"Snapshots: {snapshots:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({snapshots / elapsed if elapsed > 0 else 0:,.0f} snapshots/s)")
+    widest = sorted((r for r in results if r.spread_bps_mean is not None),
+                    key=lambda r: r.spread_bps_mean, reverse=True)[:5]
+    if widest:
+        print()
+        print("Widest mean spreads:")
+        for r in widest:
+            ticks = f"{r.spread_ticks_mean:.2f} ticks" if r.spread_ticks_mean is not None else "tick N/A"
+            print(f"  {r.date} {r.symbol}: {r.spread_bps_mean:.2f} bps ({ticks}), price range {r.price_range_bps or 0:.0f} bps")
+    print()
+    print("✅ Batch analysis complete")
+    return results
+
 
 if __name__ == "__main__":
-    analyze_dotusdt_data() 
\ No newline at end of file
+    # dotusdt_analyzer.py                          -> single-file analysis of the DOTUSDT sample
+    # dotusdt_analyzer.py <file.parquet>           -> single-file analysis of another file
+    # dotusdt_analyzer.py <SYM,SYM|all> [start] [end] [--results=dir]  -> batch mode
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args or args[0].endswith('.parquet'):
+        analyze_dotusdt_data(os.path.expanduser(args[0]) if args else None)
+    else:
+        symbols = set(args[0].split(',')) if args[0] != 'all' else None
+        start_date = args[1] if len(args) > 1 else None
+        end_date = args[2] if len(args) > 2 else None
+        run_batch_analysis(symbols, start_date, end_date, results_root=results_root_from_argv() or RESULTS_ROOT) 
\ No newline at end of file
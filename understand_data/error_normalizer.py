@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Error Message Normalizer
+Precompiled, memoized normalization of download error messages, plus a vectorized pandas batch API
+"""
+
+import re
+import sys
+from functools import lru_cache
+
+from instrumentation import init_from_cli
+
+CACHE_SIZE = 65_536
+
+# Whole-string wrapping quotes ('...' or "..."); a lone quote character normalizes to ''
+_WRAPPING_QUOTES_RE = re.compile(r'^([\'"])(?:(.*)\1)?$', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+_QUOTED_DATE_RE = re.compile(r'\["\d{4}-\d{2}-\d{2}"\]')
+_DATE_RE = re.compile(r'\b\d{4}-\d{2}-\d{2}\b')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_str(msg):
+    msg = _WRAPPING_QUOTES_RE.sub(r'\2', msg.strip())
+    msg = _WHITESPACE_RE.sub(' ', msg.replace('\n', ' '))
+    msg = _QUOTED_DATE_RE.sub('["<DATE>"]', msg)
+    msg = _DATE_RE.sub('<DATE>', msg)
+    return msg.strip()
+
+
+def normalize_error_msg(msg) -> str:
+    """Collapse quoting, whitespace and embedded dates so equivalent messages group together.
+
+    Strings go through a bounded LRU cache, so repeated messages such as
+    "No data available (404)" cost a dict lookup after the first call.
+    """
+    if not isinstance(msg, str):
+        return str(msg)
+    return _normalize_str(msg)
+
+
+def cache_info():
+    """LRU statistics of the raw -> normalized message cache."""
+    return _normalize_str.cache_info()
+
+
+def normalize_error_series(messages, as_category=False):
+    """Normalize a pandas Series (or any sequence) of messages at once.
+
+    Only distinct values are normalized, using vectorized .str operations with
+    the same patterns as normalize_error_msg, and the results are broadcast
+    back through the factorized codes. Missing values stay missing.
+    """
+    import numpy as np
+    import pandas as pd
+
+    series = messages if isinstance(messages, pd.Series) else pd.Series(messages, dtype=object)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    is_str = uniques.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    normalized = uniques.map(str).to_numpy(dtype=object)
+
+    text = pd.Series(normalized[is_str], dtype=object)
+    if len(text):
+        text = (
+            text.str.strip()
+            .str.replace(_WRAPPING_QUOTES_RE, r'\2', regex=True)
+            .str.replace('\n', ' ', regex=False)
+            .str.replace(_WHITESPACE_RE, ' ', regex=True)
+            .str.replace(_QUOTED_DATE_RE, '["<DATE>"]', regex=True)
+            .str.replace(_DATE_RE, '<DATE>', regex=True)
+            .str.strip()
+        )
+        normalized[is_str] = text.to_numpy(dtype=object)
+
+    result = np.empty(len(codes), dtype=object)
+    valid = codes >= 0
+    result[valid] = normalized[codes[valid]]
+    result[~valid] = None
+
+    out = pd.Series(result, index=series.index, name=series.name)
+    return out.astype('category') if as_category else out
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    for raw in sys.argv[1:] or ['"No data available (404)"', "Downloaded data is too small"]:
+        print(f"{raw!r} -> {normalize_error_msg(raw)!r}")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Failed Downloads Store
+Flattens binance/tardis failed-download JSON into a columnar table and an indexed (dataset, symbol, date) lookup
+"""
+
+import os
+import sqlite3
+import sys
+
+try:
+    import orjson as _json_impl
+except ImportError:
+    import json as _json_impl
+
+from error_normalizer import normalize_error_msg, normalize_error_series
+from instrumentation import init_from_cli
+from lake_catalog import CACHE_ROOT, DATA_ROOT
+FAILED_DOWNLOAD_FILES = (
+    os.path.join(DATA_ROOT, 'binance_failed_downloads.json'),
+    os.path.join(DATA_ROOT, 'tardis_failed_downloads.json'),
+)
+RECORD_COLUMNS = ['source', 'dataset', 'symbol', 'date', 'reason', 'timestamp', 'retry_count', 'permanent', 'error_msg']
+CATEGORY_COLUMNS = ['source', 'dataset', 'symbol', 'reason', 'error_msg']
+
+
+def read_json(path):
+    """Parse a JSON file, with orjson when it is installed."""
+    with open(path, 'rb') as f:
+        return _json_impl.loads(f.read())
+
+
+def iter_failure_records(data, normalize=True):
+    """Yield one flat tuple per failure from source -> dataset -> symbol -> date nesting."""
+    for source, datasets in data.items():
+        for dataset, symbols in datasets.items():
+            for symbol, dates in symbols.items():
+                for date, report in dates.items():
+                    msg = report.get('error_msg')
+                    yield (
+                        source,
+                        dataset,
+                        symbol,
+                        date,
+                        report.get('reason'),
+                        report.get('timestamp'),
+                        report.get('retry_count'),
+                        report.get('permanent'),
+                        msg if msg is None or not normalize else normalize_error_msg(msg),
+                    )
+
+
+def load_failed_table(paths=FAILED_DOWNLOAD_FILES):
+    """Flatten failed-download JSON files into one DataFrame with a row per failure."""
+    import pandas as pd
+
+    records = []
+    for path in paths:
+        if os.path.exists(path):
+            records.extend(iter_failure_records(read_json(path), normalize=False))
+
+    df = pd.DataFrame.from_records(records, columns=RECORD_COLUMNS)
+    df['error_msg'] = normalize_error_series(df['error_msg'])
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='ISO8601')
+    df['retry_count'] = df['retry_count'].astype('Int32')
+    df['permanent'] = df['permanent'].astype('boolean')
+    return df
+
+
+class FailedDownloadIndex:
+    """SQLite index of failures keyed by (dataset, symbol, date).
+
+    The index remembers the size and mtime of each source JSON and rebuilds
+    itself only when one of them changes, so lookups never re-parse the JSON.
+    """
+
+    def __init__(self, paths=FAILED_DOWNLOAD_FILES, cache_dir=CACHE_ROOT):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.paths = tuple(paths)
+        self.path = os.path.join(cache_dir, 'failed_downloads.sqlite')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, msg TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS failures (
+                dataset TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                source TEXT NOT NULL,
+                reason TEXT,
+                timestamp TEXT,
+                retry_count INTEGER,
+                permanent INTEGER,
+                msg_id INTEGER,
+                PRIMARY KEY (dataset, symbol, date, source)
+            ) WITHOUT ROWID;
+        """)
+        self.refresh()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _source_signature(self):
+        signature = {}
+        for path in self.paths:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                signature[path] = (stat.st_size, stat.st_mtime_ns)
+        return signature
+
+    def refresh(self, force=False):
+        """Rebuild the index if any source JSON changed since the last build. Returns True if rebuilt."""
+        signature = self._source_signature()
+        stored = {path: (size, mtime) for path, size, mtime in self.conn.execute("SELECT path, size, mtime_ns FROM sources")}
+        if not force and stored == signature:
+            return False
+
+        message_ids = {}
+        rows = []
+        for path in signature:
+            for source, dataset, symbol, date, reason, ts, retry_count, permanent, msg in iter_failure_records(read_json(path)):
+                msg_id = None
+                if msg is not None:
+                    msg_id = message_ids.setdefault(msg, len(message_ids) + 1)
+                rows.append((dataset, symbol, date, source, reason, ts, retry_count,
+                             None if permanent is None else int(bool(permanent)), msg_id))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM failures")
+            self.conn.execute("DELETE FROM messages")
+            self.conn.execute("DELETE FROM sources")
+            self.conn.executemany("INSERT INTO messages VALUES (?, ?)", [(i, m) for m, i in message_ids.items()])
+            self.conn.executemany("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT INTO sources VALUES (?, ?, ?)", [(p, s, m) for p, (s, m) in signature.items()])
+        return True
+
+    def lookup(self, dataset, symbol, date):
+        """Failure records for one partition as dicts (one per source), empty if none."""
+        cursor = self.conn.execute("""
+            SELECT f.source, f.reason, f.timestamp, f.retry_count, f.permanent, m.msg
+            FROM failures f LEFT JOIN messages m ON m.id = f.msg_id
+            WHERE f.dataset = ? AND f.symbol = ? AND f.date = ?
+        """, (dataset, symbol, date))
+        return [
+            {'source': source, 'reason': reason, 'timestamp': ts, 'retry_count': retry_count,
+             'permanent': None if permanent is None else bool(permanent), 'error_msg': msg}
+            for source, reason, ts, retry_count, permanent, msg in cursor
+        ]
+
+    def is_permanently_failed(self, dataset, symbol, date):
+        """True if any source marked this partition as a permanent failure."""
+        row = self.conn.execute(
+            "SELECT 1 FROM failures WHERE dataset = ? AND symbol = ? AND date = ? AND permanent = 1 LIMIT 1",
+            (dataset, symbol, date),
+        ).fetchone()
+        return row is not None
+
+    def permanent_failures(self):
+        """Every (dataset, symbol, date) that some source marked as a permanent failure."""
+        return self.conn.execute(
+            "SELECT DISTINCT dataset, symbol, date FROM failures WHERE permanent = 1 ORDER BY dataset, symbol, date"
+        ).fetchall()
+
+
+def collect_failed_downloads(data, file_path, viewer):
+    """FailedDownloadsResult for one decoded failed-downloads JSON file."""
+    import collections
+    import json
+
+    from analysis_results import FailedDownloadsResult, json_sample
+
+    reasons, messages = collections.Counter(), collections.Counter()
+    symbols, datasets = set(), []
+    records = permanent = 0
+    retries = []
+    for source, dataset, symbol, _, reason, _, retry_count, is_permanent, msg in iter_failure_records(data):
+        if dataset not in datasets:
+            datasets.append(dataset)
+        symbols.add(symbol)
+        records += 1
+        permanent += bool(is_permanent)
+        reasons[reason] += 1
+        messages[msg] += 1
+        if retry_count is not None:
+            retries.append(retry_count)
+
+    return FailedDownloadsResult(
+        viewer=viewer,
+        path=os.path.abspath(file_path),
+        file=os.path.basename(file_path),
+        size_bytes=os.path.getsize(file_path),
+        sources=list(data),
+        datasets=datasets,
+        symbols=len(symbols),
+        records=records,
+        permanent=permanent,
+        reasons=[str(reason) for reason, _ in reasons.most_common()],
+        reason_counts=[n for _, n in reasons.most_common()],
+        error_msgs=[str(msg) for msg, _ in messages.most_common()],
+        error_msg_counts=[n for _, n in messages.most_common()],
+        retry_min=min(retries) if retries else None,
+        retry_max=max(retries) if retries else None,
+        retry_mean=sum(retries) / len(retries) if retries else None,
+        sample_json=json.dumps(json_sample(data)),
+    )
+
+
+def render_failed_downloads_report(result, data, title):
+    """Print the field table, failure totals and organizational chart of a failed-downloads file."""
+    from analysis_results import render_field_table, render_json_tree
+
+    print(title)
+    print("=" * 50)
+    print(f"📁 File: {result.file}")
+    print()
+
+    rows = []
+    for source, datasets in data.items():
+        failures = sum(len(dates) for symbols in datasets.values() for dates in symbols.values())
+        rows.append((source, 'object', f"{{{', '.join(datasets)}}}", f'{len(datasets)} data types, {failures:,} failures'))
+        for dataset, symbols in datasets.items():
+            failures = sum(len(dates) for dates in symbols.values())
+            rows.append((f'{source}.{dataset}', 'object', f'[{len(symbols)} symbols]', f'{failures:,} failed symbol-days'))
+    render_field_table(rows)
+
+    print("📈 FAILURE TOTALS")
+    print("-" * 50)
+    print(f"Records: {result.records:,} across {result.symbols:,} symbols")
+    print(f"Permanent: {result.permanent:,} of {result.records:,}")
+    for reason, n in zip(result.reasons, result.reason_counts):
+        print(f"Reason {reason}: {n:,}")
+    for msg, n in list(zip(result.error_msgs, result.error_msg_counts))[:5]:
+        print(f"Message '{msg}': {n:,}")
+    if result.retry_min is not None:
+        print(f"Retry count: min {result.retry_min}, max {result.retry_max}, avg {result.retry_mean:.2f}")
+    print()
+
+    print("📋 ORGANIZATIONAL CHART")
+    print("-" * 50)
+    render_json_tree(data)
+    print()
+
+
+def summarize_failures(df):
+    """Print reason, message, retry and permanence statistics per source/dataset."""
+    for (source, dataset), group in df.groupby(['source', 'dataset'], observed=True):
+        print(f"\n=== {source} / {dataset} ===")
+        print(f"📁 Total error records: {len(group)}")
+
+        print("\n📌 Unique Reasons:")
+        for reason, count in group['reason'].value_counts().items():
+            if count:
+                print(f"  {reason}: {count} occurrences")
+
+        print("\n📌 Grouped Error Messages:")
+        for msg, count in group['error_msg'].value_counts().items():
+            if count:
+                print(f"  '{msg}': {count} occurrences")
+
+        retry_counts = group['retry_count'].dropna()
+        if len(retry_counts):
+            print("\n📌 Retry Count Stats:")
+            print(f"  Min: {retry_counts.min()}, Max: {retry_counts.max()}, Avg: {retry_counts.mean():.2f}")
+        else:
+            print("\n📌 Retry Count Stats: No data")
+
+        permanent = group['permanent'].dropna()
+        if len(permanent):
+            print("\n📌 Permanent Failures:")
+            print(f"  {int(permanent.sum())} out of {len(permanent)} were marked permanent")
+        else:
+            print("\n📌 Permanent Failures: No data")
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    if len(sys.argv) == 4:
+        # Partition lookup: failed_downloads_store.py <dataset> <symbol> <date>
+        dataset, symbol, date = sys.argv[1:4]
+        with FailedDownloadIndex() as index:
+            records = index.lookup(dataset, symbol, date)
+            print(f"🔍 {dataset} / {symbol} / {date}")
+            print(f"Permanently failed: {index.is_permanently_failed(dataset, symbol, date)}")
+            for record in records:
+                print(f"  {record}")
+    else:
+        paths = [os.path.expanduser(p) for p in sys.argv[1:]] or FAILED_DOWNLOAD_FILES
+        df = load_failed_table(paths)
+        print("🔍 Failed Downloads Summary")
+        print("=" * 50)
+        print(f"Records: {len(df):,}")
+        print(f"Memory: {df.memory_usage(deep=True).sum() / 1024:.0f} KB")
+        summarize_failures(df)
+        print()
+        print("✅ Failed downloads summary complete")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Funding Analytics
+Vectorized mark-vs-index basis, funding-rate and last-vs-mark series from derivative_ticker files, resampled to bars with a per-symbol-day summary table
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_cls, datetime, timedelta, timezone
+
+import numpy as np
+
+from analysis_results import FundingDayResult, ResultWriter, read_results, results_root_from_argv
+from atomic_io import write_feature_table
+from bar_kernels import (
+    bar_segments,
+    parse_bar,
+    segment_last,
+    segment_max,
+    segment_min,
+    segment_nanmean,
+    segment_sum,
+    sort_order,
+)
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, RESULTS_ROOT, LakeCatalog
+
+SOURCE_DATASET = 'raw.binance-usdt-futures.MarkPrice'
+FEATURE_DATASET = 'features.binance-usdt-futures.MarkPrice'
+TICKER_COLUMNS = ('mark_price', 'index_price', 'last_price', 'funding_rate', 'predicted_funding_rate',
+                  'funding_timestamp', 'open_interest')
+CARRIED_COLUMNS = ('funding_rate', 'funding_timestamp')
+DAY_US = 86_400_000_000
+
+
+def load_ticker(paths):
+    """Read timestamp and ticker columns from one partition's files as float64 arrays, sorted by timestamp.
+
+    Columns absent from the files come back as all-NaN so every series can be derived uniformly.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    available = set(pq.read_schema(paths[0]).names)
+    columns = ['timestamp'] + [name for name in TICKER_COLUMNS if name in available]
+    tables = [pq.read_table(path, columns=columns) for path in paths]
+    table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+    ticker = {'timestamp': table.column('timestamp').to_numpy().astype(np.int64)}
+    for name in TICKER_COLUMNS:
+        if name in available:
+            ticker[name] = table.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+        else:
+            ticker[name] = np.full(table.num_rows, np.nan)
+    order = sort_order(ticker['timestamp'])
+    if order is not None:
+        ticker = {name: values[order] for name, values in ticker.items()}
+    return ticker
+
+
+def load_carry(paths):
+    """Last funding_rate and funding_timestamp of the previous day's partition, or None.
+
+    The 00:00 UTC settlement rolls funding_timestamp over between two day
+    files, so each day is seeded with the prior day's last update.
+    """
+    import pyarrow.parquet as pq
+
+    if not paths:
+        return None
+    available = set(pq.read_schema(paths[0]).names)
+    columns = [name for name in CARRIED_COLUMNS if name in available]
+    if not columns:
+        return None
+    last_ts, carry = None, None
+    for path in paths:
+        table = pq.read_table(path, columns=['timestamp'] + columns)
+        if table.num_rows == 0:
+            continue
+        ts = table.column('timestamp').to_numpy()
+        i = int(np.argmax(ts))
+        if last_ts is None or ts[i] > last_ts:
+            last_ts = ts[i]
+            values = {name: table.column(name)[i].as_py() for name in columns}
+            carry = {name: np.nan if value is None else float(value) for name, value in values.items()}
+    return carry
+
+
+def _changed(values, prior=np.nan):
+    """Mask of updates whose value differs from the previous update, both being non-NaN.
+
+    prior is the value before the first update (the previous partition's last).
+    """
+    prev = np.concatenate(([prior], values[:-1])) if values.size else values
+    return (values != prev) & ~np.isnan(values) & ~np.isnan(prev)
+
+
+def ticker_series(ticker, carry=None):
+    """Per-update derived series as a dict of equal-length arrays.
+
+    basis_bps is (mark - index) / index, last_mark_bps is (last - mark) / mark,
+    both in basis points. funding_change flags updates where the funding rate
+    moved; funding_boundary flags updates where funding_timestamp rolled over
+    to the next period, i.e. a funding settlement at the previous value.
+    carry (from load_carry) seeds both comparisons so the midnight rollover
+    is seen on the first update of the day.
+    """
+    carry = carry or {}
+    prior_timestamp = carry.get('funding_timestamp', np.nan)
+    mark, index, last = ticker['mark_price'], ticker['index_price'], ticker['last_price']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        basis_bps = np.where(index > 0, (mark - index) / index * 1e4, np.nan)
+        last_mark_bps = np.where(mark > 0, (last - mark) / mark * 1e4, np.nan)
+    return {
+        'timestamp': ticker['timestamp'],
+        'mark_price': mark,
+        'index_price': index,
+        'basis_bps': basis_bps,
+        'last_mark_bps': last_mark_bps,
+        'funding_rate': ticker['funding_rate'],
+        'predicted_funding_rate': ticker['predicted_funding_rate'],
+        'funding_timestamp': ticker['funding_timestamp'],
+        'settled_timestamp': np.concatenate(([prior_timestamp], ticker['funding_timestamp'][:-1]))
+                             if ticker['funding_timestamp'].size else ticker['funding_timestamp'],
+        'funding_change': _changed(ticker['funding_rate'], carry.get('funding_rate', np.nan)),
+        'funding_boundary': _changed(ticker['funding_timestamp'], prior_timestamp),
+        'open_interest': ticker['open_interest'],
+    }
+
+
+def _nan_extreme(reduce, values, starts, fill):
+    extreme = reduce(np.nan_to_num(values, nan=fill), starts)
+    return np.where(np.isinf(extreme), np.nan, extreme)
+
+
+def funding_bars(series, bar_us):
+    """Resample per-update series to fixed bars in one pass of segment reductions."""
+    bar_start, starts, counts = bar_segments(series['timestamp'], bar_us)
+    abs_last_mark = np.abs(series['last_mark_bps'])
+    return {
+        'bar_start': bar_start,
+        'updates': counts,
+        'mark_price': segment_last(series['mark_price'], starts, counts),
+        'index_price': segment_last(series['index_price'], starts, counts),
+        'basis_bps_mean': segment_nanmean(series['basis_bps'], starts),
+        'basis_bps_min': _nan_extreme(segment_min, series['basis_bps'], starts, np.inf),
+        'basis_bps_max': _nan_extreme(segment_max, series['basis_bps'], starts, -np.inf),
+        'basis_bps_last': segment_last(series['basis_bps'], starts, counts),
+        'last_mark_bps_mean': segment_nanmean(series['last_mark_bps'], starts),
+        'last_mark_abs_bps_max': _nan_extreme(segment_max, abs_last_mark, starts, -np.inf),
+        'funding_rate': segment_last(series['funding_rate'], starts, counts),
+        'predicted_funding_rate': segment_last(series['predicted_funding_rate'], starts, counts),
+        'funding_changes': segment_sum(series['funding_change'].astype(np.int64), starts),
+        'funding_boundaries': segment_sum(series['funding_boundary'].astype(np.int64), starts),
+        'open_interest': segment_last(series['open_interest'], starts, counts),
+    }
+
+
+def _stat(fn, values):
+    values = values[~np.isnan(values)]
+    return float(fn(values)) if values.size else None
+
+
+def day_summary(date, symbol, series):
+    """FundingDayResult for one symbol-day of per-update series.
+
+    Settlements are counted by their funding time, so a day holds the ones
+    at 00:00, 08:00 and 16:00 UTC; the 24:00 one belongs to the next day.
+    """
+    ts = series['timestamp']
+    abs_basis = np.abs(series['basis_bps'])
+    abs_last_mark = np.abs(series['last_mark_bps'])
+    # A boundary row carries the next period's funding_timestamp; the settlement time is the previous update's value
+    settled = series['settled_timestamp'][series['funding_boundary']]
+    day_start = int(datetime.fromisoformat(date).replace(tzinfo=timezone.utc).timestamp()) * 1_000_000
+    settled = settled[(settled >= day_start) & (settled < day_start + DAY_US)]
+    funding = series['funding_rate'][~np.isnan(series['funding_rate'])]
+    mark = series['mark_price'][~np.isnan(series['mark_price'])]
+    open_interest = series['open_interest'][~np.isnan(series['open_interest'])]
+    return FundingDayResult(
+        date=date,
+        symbol=symbol,
+        updates=int(ts.size),
+        start_us=int(ts[0]) if ts.size else None,
+        end_us=int(ts[-1]) if ts.size else None,
+        mark_open=float(mark[0]) if mark.size else None,
+        mark_close=float(mark[-1]) if mark.size else None,
+        basis_bps_mean=_stat(np.mean, series['basis_bps']),
+        basis_bps_std=_stat(np.std, series['basis_bps']),
+        basis_bps_min=_stat(np.min, series['basis_bps']),
+        basis_bps_max=_stat(np.max, series['basis_bps']),
+        basis_abs_bps_p99=_stat(lambda v: np.percentile(v, 99), abs_basis),
+        last_mark_bps_mean=_stat(np.mean, series['last_mark_bps']),
+        last_mark_abs_bps_max=_stat(np.max, abs_last_mark),
+        last_mark_abs_bps_p99=_stat(lambda v: np.percentile(v, 99), abs_last_mark),
+        funding_rate_first=float(funding[0]) if funding.size else None,
+        funding_rate_last=float(funding[-1]) if funding.size else None,
+        funding_rate_mean=float(funding.mean()) if funding.size else None,
+        funding_rate_changes=int(series['funding_change'].sum()),
+        funding_boundaries=int(settled.size),
+        funding_boundary_us=[int(t) for t in settled],
+        open_interest_last=float(open_interest[-1]) if open_interest.size else None,
+    )
+
+
+def bars_path(data_root, date, symbol, bar):
+    """Output path of one day's resampled funding series for one symbol."""
+    return os.path.join(data_root, FEATURE_DATASET, f'date={date}', f'symbol={symbol}', f'funding-{bar}-0.parquet')
+
+
+def process_partition(task):
+    """Derive, resample and summarize one (date, symbol) partition; returns its FundingDayResult as a fifth element."""
+    date, symbol, paths, prior_paths, data_root, bar = task
+    try:
+        series = ticker_series(load_ticker(paths), load_carry(prior_paths))
+        write_feature_table(funding_bars(series, parse_bar(bar)), bars_path(data_root, date, symbol, bar), symbol)
+        return date, symbol, 'written', len(series['timestamp']), day_summary(date, symbol, series)
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0, None
+
+
+def _previous_date(date):
+    return (date_cls.fromisoformat(date) - timedelta(days=1)).isoformat()
+
+
+def plan_partitions(catalog, symbols, start_date, end_date, bar, data_root, force=False):
+    """(date, symbol) -> (source paths, previous day's paths) for partitions whose funding bars are stale.
+
+    Bars are stale when missing or older than the day's tickers or the
+    previous day's, whose last update seeds the settlement detection.
+    """
+    partitions, newest = {}, {}
+    lookback = _previous_date(start_date) if start_date is not None else None
+    for record in catalog.file_records(SOURCE_DATASET, start_date=lookback, end_date=end_date):
+        if symbols is not None and record['symbol'] not in symbols:
+            continue
+        key = (record['date'], record['symbol'])
+        partitions.setdefault(key, []).append(record['path'])
+        newest[key] = max(newest.get(key, 0), record['mtime_ns'])
+    plan = {}
+    for (date, symbol), paths in partitions.items():
+        if start_date is not None and date < start_date:
+            continue
+        prior = (_previous_date(date), symbol)
+        source_mtime = max(newest[(date, symbol)], newest.get(prior, 0))
+        path = bars_path(data_root, date, symbol, bar)
+        if force or not os.path.exists(path) or os.stat(path).st_mtime_ns < source_mtime:
+            plan[(date, symbol)] = (paths, partitions.get(prior, []))
+    return plan
+
+
+def run_funding_analytics(symbols=None, start_date=None, end_date=None, bar='1m', force=False,
+                          data_root=DATA_ROOT, results_root=RESULTS_ROOT, workers=None):
+    """Process every stale MarkPrice partition across a process pool and append the day summaries to the results store."""
+    parse_bar(bar)
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh([SOURCE_DATASET])
+        plan = plan_partitions(catalog, symbols, start_date, end_date, bar, data_root, force)
+
+    print("💸 Funding Analytics")
+    print("=" * 60)
+    print(f"Stale or missing partitions: {len(plan):,}")
+    print(f"Bar: {bar}")
+    print(f"Series output: {os.path.join(data_root, FEATURE_DATASET)}")
+    print(f"Summary table: {os.path.join(results_root, 'funding_day')}")
+    print()
+
+    start = time.perf_counter()
+    tasks = [(date, symbol, paths, prior_paths, data_root, bar)
+             for (date, symbol), (paths, prior_paths) in sorted(plan.items())]
+    written = updates = 0
+    summaries = []
+    with ResultWriter(results_root) as writer, ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, status, n, summary in pool.map(process_partition, tasks, chunksize=1):
+            if status == 'written':
+                written += 1
+                updates += n
+                writer.append(summary)
+                summaries.append(summary)
+            else:
+                print(f"❌ {date} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    print("📊 FUNDING SUMMARY")
+    print("-" * 60)
+    print(f"Written: {written:,} of {len(plan):,}")
+    print(f"Ticker updates processed: {updates:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({updates / elapsed if elapsed > 0 else 0:,.0f} updates/s)")
+    widest = sorted((s for s in summaries if s.basis_abs_bps_p99 is not None),
+                    key=lambda s: s.basis_abs_bps_p99, reverse=True)[:5]
+    if widest:
+        print()
+        print("Widest mark-vs-index basis (p99 |basis|):")
+        for s in widest:
+            print(f"  {s.date} {s.symbol}: {s.basis_abs_bps_p99:.2f} bps, "
+                  f"{s.funding_boundaries} funding settlements, {s.funding_rate_changes} rate changes")
+    print()
+    print("✅ Funding analytics complete")
+
+
+def load_funding_summary(results_root=RESULTS_ROOT):
+    """Latest FundingDayResult per (date, symbol) from the results store as a DataFrame."""
+    df = read_results(FundingDayResult, results_root)
+    if df.empty:
+        return df
+    return (df.sort_values('analyzed_at')
+              .drop_duplicates(['date', 'symbol'], keep='last')
+              .sort_values(['date', 'symbol'])
+              .reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    # funding_analytics.py [SYM,SYM|all] [start] [end] [bar] [--force] [--results=dir]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    symbols = set(args[0].split(',')) if len(args) > 0 and args[0] != 'all' else None
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+    bar = args[3] if len(args) > 3 else '1m'
+
+    run_funding_analytics(symbols, start_date, end_date, bar, force='--force' in sys.argv[1:],
+                          results_root=results_root_from_argv() or RESULTS_ROOT)
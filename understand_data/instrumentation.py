@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Analyzer Instrumentation
+Named timing spans, byte/row counters and optional cProfile/tracemalloc capture with a JSON summary at exit
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+ENV_VAR = 'UNDERSTAND_DATA_PROFILE'
+OUTPUT_ENV_VAR = 'UNDERSTAND_DATA_PROFILE_OUT'
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 10
+
+# Module-level switch: every public helper checks this first and returns immediately when off
+_enabled = False
+_spans = defaultdict(lambda: [0, 0.0, 0.0])
+_counters = defaultdict(int)
+_phase = None
+_started = None
+_output = None
+_profiler = None
+_tracemalloc = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def _record(name, elapsed):
+    entry = _spans[name]
+    entry[0] += 1
+    entry[1] += elapsed
+    entry[2] = max(entry[2], elapsed)
+
+
+def enabled():
+    return _enabled
+
+
+def span(name):
+    """Context manager timing a block under name; a shared no-op object when disabled."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def phase(name):
+    """End the current phase and start phase name (None just ends it).
+
+    For straight-line scripts: marks consecutive sections without re-indenting
+    them under a with-block.
+    """
+    global _phase
+    if not _enabled:
+        return
+    now = time.perf_counter()
+    if _phase is not None:
+        _record(_phase[0], now - _phase[1])
+    _phase = None if name is None else (name, now)
+
+
+def count(name, n=1):
+    """Add n to counter name (rows, bytes, files, ...)."""
+    if _enabled:
+        _counters[name] += int(n)
+
+
+def enable(cprofile=False, trace_memory=False, output=None):
+    """Turn instrumentation on for this process and register the exit summary."""
+    global _enabled, _started, _output, _profiler, _tracemalloc
+    if _enabled:
+        return
+    _enabled = True
+    _started = time.perf_counter()
+    _output = output
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+        _tracemalloc = True
+    if cprofile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(emit_summary)
+
+
+def init_from_cli(argv=None):
+    """Enable from --profile[=cprofile,tracemalloc] / --profile-out=<path> or the UNDERSTAND_DATA_PROFILE env var.
+
+    Most scripts skip '--' arguments when parsing positionals, so the flags can
+    be appended to their command lines; for the rest use the env vars.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    modes = os.environ.get(ENV_VAR)
+    output = os.environ.get(OUTPUT_ENV_VAR)
+    for arg in argv:
+        if arg == '--profile':
+            modes = modes or '1'
+        elif arg.startswith('--profile='):
+            modes = arg.split('=', 1)[1]
+        elif arg.startswith('--profile-out='):
+            output = os.path.expanduser(arg.split('=', 1)[1])
+    if not modes or modes == '0':
+        return False
+    options = {mode.strip() for mode in modes.split(',')}
+    enable(cprofile='cprofile' in options, trace_memory='tracemalloc' in options, output=output)
+    return True
+
+
+def _profile_rows():
+    import pstats
+
+    _profiler.disable()
+    stats = pstats.Stats(_profiler)
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({'function': f'{os.path.basename(filename)}:{line}({function})', 'calls': calls,
+                     'own_s': round(own, 6), 'cumulative_s': round(cumulative, 6)})
+    rows.sort(key=lambda row: row['cumulative_s'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _memory_summary():
+    import tracemalloc
+
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+    tracemalloc.stop()
+    return {
+        'current_mb': round(current / 1024 ** 2, 3),
+        'peak_mb': round(peak / 1024 ** 2, 3),
+        'top_allocations': [{'where': str(stat.traceback[0]), 'size_mb': round(stat.size / 1024 ** 2, 3),
+                             'count': stat.count} for stat in top],
+    }
+
+
+def summary():
+    """Current spans, counters and optional profile data as a JSON-ready dict.
+
+    Spans can nest inside phases (e.g. decode inside compute), so shares need
+    not sum to 1. Only the calling process is covered, not pool workers.
+    """
+    phase(None)
+    total = time.perf_counter() - _started if _started is not None else 0.0
+    result = {
+        'script': os.path.basename(sys.argv[0]) if sys.argv else None,
+        'argv': sys.argv[1:],
+        'wall_s': round(total, 6),
+        'spans': {name: {'count': n, 'total_s': round(t, 6), 'max_s': round(m, 6),
+                         'share': round(t / total, 4) if total > 0 else None}
+                  for name, (n, t, m) in sorted(_spans.items(), key=lambda item: -item[1][1])},
+        'counters': dict(_counters),
+    }
+    if _profiler is not None:
+        result['cprofile'] = _profile_rows()
+    if _tracemalloc:
+        result['tracemalloc'] = _memory_summary()
+    return result
+
+
+def emit_summary():
+    """Write the summary as one JSON document to the --profile-out path, or to stderr."""
+    data = json.dumps(summary(), indent=2)
+    if _output:
+        os.makedirs(os.path.dirname(os.path.abspath(_output)), exist_ok=True)
+        with open(_output, 'w') as f:
+            f.write(data + '\n')
+    else:
+        print(data, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # Profile another script: instrumentation.py <script.py> [args...] --profile[=cprofile,tracemalloc]
+    import runpy
+
+    # Drive the importable module, not this __main__ copy, so the script's own calls share its state
+    import instrumentation
+
+    if len(sys.argv) < 2:
+        print("usage: instrumentation.py <script.py> [args...] [--profile[=cprofile,tracemalloc]] [--profile-out=path]")
+        sys.exit(2)
+    sys.argv = sys.argv[1:]
+    if not instrumentation.init_from_cli():
+        instrumentation.enable()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+    runpy.run_path(sys.argv[0], run_name='__main__')
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Lake Catalog
+Indexed on-disk catalog of the raw.binance-usdt-futures.* date=/symbol= lake with incremental refresh
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from instrumentation import count, init_from_cli, span
+
+DATA_ROOT = os.path.expanduser('~/data')
+CACHE_ROOT = os.path.join(DATA_ROOT, '_analysis_cache')
+RESULTS_ROOT = os.path.join(DATA_ROOT, '_analysis_results')
+DATASETS = (
+    'raw.binance-usdt-futures.BookDepth',
+    'raw.binance-usdt-futures.Trade',
+    'raw.binance-usdt-futures.MarkPrice',
+    'raw.binance-usdt-futures.Composite',
+)
+# Sibling dataset of small symbols merged per month by lake_compaction, partitioned month=/symbol=
+MONTHLY_SUFFIX = '.Monthly'
+
+_COMPOSITE_STEM_RE = re.compile(r'^(?P<symbol>.+)-(?P<date>\d{4}-\d{2}-\d{2})$')
+
+
+def parse_lake_filename(name):
+    """Split a lake file name into (data_type, stamp, file_index).
+
+    book_snapshot_5-20250707000000-0.parquet -> ('book_snapshot_5', '20250707000000', 0)
+    BTCUSDT-2022-07-07-0.parquet             -> ('composite', '2022-07-07', 0)
+    """
+    stem = name[:-len('.parquet')] if name.endswith('.parquet') else name
+    head, _, index = stem.rpartition('-')
+    if not head or not index.isdigit():
+        return stem, None, None
+    composite = _COMPOSITE_STEM_RE.match(head)
+    if composite:
+        return 'composite', composite.group('date'), int(index)
+    data_type, _, stamp = head.partition('-')
+    return data_type, stamp or None, int(index)
+
+
+def partition_key(dataset):
+    """Directory key of a dataset's first partition level: 'month' for .Monthly datasets, else 'date'."""
+    return 'month' if dataset.endswith(MONTHLY_SUFFIX) else 'date'
+
+
+def partition_dir(data_root, dataset, date, symbol):
+    """Directory of one date=/symbol= (or month=/symbol=) partition."""
+    return os.path.join(data_root, dataset, f'{partition_key(dataset)}={date}', f'symbol={symbol}')
+
+
+class LakeCatalog:
+    """SQLite catalog of every parquet file in the lake.
+
+    Each date= and symbol= directory's mtime is stored; refresh() only lists
+    directories whose mtime changed, so a nightly refresh costs one stat per
+    known directory plus a listing of the new partitions. Lookups go through
+    the (dataset, symbol, date) primary key or the (dataset, date) index.
+    For .Monthly datasets the date column holds the YYYY-MM month.
+    The database lives under data_root by default, so catalogs of different
+    lakes (the real one, synthetic benchmark lakes) never share rows.
+    """
+
+    def __init__(self, data_root=DATA_ROOT, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(data_root, os.path.basename(CACHE_ROOT))
+        os.makedirs(cache_dir, exist_ok=True)
+        self.data_root = data_root
+        self._full = False
+        self.path = os.path.join(cache_dir, 'lake_catalog.sqlite')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                dataset TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                name TEXT NOT NULL,
+                data_type TEXT,
+                file_index INTEGER,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                PRIMARY KEY (dataset, symbol, date, name)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS files_by_date ON files (dataset, date, symbol);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+        """)
+        # A database pointed at by an explicit cache_dir may hold another lake's rows; start over if so
+        root = os.path.abspath(data_root)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'data_root'").fetchone()
+        if row is None or row[0] != root:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM dirs")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('data_root', ?)", (root,))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dir_changed(self, path, mtime_ns):
+        if self._full:
+            return True
+        row = self.conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        return row is None or row[0] != mtime_ns
+
+    def _known_subdirs(self, path, prefix):
+        """Children of path recorded by an earlier refresh, including ones that held no files."""
+        parent = os.path.join(path, prefix)
+        children = {}
+        for (child,) in self.conn.execute("SELECT path FROM dirs WHERE substr(path, 1, ?) = ?", (len(parent), parent)):
+            name = child[len(parent):]
+            if os.sep not in name:
+                children[name] = child
+        return children
+
+    def _subdirs(self, path, prefix):
+        with os.scandir(path) as entries:
+            return {e.name[len(prefix):]: e.path for e in entries if e.name.startswith(prefix) and e.is_dir()}
+
+    def refresh(self, datasets=DATASETS, full=False):
+        """Bring the catalog up to date with disk; returns the number of partitions re-listed.
+
+        Files rewritten in place (without a rename in their directory) do not
+        change the directory mtime; use full=True to re-list everything.
+        """
+        with span('stat'):
+            relisted = self._refresh(datasets, full)
+        count('partitions_relisted', relisted)
+        return relisted
+
+    def _refresh(self, datasets, full):
+        self._full = full
+        relisted = 0
+        dir_updates = []
+        for dataset in datasets:
+            root = os.path.join(self.data_root, dataset)
+            if not os.path.isdir(root):
+                self.conn.execute("DELETE FROM files WHERE dataset = ?", (dataset,))
+                continue
+
+            root_mtime = os.stat(root).st_mtime_ns
+            prefix = f'{partition_key(dataset)}='
+            if self._dir_changed(root, root_mtime):
+                dates = self._subdirs(root, prefix)
+                known = {d for (d,) in self.conn.execute("SELECT DISTINCT date FROM files WHERE dataset = ?", (dataset,))}
+                for gone in known - set(dates):
+                    self.conn.execute("DELETE FROM files WHERE dataset = ? AND date = ?", (dataset, gone))
+                dir_updates.append((root, root_mtime))
+            else:
+                dates = self._known_subdirs(root, prefix)
+
+            for date, date_path in dates.items():
+                try:
+                    date_mtime = os.stat(date_path).st_mtime_ns
+                except FileNotFoundError:
+                    self.conn.execute("DELETE FROM files WHERE dataset = ? AND date = ?", (dataset, date))
+                    self.conn.execute("DELETE FROM dirs WHERE substr(path, 1, ?) = ?", (len(date_path), date_path))
+                    continue
+                known_symbols = {s for (s,) in self.conn.execute(
+                    "SELECT DISTINCT symbol FROM files WHERE dataset = ? AND date = ?", (dataset, date))}
+                if self._dir_changed(date_path, date_mtime):
+                    symbols = self._subdirs(date_path, 'symbol=')
+                    for gone in known_symbols - set(symbols):
+                        self.conn.execute("DELETE FROM files WHERE dataset = ? AND date = ? AND symbol = ?", (dataset, date, gone))
+                    dir_updates.append((date_path, date_mtime))
+                else:
+                    symbols = self._known_subdirs(date_path, 'symbol=')
+
+                for symbol, symbol_path in symbols.items():
+                    try:
+                        symbol_mtime = os.stat(symbol_path).st_mtime_ns
+                    except FileNotFoundError:
+                        self.conn.execute("DELETE FROM files WHERE dataset = ? AND date = ? AND symbol = ?", (dataset, date, symbol))
+                        self.conn.execute("DELETE FROM dirs WHERE path = ?", (symbol_path,))
+                        continue
+                    if not self._dir_changed(symbol_path, symbol_mtime):
+                        continue
+                    self._relist_partition(dataset, date, symbol, symbol_path)
+                    dir_updates.append((symbol_path, symbol_mtime))
+                    relisted += 1
+
+        self.conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?)", dir_updates)
+        self.conn.commit()
+        return relisted
+
+    def _relist_partition(self, dataset, date, symbol, symbol_path):
+        rows = []
+        with os.scandir(symbol_path) as entries:
+            for entry in entries:
+                if not (entry.name.endswith('.parquet') and entry.is_file()):
+                    continue
+                stat = entry.stat()
+                data_type, _, file_index = parse_lake_filename(entry.name)
+                rows.append((dataset, symbol, date, entry.name, data_type, file_index, stat.st_size, stat.st_mtime_ns))
+        self.conn.execute("DELETE FROM files WHERE dataset = ? AND date = ? AND symbol = ?", (dataset, date, symbol))
+        self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def lookup_files(self, dataset, symbol=None, start_date=None, end_date=None):
+        """Sorted (date, symbol, path) tuples, optionally for one symbol and an inclusive date range."""
+        clauses, params = ["dataset = ?"], [dataset]
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        cursor = self.conn.execute(
+            f"SELECT date, symbol, name FROM files WHERE {' AND '.join(clauses)} ORDER BY date, symbol, file_index, name",
+            params,
+        )
+        return [(date, sym, os.path.join(partition_dir(self.data_root, dataset, date, sym), name))
+                for date, sym, name in cursor]
+
+    def file_records(self, dataset, symbol=None, start_date=None, end_date=None):
+        """Like lookup_files but as dicts that also carry data_type, file_index, size and mtime_ns."""
+        clauses, params = ["dataset = ?"], [dataset]
+        for column, op, value in (('symbol', '=', symbol), ('date', '>=', start_date), ('date', '<=', end_date)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        cursor = self.conn.execute(
+            f"SELECT date, symbol, name, data_type, file_index, size, mtime_ns FROM files "
+            f"WHERE {' AND '.join(clauses)} ORDER BY date, symbol, file_index, name",
+            params,
+        )
+        return [
+            {'dataset': dataset, 'date': date, 'symbol': sym, 'name': name, 'data_type': data_type,
+             'file_index': file_index, 'size': size, 'mtime_ns': mtime_ns,
+             'path': os.path.join(partition_dir(self.data_root, dataset, date, sym), name)}
+            for date, sym, name, data_type, file_index, size, mtime_ns in cursor
+        ]
+
+    def list_symbols(self, dataset):
+        """Sorted symbols that have at least one file in dataset."""
+        return [s for (s,) in self.conn.execute(
+            "SELECT DISTINCT symbol FROM files WHERE dataset = ? ORDER BY symbol", (dataset,))]
+
+    def list_dates(self, dataset, symbol=None, after_date=None):
+        """Sorted dates with files in dataset, optionally for one symbol and only after after_date."""
+        clauses, params = ["dataset = ?"], [dataset]
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if after_date is not None:
+            clauses.append("date > ?")
+            params.append(after_date)
+        return [d for (d,) in self.conn.execute(
+            f"SELECT DISTINCT date FROM files WHERE {' AND '.join(clauses)} ORDER BY date", params)]
+
+    def summary(self):
+        """Per-dataset file, symbol and date counts, date range and total bytes."""
+        return self.conn.execute("""
+            SELECT dataset, COUNT(*), COUNT(DISTINCT symbol), COUNT(DISTINCT date), MIN(date), MAX(date), SUM(size)
+            FROM files GROUP BY dataset ORDER BY dataset
+        """).fetchall()
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    data_root = os.path.expanduser(sys.argv[1]) if len(sys.argv) > 1 else DATA_ROOT
+
+    print("🗂️ Lake Catalog")
+    print("=" * 60)
+    with LakeCatalog(data_root) as catalog:
+        start = time.perf_counter()
+        relisted = catalog.refresh()
+        print(f"Catalog: {catalog.path}")
+        print(f"Partitions re-listed: {relisted:,} ({time.perf_counter() - start:.2f}s)")
+        print()
+        print(f"{'Dataset':<40} {'Files':>9} {'Symbols':>8} {'Dates':>6}  {'Range':<23} {'Size':>9}")
+        print("-" * 100)
+        for dataset, files, symbols, dates, first, last, size in catalog.summary():
+            print(f"{dataset:<40} {files:>9,} {symbols:>8,} {dates:>6,}  {first} – {last} {size / 1024**3:>7.1f} GB")
+    print()
+    print("✅ Catalog refresh complete")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Lake Compaction
+Rewrites raw.binance-usdt-futures.* partitions into sorted, ZSTD-compressed, well-sized row groups, optionally merging small symbols into monthly files
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from atomic_io import atomic_output_path, write_json_atomic
+from bar_kernels import sort_order
+from instrumentation import init_from_cli, span
+from lake_catalog import DATA_ROOT, DATASETS, MONTHLY_SUFFIX, LakeCatalog
+
+DEFAULT_ROW_GROUP_ROWS = 1_000_000
+SMALL_SYMBOL_BYTES = 16 * 1024 * 1024
+JOURNAL_DIR = '_compaction_journal'
+# Schema metadata key listing the daily partitions a monthly file was merged from
+SOURCE_DATES_KEY = b'lake_compaction.source_dates'
+
+
+def resolve_datasets(arg):
+    """Dataset names from 'all' or a comma list of full names or short names (BookDepth,Trade)."""
+    if arg is None or arg == 'all':
+        return DATASETS
+    return tuple(name if '.' in name else f'raw.binance-usdt-futures.{name}' for name in arg.split(','))
+
+
+def table_checksum(table):
+    """Order-independent checksum: the sum of per-row hashes over every column, modulo 2**64.
+
+    Dictionary columns are hashed by value, so re-encoding a column does not
+    change the checksum while reordering rows never does.
+    """
+    import pandas as pd
+
+    total = 0
+    for batch in table.to_batches(max_chunksize=256 * 1024):
+        df = batch.to_pandas()
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(object)
+        total += int(pd.util.hash_pandas_object(df, index=False).to_numpy().sum(dtype=np.uint64))
+    return total % 2**64
+
+
+def load_sources(paths):
+    """Read source files once; returns (table sorted by timestamp, total rows, combined checksum)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with span('decode'):
+        tables = [pq.read_table(path) for path in paths]
+    checksum = sum(table_checksum(table) for table in tables) % 2**64
+    table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+    if 'timestamp' in table.column_names:
+        order = sort_order(table.column('timestamp').to_numpy())
+        if order is not None:
+            table = table.take(order)
+    return table, table.num_rows, checksum
+
+
+def is_compact(paths, row_group_rows):
+    """True if a partition is already one ZSTD file with full row groups, sorted by timestamp."""
+    import pyarrow.parquet as pq
+
+    if len(paths) != 1:
+        return False
+    pf = pq.ParquetFile(paths[0])
+    metadata = pf.metadata
+    if metadata.num_row_groups == 0:
+        return True
+    if metadata.num_row_groups != -(-metadata.num_rows // row_group_rows):
+        return False
+    row_group = metadata.row_group(0)
+    if any(row_group.column(i).compression != 'ZSTD' for i in range(row_group.num_columns)):
+        return False
+    if 'timestamp' not in pf.schema_arrow.names:
+        return True
+    return sort_order(pf.read(columns=['timestamp']).column('timestamp').to_numpy()) is None
+
+
+def write_verified(table, path, expected_rows, expected_checksum, row_group_rows, mtime_ns, metadata=None):
+    """Write table to path (not yet visible to readers) and check rows and checksum against the sources.
+
+    The file keeps mtime_ns (the newest source mtime) so mtime-based
+    staleness checks downstream do not treat unchanged content as new.
+    metadata is merged into the schema's key-value metadata.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if 'symbol' in table.column_names and not pa.types.is_dictionary(table.schema.field('symbol').type):
+        index = table.column_names.index('symbol')
+        table = table.set_column(index, 'symbol', table.column('symbol').dictionary_encode())
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    dictionary_columns = [field.name for field in table.schema
+                          if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type)]
+
+    pq.write_table(table, path, compression='zstd', row_group_size=row_group_rows,
+                   use_dictionary=dictionary_columns or False)
+    written = pq.read_table(path)
+    if written.num_rows != expected_rows:
+        raise ValueError(f"row count mismatch: wrote {written.num_rows:,}, expected {expected_rows:,}")
+    if table_checksum(written) != expected_checksum:
+        raise ValueError("checksum mismatch after rewrite")
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def journal_path(data_root, dataset, date, symbol):
+    """Journal entry of one in-flight partition swap, kept under the dataset root."""
+    return os.path.join(data_root, dataset, JOURNAL_DIR, f'{date}_{symbol}.json')
+
+
+def staging_path(target):
+    """Hidden, non-.parquet name next to target, so the catalog and readers never list it."""
+    directory, name = os.path.split(target)
+    return os.path.join(directory, f'.{name}.compact.tmp')
+
+
+def finish_swap(journal):
+    """Complete a journaled swap: move the staged file over the target, then drop the other sources.
+
+    Every step is idempotent, so replaying a journal left by a crash at any
+    point after it was written ends in the same state as an uninterrupted swap.
+    """
+    with open(journal) as f:
+        entry = json.load(f)
+    if os.path.exists(entry['staged']):
+        os.replace(entry['staged'], entry['target'])
+    for path in entry['remove']:
+        if os.path.exists(path):
+            os.remove(path)
+    os.remove(journal)
+
+
+def recover_swaps(data_root=DATA_ROOT, datasets=DATASETS):
+    """Replay the journal entries an interrupted run left behind; returns how many were completed."""
+    recovered = 0
+    for dataset in datasets:
+        root = os.path.join(data_root, dataset, JOURNAL_DIR)
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            if name.endswith('.json'):
+                finish_swap(os.path.join(root, name))
+                recovered += 1
+    return recovered
+
+
+def compact_partition(task):
+    """Rewrite one (date, symbol) partition into a single verified file; compact partitions are skipped.
+
+    The merged file is staged under a hidden name and a journal entry naming
+    it, the target and the sources to remove is committed before anything
+    visible changes. A crash before the entry leaves the sources untouched;
+    after it, recover_swaps finishes the swap, so rows are never duplicated.
+    """
+    dataset, date, symbol, records, row_group_rows, force, data_root = task
+    paths = [record['path'] for record in records]
+    try:
+        if not force and is_compact(paths, row_group_rows):
+            return date, symbol, 'skipped', 0
+        table, rows, checksum = load_sources(paths)
+        staged = staging_path(paths[0])
+        journal = journal_path(data_root, dataset, date, symbol)
+        try:
+            write_verified(table, staged, rows, checksum, row_group_rows,
+                           max(record['mtime_ns'] for record in records))
+            write_json_atomic(journal, {'target': paths[0], 'staged': staged, 'remove': paths[1:]})
+        except BaseException:
+            if os.path.exists(staged):
+                os.remove(staged)
+            raise
+        finish_swap(journal)
+        return date, symbol, 'compacted', rows
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0
+
+
+def monthly_path(data_root, dataset, month, symbol, data_type):
+    """Output path of one merged month for one symbol under the dataset's .Monthly sibling root."""
+    name = f'{symbol}-{month}-0.parquet' if data_type == 'composite' else f"{data_type}-{month.replace('-', '')}-0.parquet"
+    return os.path.join(data_root, dataset + MONTHLY_SUFFIX, f'month={month}', f'symbol={symbol}', name)
+
+
+def monthly_source_dates(path):
+    """Daily partition dates a monthly file was merged from, read from its footer."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(SOURCE_DATES_KEY, b'').decode().split(',')
+
+
+def monthly_is_current(path, mtime_ns, daily_records):
+    """True if a monthly file holds exactly the current daily partitions of its month.
+
+    It must be at least as new as every daily file and list the same dates,
+    so days added, rewritten or removed since the merge all invalidate it.
+    """
+    if not daily_records or mtime_ns < max(record['mtime_ns'] for record in daily_records):
+        return False
+    return monthly_source_dates(path) == sorted({record['date'] for record in daily_records})
+
+
+def merge_month(task):
+    """Merge one small symbol's daily files for a month into a single verified monthly file."""
+    dataset, month, symbol, records, data_root, row_group_rows = task
+    data_type = records[0]['data_type']
+    path = monthly_path(data_root, dataset, month, symbol, data_type)
+    newest = max(record['mtime_ns'] for record in records)
+    if os.path.exists(path) and monthly_is_current(path, os.stat(path).st_mtime_ns, records):
+        return month, symbol, 'skipped', 0
+    try:
+        table, rows, checksum = load_sources([record['path'] for record in records])
+        dates = ','.join(sorted({record['date'] for record in records})).encode()
+        with atomic_output_path(path) as tmp_path:
+            write_verified(table, tmp_path, rows, checksum, row_group_rows, newest, {SOURCE_DATES_KEY: dates})
+        return month, symbol, 'merged', rows
+    except Exception as e:
+        return month, symbol, f"error: {type(e).__name__}: {e}", 0
+
+
+def plan_monthly(records, small_bytes=SMALL_SYMBOL_BYTES):
+    """(month, symbol) -> records for symbols whose mean daily size that month is below small_bytes."""
+    groups = {}
+    for record in records:
+        groups.setdefault((record['date'][:7], record['symbol']), []).append(record)
+    plan = {}
+    for key, group in groups.items():
+        days = len({record['date'] for record in group})
+        if sum(record['size'] for record in group) / days < small_bytes:
+            plan[key] = group
+    return plan
+
+
+def run_compaction(datasets=DATASETS, start_date=None, end_date=None, monthly=False, force=False,
+                   row_group_rows=DEFAULT_ROW_GROUP_ROWS, data_root=DATA_ROOT, workers=None):
+    """Compact every matching partition, then optionally merge small symbols into monthly files.
+
+    Monthly merges always cover whole months, so a date range is widened
+    to the months it touches for that step.
+    """
+    recovered = recover_swaps(data_root, datasets)
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh(datasets)
+        records = {dataset: catalog.file_records(dataset, start_date=start_date, end_date=end_date)
+                   for dataset in datasets}
+
+    print("🗜️ Lake Compaction")
+    print("=" * 60)
+    print(f"Datasets: {', '.join(datasets)}")
+    print(f"Row group size: {row_group_rows:,} rows")
+    print(f"Monthly merge of small symbols: {'on' if monthly else 'off'}")
+    if recovered:
+        print(f"Interrupted swaps completed: {recovered:,}")
+    print()
+
+    start = time.perf_counter()
+    compacted = skipped = rows = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for dataset in datasets:
+            partitions = {}
+            for record in records[dataset]:
+                partitions.setdefault((record['date'], record['symbol']), []).append(record)
+            tasks = [(dataset, date, symbol, group, row_group_rows, force, data_root)
+                     for (date, symbol), group in sorted(partitions.items())]
+            for date, symbol, status, n in pool.map(compact_partition, tasks, chunksize=1):
+                if status == 'compacted':
+                    compacted += 1
+                    rows += n
+                elif status == 'skipped':
+                    skipped += 1
+                else:
+                    print(f"❌ {dataset} {date} {symbol}: {status}")
+
+    # Removed sources changed their directories, so this refresh re-lists exactly the compacted partitions
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh(datasets)
+        records = {dataset: catalog.file_records(dataset,
+                                                 start_date=start_date and f'{start_date[:7]}-01',
+                                                 end_date=end_date and f'{end_date[:7]}-31')
+                   for dataset in datasets}
+
+    merged = 0
+    if monthly:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for dataset in datasets:
+                plan = plan_monthly(records[dataset])
+                tasks = [(dataset, month, symbol, group, data_root, row_group_rows)
+                         for (month, symbol), group in sorted(plan.items())]
+                for month, symbol, status, n in pool.map(merge_month, tasks, chunksize=1):
+                    if status == 'merged':
+                        merged += 1
+                    elif status != 'skipped':
+                        print(f"❌ {dataset} {month} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    print("📊 COMPACTION SUMMARY")
+    print("-" * 60)
+    print(f"Compacted: {compacted:,}  Skipped (already compact): {skipped:,}")
+    print(f"Rows rewritten: {rows:,}")
+    if monthly:
+        print(f"Monthly files merged: {merged:,}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    print()
+    print("✅ Compaction complete")
+
+
+if __name__ == "__main__":
+    # lake_compaction.py [datasets|all] [start] [end] [--monthly] [--force] [--row-group-rows=N]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    datasets = resolve_datasets(args[0] if args else None)
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+    row_group_rows = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--row-group-rows=')),
+                          DEFAULT_ROW_GROUP_ROWS)
+
+    run_compaction(datasets, start_date, end_date, monthly='--monthly' in sys.argv[1:],
+                   force='--force' in sys.argv[1:], row_group_rows=row_group_rows)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Microstructure Feature Pipeline
+Vectorized per-snapshot and per-bar order book features over book_snapshot_5 files, written as a Hive-partitioned lake
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from atomic_io import write_feature_table
+from bar_kernels import (
+    bar_segments,
+    parse_bar,
+    segment_last,
+    segment_max,
+    segment_nanmean,
+    sort_order,
+)
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, LakeCatalog, parse_lake_filename
+
+SOURCE_DATASET = 'raw.binance-usdt-futures.BookDepth'
+FEATURE_DATASET = 'features.binance-usdt-futures.BookDepth'
+LEVELS = 5
+BOOK_COLUMNS = ['timestamp'] + [f'{side}_{field}_{level}' for side in ('bid', 'ask')
+                                for field in ('price', 'volume') for level in range(1, LEVELS + 1)]
+
+
+def load_book_columns(file_path):
+    """Read only the timestamp and level columns as float64 numpy arrays, sorted by timestamp."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(file_path, columns=BOOK_COLUMNS)
+    arrays = {name: table.column(name).to_numpy() for name in BOOK_COLUMNS}
+    order = sort_order(arrays['timestamp'])
+    if order is not None:
+        arrays = {name: values[order] for name, values in arrays.items()}
+    return arrays
+
+
+def snapshot_features(arrays):
+    """Per-snapshot features as a dict of equal-length numpy arrays."""
+    bid = np.column_stack([arrays[f'bid_price_{i}'] for i in range(1, LEVELS + 1)]).astype(np.float64)
+    ask = np.column_stack([arrays[f'ask_price_{i}'] for i in range(1, LEVELS + 1)]).astype(np.float64)
+    bid_vol = np.column_stack([arrays[f'bid_volume_{i}'] for i in range(1, LEVELS + 1)]).astype(np.float64)
+    ask_vol = np.column_stack([arrays[f'ask_volume_{i}'] for i in range(1, LEVELS + 1)]).astype(np.float64)
+
+    bid_cum = np.nancumsum(bid_vol, axis=1)
+    ask_cum = np.nancumsum(ask_vol, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mid = (bid[:, 0] + ask[:, 0]) / 2
+        spread = ask[:, 0] - bid[:, 0]
+        top_volume = bid_vol[:, 0] + ask_vol[:, 0]
+        features = {
+            'timestamp': arrays['timestamp'].astype(np.int64),
+            'mid': mid,
+            'spread': spread,
+            'spread_bps': spread / mid * 1e4,
+            # Microprice weights each side's price by the opposite side's size
+            'microprice': (ask[:, 0] * bid_vol[:, 0] + bid[:, 0] * ask_vol[:, 0]) / top_volume,
+            'imbalance_1': (bid_vol[:, 0] - ask_vol[:, 0]) / top_volume,
+            'imbalance_5': (bid_cum[:, -1] - ask_cum[:, -1]) / (bid_cum[:, -1] + ask_cum[:, -1]),
+        }
+    for level in range(LEVELS):
+        features[f'bid_depth_{level + 1}'] = bid_cum[:, level]
+        features[f'ask_depth_{level + 1}'] = ask_cum[:, level]
+    return features
+
+
+def bar_features(features, bar_us):
+    """Resample per-snapshot features to fixed bars: last value, mean and max where meaningful."""
+    bar_start, starts, counts = bar_segments(features['timestamp'], bar_us)
+    bars = {
+        'bar_start': bar_start,
+        'snapshots': counts,
+        'mid': segment_last(features['mid'], starts, counts),
+        'microprice': segment_last(features['microprice'], starts, counts),
+        'spread_bps_mean': segment_nanmean(features['spread_bps'], starts),
+        'spread_bps_max': segment_max(np.nan_to_num(features['spread_bps'], nan=-np.inf), starts),
+        'imbalance_1_mean': segment_nanmean(features['imbalance_1'], starts),
+        'imbalance_5_mean': segment_nanmean(features['imbalance_5'], starts),
+        'imbalance_5_last': segment_last(features['imbalance_5'], starts, counts),
+    }
+    bars['spread_bps_max'] = np.where(np.isneginf(bars['spread_bps_max']), np.nan, bars['spread_bps_max'])
+    for side in ('bid', 'ask'):
+        bars[f'{side}_depth_5_mean'] = segment_nanmean(features[f'{side}_depth_{LEVELS}'], starts)
+    return bars
+
+
+def feature_path(data_root, date, symbol, kind, file_index=0):
+    """Output path of one feature file, mirroring the source partition and file index."""
+    return os.path.join(data_root, FEATURE_DATASET, f'date={date}', f'symbol={symbol}', f'{kind}-{file_index}.parquet')
+
+
+def process_partition(task):
+    """Compute and write features for one (date, symbol, file) task; skips outputs that are up to date.
+
+    Bars and (with write_snapshots) per-snapshot features are checked for
+    freshness separately, so asking for snapshots later still writes them.
+    """
+    date, symbol, file_path, data_root, bar, write_snapshots = task
+    file_index = parse_lake_filename(os.path.basename(file_path))[2] or 0
+    bars_path = feature_path(data_root, date, symbol, f'bars-{bar}', file_index)
+    snapshots_path = feature_path(data_root, date, symbol, 'snapshots', file_index)
+    try:
+        source_mtime = os.path.getmtime(file_path)
+        stale = [path for path in ([bars_path, snapshots_path] if write_snapshots else [bars_path])
+                 if not os.path.exists(path) or os.path.getmtime(path) < source_mtime]
+        if not stale:
+            return date, symbol, 'skipped', 0
+        features = snapshot_features(load_book_columns(file_path))
+        if snapshots_path in stale:
+            write_feature_table(features, snapshots_path, symbol)
+        if bars_path in stale:
+            write_feature_table(bar_features(features, parse_bar(bar)), bars_path, symbol)
+        return date, symbol, 'written', len(features['timestamp'])
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0
+
+
+def run_feature_pipeline(symbols=None, start_date=None, end_date=None, bar='1s', write_snapshots=False,
+                         data_root=DATA_ROOT, workers=None):
+    """Build features for every matching BookDepth partition across a process pool."""
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh([SOURCE_DATASET])
+        files = catalog.lookup_files(SOURCE_DATASET, start_date=start_date, end_date=end_date)
+    if symbols is not None:
+        files = [f for f in files if f[1] in symbols]
+
+    print("🧪 Microstructure Feature Pipeline")
+    print("=" * 60)
+    print(f"Partitions: {len(files):,}")
+    print(f"Bar: {bar}")
+    print(f"Output: {os.path.join(data_root, FEATURE_DATASET)}")
+    print()
+
+    start = time.perf_counter()
+    tasks = [(date, symbol, path, data_root, bar, write_snapshots) for date, symbol, path in files]
+    written = skipped = snapshots = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, status, rows in pool.map(process_partition, tasks, chunksize=1):
+            if status == 'written':
+                written += 1
+                snapshots += rows
+            elif status == 'skipped':
+                skipped += 1
+            else:
+                print(f"❌ {date} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    print("📊 PIPELINE SUMMARY")
+    print("-" * 60)
+    print(f"Written: {written:,}  Skipped (up to date): {skipped:,}")
+    print(f"Snapshots processed: {snapshots:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({snapshots / elapsed if elapsed > 0 else 0:,.0f} snapshots/s)")
+    print()
+    print("✅ Feature pipeline complete")
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    symbols = set(args[0].split(',')) if len(args) > 0 and args[0] != 'all' else None
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+    bar = args[3] if len(args) > 3 else '1s'
+
+    run_feature_pipeline(symbols, start_date, end_date, bar, write_snapshots='--snapshots' in sys.argv[1:])
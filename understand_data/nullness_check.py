@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Column Nullness Audit
+Lake-wide null rates per symbol and date, computed from Parquet column statistics across a process pool
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from continuity_checker import KEY_COLUMNS
+from instrumentation import init_from_cli
+from parquet_metadata import column_null_counts
+from partition_engine import RESULTS_ROOT, discover_partition_files, write_results_table
+
+
+def _file_null_counts(args):
+    date, symbol, path = args
+    try:
+        num_rows, counts, sources = column_null_counts(path, exclude=KEY_COLUMNS)
+    except Exception as e:
+        return date, symbol, path, 0, {}, {}, f"{type(e).__name__}: {e}"
+    return date, symbol, path, num_rows, counts, sources, None
+
+
+def run_nullness_audit(dataset_root, output_path=None, workers=None):
+    """Aggregate null counts per (symbol, date, column) over every file under dataset_root."""
+    import pandas as pd
+
+    dataset_root = os.path.expanduser(dataset_root)
+    dataset = os.path.basename(os.path.normpath(dataset_root))
+    if output_path is None:
+        output_path = os.path.join(RESULTS_ROOT, f"{dataset}.nullness.parquet")
+
+    print("🔍 Column Nullness Audit")
+    print("=" * 60)
+    print(f"Dataset: {dataset}")
+
+    start = time.perf_counter()
+    files = discover_partition_files(dataset_root)
+    print(f"Files: {len(files):,}")
+    print()
+
+    totals = {}
+    scanned_columns = 0
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, path, num_rows, counts, sources, error in pool.map(_file_null_counts, files, chunksize=16):
+            if error is not None:
+                errors += 1
+                print(f"❌ {path}: {error}")
+                continue
+            scanned_columns += sum(1 for source in sources.values() if source == 'scan')
+            for column, nulls in counts.items():
+                key = (symbol, date, column)
+                rows_so_far, nulls_so_far = totals.get(key, (0, 0))
+                totals[key] = (rows_so_far + num_rows, nulls_so_far + nulls)
+
+    results = pd.DataFrame(
+        [(symbol, date, column, rows, nulls) for (symbol, date, column), (rows, nulls) in totals.items()],
+        columns=['symbol', 'date', 'column', 'rows', 'nulls'],
+    )
+    results['null_rate'] = (results['nulls'] / results['rows'].where(results['rows'] > 0)).fillna(0.0)
+    results['symbol'] = results['symbol'].astype('category')
+    results['column'] = results['column'].astype('category')
+    write_results_table(results, output_path)
+
+    elapsed = time.perf_counter() - start
+    with_nulls = results[results['nulls'] > 0]
+    print("📊 NULLNESS SUMMARY")
+    print("-" * 60)
+    print(f"Symbol-days: {results[['symbol', 'date']].drop_duplicates().shape[0]:,}")
+    print(f"Column chunks needing a scan (no statistics): {scanned_columns:,}")
+    print(f"Symbol-day-columns with nulls: {len(with_nulls):,}")
+    for row in with_nulls.sort_values('null_rate', ascending=False).head(20).itertuples(index=False):
+        print(f"  {row.symbol:<15} {row.date} {row.column:<15} {row.null_rate:.4%}")
+    print(f"Errors: {errors:,}")
+    print(f"Elapsed: {elapsed:.2f}s")
+    print(f"Results: {output_path}")
+    print()
+    print("✅ Nullness audit complete")
+    return results
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    dataset_root = sys.argv[1] if len(sys.argv) > 1 else "~/data/raw.binance-usdt-futures.BookDepth"
+    output_path = os.path.expanduser(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    run_nullness_audit(dataset_root, output_path)
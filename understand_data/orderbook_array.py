@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Order Book Array Format
+Converts book_snapshot_5 parquet into dense memory-mappable int64 arrays and loads them zero-copy
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from instrumentation import init_from_cli
+from rowgroup_stream import batch_column, iter_row_group_batches
+
+LEVELS = 5
+BID, ASK = 0, 1
+PRICE, VOLUME = 0, 1
+MISSING = np.iinfo(np.int64).min
+MAX_DECIMALS = 10
+FORMAT_VERSION = 1
+
+ARRAY_ROOT = os.path.expanduser('~/data/book_arrays.binance-usdt-futures.BookDepth')
+
+
+def level_columns():
+    """Parquet column name for every (side, level, field) slot of the book array."""
+    columns = {}
+    for side, side_name in ((BID, 'bid'), (ASK, 'ask')):
+        for level in range(LEVELS):
+            columns[(side, level, PRICE)] = f'{side_name}_price_{level + 1}'
+            columns[(side, level, VOLUME)] = f'{side_name}_volume_{level + 1}'
+    return columns
+
+
+def decimals_needed(values, max_decimals=MAX_DECIMALS):
+    """Smallest number of decimals at which every finite value is an integer multiple of 10**-k."""
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return 0
+    # Distinct values only; prices repeat heavily within a day
+    values = np.unique(values)
+    for k in range(max_decimals + 1):
+        scaled = values * 10.0 ** k
+        if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-6):
+            return k
+    return max_decimals
+
+
+def to_fixed(values, decimals):
+    """Scale floats to int64 units of 10**-decimals; NaN becomes MISSING."""
+    scaled = np.round(values * 10.0 ** decimals)
+    out = np.full(values.shape, MISSING, dtype=np.int64)
+    finite = np.isfinite(scaled)
+    out[finite] = scaled[finite].astype(np.int64)
+    return out
+
+
+def tick_units(prices):
+    """Exchange tick in fixed-point units: the GCD of the steps between distinct price levels (1 if undetermined).
+
+    The storage scale 10**-decimals is only the precision needed to hold
+    every price exactly; the tick can be a multiple of it (a 0.005 tick
+    stored at 0.001 precision is 5 units).
+    """
+    levels = np.unique(prices[prices != MISSING])
+    if levels.size < 2:
+        return 1
+    return max(int(np.gcd.reduce(np.diff(levels))), 1)
+
+
+def _rescale(block, factor):
+    present = block != MISSING
+    block[present] *= factor
+
+
+def convert_book_file(file_path, output_dir):
+    """Convert one book_snapshot_5 file into output_dir in a single streaming pass.
+
+    Layout: timestamps.npy (N,) int64 microseconds, book.npy (N, 2, 5, 2) int64
+    with [side, level, price|volume], symbol_codes.npy (N,) uint16, and
+    meta.json with the symbol dictionary and the price/volume scales. Prices
+    are stored in units of 10**-price_decimals (the storage precision), volumes
+    in units of 10**-volume_decimals; missing values are MISSING. The exchange
+    tick inferred from the price grid is recorded as price_tick_units.
+    """
+    import pyarrow.parquet as pq
+
+    num_rows = pq.ParquetFile(file_path).metadata.num_rows
+    if num_rows == 0:
+        raise ValueError(f"{file_path} has no rows to convert")
+    tmp_dir = output_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    timestamps = np.lib.format.open_memmap(os.path.join(tmp_dir, 'timestamps.npy'), mode='w+', dtype=np.int64, shape=(num_rows,))
+    book = np.lib.format.open_memmap(os.path.join(tmp_dir, 'book.npy'), mode='w+', dtype=np.int64, shape=(num_rows, 2, LEVELS, 2))
+    codes = np.lib.format.open_memmap(os.path.join(tmp_dir, 'symbol_codes.npy'), mode='w+', dtype=np.uint16, shape=(num_rows,))
+
+    slots = level_columns()
+    columns = ['symbol', 'timestamp'] + list(slots.values())
+    symbols = {}
+    decimals = {PRICE: 0, VOLUME: 0}
+    written = 0
+    for batch in iter_row_group_batches(file_path, columns=columns):
+        n = batch.num_rows
+        end = written + n
+        raw = {slot: batch_column(batch, name).astype(np.float64) for slot, name in slots.items()}
+
+        # Widen the fixed-point scale if this batch needs more decimals, rescaling rows already written
+        for field in (PRICE, VOLUME):
+            needed = max(decimals_needed(values) for (_, _, f), values in raw.items() if f == field)
+            if needed > decimals[field]:
+                _rescale(book[:written, :, :, field], 10 ** (needed - decimals[field]))
+                decimals[field] = needed
+
+        for (side, level, field), values in raw.items():
+            book[written:end, side, level, field] = to_fixed(values, decimals[field])
+
+        timestamps[written:end] = batch_column(batch, 'timestamp')
+        uniques, inverse = np.unique(batch_column(batch, 'symbol').astype(str), return_inverse=True)
+        lookup = np.array([symbols.setdefault(s, len(symbols)) for s in uniques], dtype=np.uint16)
+        codes[written:end] = lookup[inverse]
+        written = end
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'source': os.path.abspath(file_path),
+        'rows': written,
+        'symbols': sorted(symbols, key=symbols.get),
+        'price_decimals': decimals[PRICE],
+        'price_tick_units': tick_units(book[:written, :, :, PRICE]),
+        'volume_decimals': decimals[VOLUME],
+        'levels': LEVELS,
+        'axes': ['row', 'side(bid,ask)', 'level', 'field(price,volume)'],
+    }
+    for array in (timestamps, book, codes):
+        array.flush()
+    del timestamps, book, codes
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return meta
+
+
+class BookArray:
+    """Zero-copy view of a converted book: arrays are np.load(..., mmap_mode='r').
+
+    All queries are single vectorized expressions over the mapped arrays.
+    book holds prices in price_unit (storage precision) steps; spread_ticks()
+    is in exchange ticks of tick_size, depth() in volume units and mid() in
+    price units.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.timestamps = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')
+        self.book = np.load(os.path.join(path, 'book.npy'), mmap_mode='r')
+        self.symbol_codes = np.load(os.path.join(path, 'symbol_codes.npy'), mmap_mode='r')
+        self.symbols = self.meta['symbols']
+        self.price_unit = 10.0 ** -self.meta['price_decimals']
+        # Arrays converted before the tick was recorded infer it on load
+        self.tick_units = self.meta.get('price_tick_units') or tick_units(self.book[:, :, :, PRICE])
+        self.tick_size = self.price_unit * self.tick_units
+        self.volume_unit = 10.0 ** -self.meta['volume_decimals']
+
+    def __len__(self):
+        return self.book.shape[0]
+
+    @property
+    def prices(self):
+        return self.book[:, :, :, PRICE]
+
+    @property
+    def volumes(self):
+        return self.book[:, :, :, VOLUME]
+
+    def valid_top(self):
+        """Rows whose best bid and best ask prices are both present."""
+        return (self.book[:, BID, 0, PRICE] != MISSING) & (self.book[:, ASK, 0, PRICE] != MISSING)
+
+    def spread_ticks(self):
+        """Best ask minus best bid in exchange ticks; meaningless where valid_top() is False."""
+        return (self.book[:, ASK, 0, PRICE] - self.book[:, BID, 0, PRICE]) // self.tick_units
+
+    def mid(self):
+        """Mid price in price units; meaningless where valid_top() is False."""
+        return (self.book[:, ASK, 0, PRICE] + self.book[:, BID, 0, PRICE]) * (self.price_unit / 2)
+
+    def depth(self, levels=LEVELS):
+        """Cumulative volume per side over the first levels, shape (N, 2), in volume units."""
+        return np.where(self.volumes[:, :, :levels] == MISSING, 0, self.volumes[:, :, :levels]).sum(axis=2)
+
+    def imbalance(self, levels=LEVELS):
+        """(bid depth - ask depth) / (bid depth + ask depth) over the first levels."""
+        depth = self.depth(levels).astype(np.float64)
+        total = depth[:, BID] + depth[:, ASK]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (depth[:, BID] - depth[:, ASK]) / total
+
+    def symbol_of(self, i):
+        """Symbol string of row i."""
+        return self.symbols[self.symbol_codes[i]]
+
+
+def load_book_array(path):
+    """Open a converted book directory without reading the arrays into memory."""
+    return BookArray(path)
+
+
+def array_dir_for(file_path, array_root=ARRAY_ROOT):
+    """Output directory mirroring the date=/symbol= partition of a source file."""
+    symbol_dir = os.path.dirname(file_path)
+    date_dir = os.path.dirname(symbol_dir)
+    name = os.path.basename(file_path)[:-len('.parquet')]
+    return os.path.join(array_root, os.path.basename(date_dir), os.path.basename(symbol_dir), f'{name}.book')
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    if len(sys.argv) > 1:
+        file_path = sys.argv[1]
+    else:
+        file_path = "~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet"
+    file_path = os.path.expanduser(file_path)
+    output_dir = os.path.expanduser(sys.argv[2]) if len(sys.argv) > 2 else array_dir_for(file_path)
+
+    print("🧮 Order Book Array Conversion")
+    print("=" * 60)
+    meta = convert_book_file(file_path, output_dir)
+    print(f"Source: {os.path.basename(file_path)}")
+    print(f"Output: {output_dir}")
+    print(f"Rows: {meta['rows']:,}")
+    print(f"Symbols: {', '.join(meta['symbols'])}")
+    print(f"Price unit: {10.0 ** -meta['price_decimals']:g}  "
+          f"Tick size: {meta['price_tick_units'] * 10.0 ** -meta['price_decimals']:g}  "
+          f"Volume unit: {10.0 ** -meta['volume_decimals']:g}")
+    print()
+
+    book = load_book_array(output_dir)
+    valid = book.valid_top()
+    spread = book.spread_ticks()[valid]
+    imbalance = book.imbalance()
+    print("💰 VECTORIZED QUERIES (mmap)")
+    print("-" * 60)
+    print(f"Spread range: {spread.min():,} - {spread.max():,} ticks")
+    mid = book.mid()[valid]
+    print(f"Mid range: {mid.min():.6f} - {mid.max():.6f}")
+    print(f"Mean 5-level imbalance: {np.nanmean(imbalance):+.4f}")
+    print()
+    print("✅ Conversion complete")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Parquet Footer Metadata Reader
+Reads row counts, schema and timestamp statistics from the Parquet footer without decoding the data pages
+"""
+
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from instrumentation import count, init_from_cli, span
+
+
+def column_chunk(row_group, column_name):
+    """Return the column chunk metadata for column_name in a row group, or None."""
+    for j in range(row_group.num_columns):
+        chunk = row_group.column(j)
+        if chunk.path_in_schema == column_name:
+            return chunk
+    return None
+
+
+def row_group_column_ranges(metadata, column_name='timestamp'):
+    """Return a (min, max) tuple per row group, or None for row groups without statistics."""
+    ranges = []
+    for i in range(metadata.num_row_groups):
+        chunk = column_chunk(metadata.row_group(i), column_name)
+        stats = chunk.statistics if chunk is not None else None
+        if stats is None or not stats.has_min_max:
+            ranges.append(None)
+        else:
+            ranges.append((stats.min, stats.max))
+    return ranges
+
+
+def column_range(pf, column_name='timestamp'):
+    """Return (min, max, source) for a column of an open ParquetFile.
+
+    Uses the column chunk statistics when every non-empty row group has them and
+    falls back to scanning that single column otherwise. source is 'statistics',
+    'scan', or None when the column is absent or the file is empty.
+    """
+    metadata = pf.metadata
+    if column_name not in pf.schema_arrow.names or metadata.num_rows == 0:
+        return None, None, None
+
+    row_group_rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    ranges = [r for r, n in zip(row_group_column_ranges(metadata, column_name), row_group_rows) if n > 0]
+    if ranges and all(r is not None for r in ranges):
+        return min(r[0] for r in ranges), max(r[1] for r in ranges), 'statistics'
+
+    column = pf.read(columns=[column_name]).column(column_name)
+    min_max = pc.min_max(column)
+    return min_max['min'].as_py(), min_max['max'].as_py(), 'scan'
+
+
+def column_null_counts(file_path, columns=None, exclude=(), since_us=None, timestamp_col='timestamp'):
+    """Null count per column, from column chunk statistics where possible; NaN counts as null.
+
+    Returns (num_rows, {column: null_count}, {column: 'statistics' | 'scan'}).
+    A column is taken from statistics only when it is not floating point and
+    every row group records a null_count for it. Parquet statistics do not
+    count NaN, so floating-point columns, like columns without statistics,
+    are read and counted as null_count plus is_nan. With since_us, only rows
+    whose timestamp is >= since_us are counted (and num_rows is theirs), so
+    every column is scanned.
+    """
+    pf = pq.ParquetFile(file_path)
+    metadata = pf.metadata
+    schema = pf.schema_arrow
+    names = [name for name in (columns or schema.names) if name not in exclude]
+    num_rows = metadata.num_rows
+
+    counts, sources, to_scan = {}, {}, []
+    for name in names:
+        if since_us is not None or pa.types.is_floating(schema.field(name).type):
+            to_scan.append(name)
+            continue
+        total = 0
+        for i in range(metadata.num_row_groups):
+            chunk = column_chunk(metadata.row_group(i), name)
+            stats = chunk.statistics if chunk is not None else None
+            if stats is None or not stats.has_null_count:
+                total = None
+                break
+            total += stats.null_count
+        if total is None:
+            to_scan.append(name)
+        else:
+            counts[name] = total
+            sources[name] = 'statistics'
+
+    if to_scan or since_us is not None:
+        if since_us is None:
+            table = pf.read(columns=to_scan)
+        else:
+            table = pf.read(columns=list(dict.fromkeys(to_scan + [timestamp_col])))
+            table = table.filter(pc.greater_equal(table.column(timestamp_col), since_us))
+            num_rows = table.num_rows
+        for name in to_scan:
+            column = table.column(name)
+            nulls = column.null_count
+            if pa.types.is_floating(column.type):
+                nulls += int(pc.sum(pc.is_nan(column)).as_py() or 0)
+            counts[name] = nulls
+            sources[name] = 'scan'
+
+    counts = {name: counts[name] for name in names}
+    return num_rows, counts, sources
+
+
+def read_footer_summary(file_path, timestamp_col='timestamp'):
+    """Summarize a parquet file from its footer, decoding only a single sample row.
+
+    Returns a dict with num_rows, row_group_rows, schema, sample (a one-row
+    DataFrame carrying every column with its pandas dtype), timestamp_min,
+    timestamp_max and timestamp_source ('statistics', 'scan' or None).
+    """
+    with span('footer'):
+        pf = pq.ParquetFile(file_path)
+        metadata = pf.metadata
+        schema = pf.schema_arrow
+        row_group_rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    count('footer_bytes', metadata.serialized_size)
+
+    # Sample row from the first row group only
+    with span('decode'):
+        batches = pf.iter_batches(batch_size=1, row_groups=[0]) if metadata.num_row_groups else iter(())
+        first_batch = next(batches, None)
+        if first_batch is not None:
+            sample = first_batch.to_pandas()
+        else:
+            sample = schema.empty_table().to_pandas()
+
+    with span('footer'):
+        ts_min, ts_max, ts_source = column_range(pf, timestamp_col)
+
+    return {
+        'num_rows': metadata.num_rows,
+        'num_row_groups': metadata.num_row_groups,
+        'row_group_rows': row_group_rows,
+        'schema': schema,
+        'created_by': metadata.created_by,
+        'sample': sample,
+        'timestamp_min': ts_min,
+        'timestamp_max': ts_max,
+        'timestamp_source': ts_source,
+    }
+
+
+def print_row_group_layout(summary):
+    """Print the row group layout section shared by the analyzers' metadata mode."""
+    print("🧱 ROW GROUPS (from footer)")
+    print("-" * 60)
+    print(f"Row Groups: {summary['num_row_groups']}")
+    for i, rows in enumerate(summary['row_group_rows'][:10]):
+        print(f"  [{i}] {rows:,} rows")
+    if summary['num_row_groups'] > 10:
+        print(f"  ... ({summary['num_row_groups'] - 10} more row groups)")
+    print(f"Created By: {summary['created_by']}")
+    print(f"Timestamp Range Source: {summary['timestamp_source'] or 'N/A'}")
+    print()
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    if len(sys.argv) > 1:
+        file_path = sys.argv[1]
+    else:
+        file_path = "~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet"
+
+    summary = read_footer_summary(os.path.expanduser(file_path))
+    print("🔍 Parquet Footer Summary")
+    print("=" * 60)
+    print(f"File: {os.path.basename(file_path)}")
+    print(f"Total Rows: {summary['num_rows']:,}")
+    print()
+    print_row_group_layout(summary)
+    print("📋 SCHEMA")
+    print("-" * 60)
+    for field in summary['schema']:
+        print(f"{field.name:<20} {str(field.type)}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Partition Analyzer Engine
+Discovers every parquet file under a date=/symbol= dataset root and analyzes them across a process pool
+"""
+
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow.parquet as pq
+
+from analysis_cache import AnalysisCache
+from instrumentation import init_from_cli
+from lake_catalog import RESULTS_ROOT, LakeCatalog
+from parquet_metadata import column_range
+
+ANALYZER_NAME = 'partition_engine'
+ANALYZER_VERSION = '1'
+
+
+def discover_partition_files(dataset_root):
+    """Return sorted (date, symbol, path) tuples for every parquet file under dataset_root.
+
+    The lake catalog is refreshed for this dataset first, so only directories
+    that changed since the last run are listed.
+    """
+    dataset_root = os.path.normpath(os.path.expanduser(dataset_root))
+    dataset = os.path.basename(dataset_root)
+    with LakeCatalog(os.path.dirname(dataset_root)) as catalog:
+        catalog.refresh([dataset])
+        return catalog.lookup_files(dataset)
+
+
+def schema_hash(schema):
+    """Short stable hash of an arrow schema, ignoring the pandas metadata blob."""
+    text = schema.remove_metadata().to_string(show_field_metadata=False)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def analyze_partition_file(path):
+    """Collect footer-level statistics for one parquet file as a flat dict."""
+    record = {
+        'path': path,
+        'file': os.path.basename(path),
+        'bytes': None,
+        'rows': None,
+        'row_groups': None,
+        'columns': None,
+        'ts_min': None,
+        'ts_max': None,
+        'duration_s': None,
+        'rows_per_second': None,
+        'schema_hash': None,
+        'ts_source': None,
+        'error': None,
+    }
+    try:
+        record['bytes'] = os.path.getsize(path)
+        pf = pq.ParquetFile(path)
+        metadata = pf.metadata
+        record['rows'] = metadata.num_rows
+        record['row_groups'] = metadata.num_row_groups
+        record['columns'] = metadata.num_columns
+        record['schema_hash'] = schema_hash(pf.schema_arrow)
+
+        ts_min, ts_max, ts_source = column_range(pf, 'timestamp')
+        record['ts_min'], record['ts_max'], record['ts_source'] = ts_min, ts_max, ts_source
+        if ts_min is not None and ts_max is not None:
+            # Timestamps are Unix microseconds; rate uses the observed span, not a full day
+            duration_s = (ts_max - ts_min) / 1_000_000
+            record['duration_s'] = duration_s
+            if duration_s > 0:
+                record['rows_per_second'] = metadata.num_rows / duration_s
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def run_partition_audit(dataset_root, output_path=None, workers=None, use_cache=True):
+    """Analyze every file under dataset_root in parallel and write one row per file.
+
+    With use_cache, files whose path, size, mtime and analyzer version match a
+    cached entry are not reopened; only new or changed files go to the pool.
+    """
+    import pandas as pd
+
+    dataset_root = os.path.expanduser(dataset_root)
+    dataset = os.path.basename(os.path.normpath(dataset_root))
+    if output_path is None:
+        output_path = os.path.join(RESULTS_ROOT, f"{dataset}.parquet")
+    workers = workers or os.cpu_count() or 1
+
+    print("🔍 Partition Audit")
+    print("=" * 60)
+    print(f"Dataset: {dataset}")
+    print(f"Root: {dataset_root}")
+
+    start = time.perf_counter()
+    files = discover_partition_files(dataset_root)
+    print(f"Files discovered: {len(files):,} ({time.perf_counter() - start:.2f}s)")
+    print(f"Workers: {workers}")
+    print()
+
+    paths = [path for _, _, path in files]
+    cache = AnalysisCache() if use_cache else None
+    if cache is not None:
+        cached, pending = cache.get_many(ANALYZER_NAME, paths, ANALYZER_VERSION)
+        print(f"Cache hits: {len(cached):,}  misses: {len(pending):,}")
+        print()
+    else:
+        cached, pending = {}, paths
+
+    chunksize = max(1, len(pending) // (workers * 16))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        fresh = dict(zip(pending, pool.map(analyze_partition_file, pending, chunksize=chunksize)))
+
+    if cache is not None:
+        # Only successful analyses are cached so transient read errors are retried next run
+        cache.put_many(ANALYZER_NAME, {p: r for p, r in fresh.items() if r['error'] is None}, ANALYZER_VERSION)
+        cache.close()
+
+    records = [cached[path] if path in cached else fresh[path] for path in paths]
+
+    for (date, symbol, _), record in zip(files, records):
+        record['dataset'] = dataset
+        record['date'] = date
+        record['symbol'] = symbol
+
+    columns = ['dataset', 'date', 'symbol', 'file', 'bytes', 'rows', 'row_groups', 'columns',
+               'ts_min', 'ts_max', 'duration_s', 'rows_per_second', 'schema_hash', 'ts_source',
+               'error', 'path']
+    results = pd.DataFrame.from_records(records, columns=columns)
+    write_results_table(results, output_path)
+
+    elapsed = time.perf_counter() - start
+    print("📊 AUDIT SUMMARY")
+    print("-" * 60)
+    print(f"Files analyzed: {len(results):,}")
+    print(f"Errors: {results['error'].notna().sum():,}")
+    print(f"Total rows: {int(results['rows'].fillna(0).sum()):,}")
+    print(f"Total size: {results['bytes'].fillna(0).sum() / (1024**3):.2f} GB")
+    print(f"Distinct schemas: {results['schema_hash'].nunique()}")
+    print(f"Elapsed: {elapsed:.2f}s ({len(results) / elapsed if elapsed > 0 else 0:.0f} files/s)")
+    print(f"Results: {output_path}")
+    print()
+    print("✅ Partition audit complete")
+    return results
+
+
+def write_results_table(results, output_path):
+    """Write a results DataFrame as parquet (or CSV when the path ends in .csv)."""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    if output_path.endswith('.csv'):
+        results.to_csv(output_path, index=False)
+    else:
+        results.to_parquet(output_path, index=False)
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    dataset_root = args[0] if len(args) > 0 else "~/data/raw.binance-usdt-futures.BookDepth"
+    output_path = os.path.expanduser(args[1]) if len(args) > 1 else None
+    workers = int(args[2]) if len(args) > 2 else None
+    use_cache = '--no-cache' not in sys.argv[1:]
+
+    run_partition_audit(dataset_root, output_path, workers, use_cache)
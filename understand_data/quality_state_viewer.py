@@ -6,77 +6,114 @@ Simple script to view the essential structure of _quality_state JSON files.
 
 import json
 import os
+import sys
 
+from analysis_results import (
+    QualityStateResult,
+    json_sample,
+    json_type_name,
+    render_field_table,
+    render_json_tree,
+    results_root_from_argv,
+    write_results,
+)
+from instrumentation import count, init_from_cli, phase
 
-def view_quality_state():
-    """Show a quick overview of the quality state JSON structure."""
-    file_path = os.path.expanduser('~/data/_quality_state/raw.binance-usdt-futures.BookDepth/ENAUSDT/state.json')
-    
+FIELD_DESCRIPTIONS = {
+    'last_processed_date': 'Date when data was last processed',
+    'last_updated_utc': 'UTC timestamp of last update',
+    'partitions_checked_in_last_run': 'List of processed date partitions',
+    'check_results': 'Quality check results',
+    'last_processed_timestamp': 'Unix timestamp of processing',
+}
+
+
+def collect_quality_state(data, file_path):
+    """QualityStateResult for one decoded state.json; dataset and symbol come from its directory names."""
+    symbol_dir = os.path.dirname(os.path.abspath(file_path))
+    dataset_dir = os.path.dirname(symbol_dir)
+    in_state_tree = os.path.basename(os.path.dirname(dataset_dir)) == '_quality_state'
+    partitions = data.get('partitions_checked_in_last_run') or []
+    checks = data.get('check_results') or []
+    return QualityStateResult(
+        path=os.path.abspath(file_path),
+        dataset=os.path.basename(dataset_dir) if in_state_tree else None,
+        symbol=os.path.basename(symbol_dir) if in_state_tree else None,
+        size_bytes=os.path.getsize(file_path),
+        fields=list(data),
+        last_processed_date=data.get('last_processed_date'),
+        last_updated_utc=data.get('last_updated_utc'),
+        last_processed_timestamp=data.get('last_processed_timestamp'),
+        partitions_checked=len(partitions),
+        first_partition=min(partitions) if partitions else None,
+        last_partition=max(partitions) if partitions else None,
+        check_names=[str(check.get('check_name')) for check in checks],
+        check_summaries=[str(check.get('summary')) for check in checks],
+        sample_json=json.dumps(json_sample(data, max_keys=8)),
+    )
+
+
+def render_quality_state_report(result, data):
+    """Print the field table, check summaries and organizational chart of a quality state file."""
     print("🔍 Quality State Structure Viewer")
     print("=" * 50)
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    print(f"📁 File: {os.path.basename(file_path)}")
+    print(f"📁 File: {os.path.basename(result.path)}")
+    if result.dataset:
+        print(f"📂 Dataset / Symbol: {result.dataset} / {result.symbol}")
     print()
     
-    # Display Table Format
-    print("📊 TABLE FORMAT")
-    print("-" * 50)
-    print(f"{'Field':<30} {'Type':<15} {'Value':<20} {'Description'}")
-    print("-" * 50)
-    
-    # Root level fields
-    print(f"{'last_processed_date':<30} {'string':<15} {'2025-07-16':<20} {'Date when data was last processed'}")
-    print(f"{'last_updated_utc':<30} {'string':<15} {'2025-07-17T...':<20} {'UTC timestamp of last update'}")
-    print(f"{'partitions_checked_in_last_run':<30} {'array':<15} {'[471 dates]':<20} {'List of processed date partitions'}")
-    print(f"{'check_results':<30} {'array':<15} {'[3 checks]':<20} {'Quality check results'}")
-    print(f"{'last_processed_timestamp':<30} {'integer':<15} {'1752710399858':<20} {'Unix timestamp of processing'}")
+    rows = []
+    for field, value in data.items():
+        if isinstance(value, list):
+            noun = 'dates' if field == 'partitions_checked_in_last_run' else 'checks' if field == 'check_results' else 'items'
+            preview = f'[{len(value)} {noun}]'
+        elif isinstance(value, dict):
+            preview = f'{{{len(value)} keys}}'
+        else:
+            preview = str(value)
+            preview = preview if len(preview) <= 20 else preview[:14] + '...'
+        rows.append((field, json_type_name(value), preview, FIELD_DESCRIPTIONS.get(field, '')))
+    render_field_table(rows)
     
-    print()
+    if result.check_names:
+        print("✔️ CHECK RESULTS")
+        print("-" * 50)
+        for name, summary in zip(result.check_names, result.check_summaries):
+            print(f"{name}: {summary}")
+        print()
     
     # Display Organizational Chart
     print("📋 ORGANIZATIONAL CHART")
     print("-" * 50)
-    print("JSON Root Object")
-    print("+-- last_processed_date: \"2025-07-16\"")
-    print("+-- last_updated_utc: \"2025-07-17T08:49:50.441662+00:00\"")
-    print("+-- partitions_checked_in_last_run: Array[471]")
-    print("|   +-- [0]: \"2024-04-02\"")
-    print("|   +-- [1]: \"2024-04-03\"")
-    print("|   +-- [2]: \"2024-04-04\"")
-    print("|   +-- ... (468 more dates)")
-    print("|   +-- [470]: \"2025-07-16\"")
-    print("+-- check_results: Array[3]")
-    print("|   +-- [0]: Object")
-    print("|   |   +-- check_name: \"Date Coverage\"")
-    print("|   |   +-- summary: \"Coverage from 2024-04-02 to 2025-07-16. Found 471/471 days. Missing: 0 days.\"")
-    print("|   |   +-- details: Object")
-    print("|   |       +-- start_date: \"2024-04-02\"")
-    print("|   |       +-- end_date: \"2025-07-16\"")
-    print("|   |       +-- expected_days: 471")
-    print("|   |       +-- actual_days: 471")
-    print("|   |       +-- missing_days: 0")
-    print("|   +-- [1]: Object")
-    print("|   |   +-- check_name: \"Timestamp Continuity\"")
-    print("|   |   +-- summary: \"Found 1 total gaps. Max gap within batch: 870.42s.\"")
-    print("|   |   +-- details: Object")
-    print("|   |       +-- max_intra_batch_gap_ms: 870423")
-    print("|   +-- [2]: Object")
-    print("|       +-- check_name: \"Column Nullness\"")
-    print("|       +-- summary: \"No nulls found in any columns.\"")
-    print("|       +-- details: Object")
-    print("|           +-- bid_price_1: 0.0")
-    print("|           +-- bid_volume_1: 0.0")
-    print("|           +-- bid_price_2: 0.0")
-    print("|           +-- ... (16 more null rate fields)")
-    print("|           +-- ask_volume_5: 0.0")
-    print("+-- last_processed_timestamp: 1752710399858")
+    render_json_tree(data, max_keys=8)
     
     print()
     print("✅ Quality state structure overview complete")
 
 
+def view_quality_state(file_path=None, render=True):
+    """Show a quick overview of the quality state JSON structure; returns a QualityStateResult."""
+    if file_path is None:
+        file_path = os.path.expanduser('~/data/_quality_state/raw.binance-usdt-futures.BookDepth/ENAUSDT/state.json')
+    
+    phase('decode')
+    count('bytes', os.path.getsize(file_path))
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    phase('compute')
+    result = collect_quality_state(data, file_path)
+    
+    if render:
+        phase('report')
+        render_quality_state_report(result, data)
+    return result
+
+
 if __name__ == "__main__":
-    view_quality_state() 
\ No newline at end of file
+    # quality_state_viewer.py [paths...] [--quiet] [--results[=dir]]
+    init_from_cli()
+    paths = [os.path.expanduser(arg) for arg in sys.argv[1:] if not arg.startswith('--')] or [None]
+    results_root = results_root_from_argv()
+    records = [view_quality_state(path, render='--quiet' not in sys.argv[1:]) for path in paths]
+    if results_root is not None:
+        write_results(records, results_root)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Failed Download Retry Scheduler
+Retries non-permanent failures from the failed-downloads JSON concurrently with per-source limits, backoff and atomic state updates
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from atomic_io import atomic_output_path, write_json_atomic
+from failed_downloads_store import DATA_ROOT, FAILED_DOWNLOAD_FILES, read_json
+from instrumentation import init_from_cli
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DOWNLOAD_ROOT = os.path.join(DATA_ROOT, '_retry_downloads')
+DEFAULT_CONCURRENCY = {'binance': 8, 'tardis': 4}
+DEFAULT_URL_TEMPLATES = {
+    'binance': 'https://data.binance.vision/data/futures/um/daily/{dataset}/{symbol}/{symbol}-{dataset}-{date}.zip',
+    'tardis': 'https://datasets.tardis.dev/v1/binance-futures/{dataset}/{year}/{month}/{day}/{symbol}.csv.gz',
+}
+MAX_ATTEMPTS = 3
+BASE_DELAY_S = 1.0
+MAX_DELAY_S = 60.0
+
+
+class RetryJob:
+    """One non-permanent failure: where it is recorded and what to fetch."""
+
+    def __init__(self, state_path, source, dataset, symbol, date):
+        self.state_path = state_path
+        self.source = source
+        self.dataset = dataset
+        self.symbol = symbol
+        self.date = date
+
+    def __repr__(self):
+        return f"RetryJob({self.source}/{self.dataset}/{self.symbol}/{self.date})"
+
+
+class FetchResult:
+    """Outcome of one fetch: ok, or failed with a reason, message and whether it can never succeed."""
+
+    def __init__(self, ok, payload=None, suffix='', reason=None, error_msg=None, permanent=False, retryable=False):
+        self.ok = ok
+        self.payload = payload
+        self.suffix = suffix
+        self.reason = reason
+        self.error_msg = error_msg
+        self.permanent = permanent
+        self.retryable = retryable
+
+
+def classify_status(status):
+    """(reason, error_msg, permanent, retryable) for a failing HTTP status."""
+    if status == 404:
+        return 'no_data', 'No data available (404)', True, False
+    if status == 429 or status >= 500:
+        return 'http_error', f'HTTP {status}', False, True
+    return 'http_error', f'HTTP {status}', False, False
+
+
+class HttpFetcher:
+    """Fetches a job's file from a per-source URL template.
+
+    Uses one aiohttp session per source (connection reuse, pool sized to the
+    source's concurrency) when aiohttp is installed, and urllib in a worker
+    thread otherwise. Point url_templates at a LocalStandInServer to test.
+    """
+
+    def __init__(self, url_templates=DEFAULT_URL_TEMPLATES, headers=None, timeout_s=60):
+        self.url_templates = dict(url_templates)
+        self.headers = headers or {}
+        self.timeout_s = timeout_s
+        self._sessions = {}
+
+    def url_for(self, job):
+        year, month, day = job.date.split('-')
+        return self.url_templates[job.source].format(
+            dataset=job.dataset, symbol=job.symbol, date=job.date, year=year, month=month, day=day)
+
+    async def open(self, concurrency):
+        if aiohttp is not None:
+            for source, limit in concurrency.items():
+                self._sessions[source] = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=limit),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+                    headers=self.headers.get(source),
+                )
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    async def __call__(self, job):
+        url = self.url_for(job)
+        name = url.rsplit('/', 1)[-1]
+        suffix = '.' + name.split('.', 1)[1] if '.' in name else '.bin'
+        session = self._sessions.get(job.source)
+        if session is not None:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return self._failure(response.status)
+                return FetchResult(True, await response.read(), suffix)
+        return await asyncio.to_thread(self._fetch_blocking, url, job.source, suffix)
+
+    def _fetch_blocking(self, url, source, suffix):
+        request = urllib.request.Request(url, headers=self.headers.get(source) or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                return FetchResult(True, response.read(), suffix)
+        except urllib.error.HTTPError as e:
+            return self._failure(e.code)
+
+    @staticmethod
+    def _failure(status):
+        reason, msg, permanent, retryable = classify_status(status)
+        return FetchResult(False, reason=reason, error_msg=msg, permanent=permanent, retryable=retryable)
+
+
+def load_jobs(paths=FAILED_DOWNLOAD_FILES):
+    """(state by path, pending jobs): every failure not marked permanent."""
+    states, jobs = {}, []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        states[path] = data = read_json(path)
+        for source, datasets in data.items():
+            for dataset, symbols in datasets.items():
+                for symbol, dates in symbols.items():
+                    for date, report in dates.items():
+                        if not report.get('permanent'):
+                            jobs.append(RetryJob(path, source, dataset, symbol, date))
+    return states, jobs
+
+
+class RetryScheduler:
+    """Runs RetryJobs against a fetcher with per-source semaphores and exponential backoff with jitter.
+
+    After every job finishes, its record is removed (success) or updated
+    (failure: retry_count, timestamp, reason, error_msg, permanent) and the
+    owning JSON is rewritten atomically, so an interrupted run resumes where
+    it stopped.
+    """
+
+    def __init__(self, fetcher, states, concurrency=DEFAULT_CONCURRENCY, download_root=DOWNLOAD_ROOT,
+                 max_attempts=MAX_ATTEMPTS, base_delay_s=BASE_DELAY_S, max_delay_s=MAX_DELAY_S):
+        self.fetcher = fetcher
+        self.states = states
+        self.concurrency = dict(concurrency)
+        self.download_root = download_root
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.counts = {'recovered': 0, 'failed': 0, 'permanent': 0}
+
+    def backoff_delay(self, attempt):
+        """Exponential delay before retry number attempt (1-based), capped and jittered by ±50%."""
+        delay = min(self.base_delay_s * 2 ** (attempt - 1), self.max_delay_s)
+        return delay * random.uniform(0.5, 1.5)
+
+    def output_path(self, job, suffix):
+        return os.path.join(self.download_root, job.source, job.dataset, job.symbol, f'{job.date}{suffix}')
+
+    async def _attempt(self, job, semaphore):
+        result = None
+        for attempt in range(1, self.max_attempts + 1):
+            async with semaphore:
+                try:
+                    result = await self.fetcher(job)
+                except Exception as e:
+                    result = FetchResult(False, reason='network_error', error_msg=f'{type(e).__name__}: {e}',
+                                         retryable=True)
+            if result.ok or not result.retryable or attempt == self.max_attempts:
+                return result, attempt
+            # Sleep outside the semaphore so other jobs use the slot
+            await asyncio.sleep(self.backoff_delay(attempt))
+        return result, self.max_attempts
+
+    def _record(self, job, result, attempts):
+        dates = self.states[job.state_path][job.source][job.dataset][job.symbol]
+        if result.ok:
+            with atomic_output_path(self.output_path(job, result.suffix)) as tmp_path:
+                with open(tmp_path, 'wb') as f:
+                    f.write(result.payload)
+            del dates[job.date]
+            self.counts['recovered'] += 1
+        else:
+            report = dates[job.date]
+            report['reason'] = result.reason
+            report['error_msg'] = result.error_msg
+            report['retry_count'] = (report.get('retry_count') or 0) + attempts
+            report['timestamp'] = datetime.now(timezone.utc).isoformat()
+            report['permanent'] = bool(result.permanent)
+            self.counts['permanent' if result.permanent else 'failed'] += 1
+        write_json_atomic(job.state_path, self.states[job.state_path])
+
+    async def _run_job(self, job, semaphores, write_lock):
+        result, attempts = await self._attempt(job, semaphores[job.source])
+        async with write_lock:
+            await asyncio.to_thread(self._record, job, result, attempts)
+        status = 'recovered' if result.ok else result.reason
+        print(f"{'✅' if result.ok else '❌'} {job.source}/{job.dataset}/{job.symbol}/{job.date}: {status} ({attempts} attempt(s))")
+
+    async def run(self, jobs):
+        sources = {job.source for job in jobs}
+        limits = {source: self.concurrency.get(source, 1) for source in sources}
+        semaphores = {source: asyncio.Semaphore(limit) for source, limit in limits.items()}
+        # One writer at a time: every completion rewrites the whole JSON file
+        write_lock = asyncio.Lock()
+        open_fetcher = getattr(self.fetcher, 'open', None)
+        if open_fetcher is not None:
+            await open_fetcher(limits)
+        try:
+            await asyncio.gather(*(self._run_job(job, semaphores, write_lock) for job in jobs))
+        finally:
+            close_fetcher = getattr(self.fetcher, 'close', None)
+            if close_fetcher is not None:
+                await close_fetcher()
+        return self.counts
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalStandInServer:
+    """Threaded local HTTP server standing in for Binance/Tardis.
+
+    Serves files under root (missing files give 404). fail_rate makes that
+    fraction of requests return 503 so retry and backoff paths are exercised.
+    Use url_templates() in place of DEFAULT_URL_TEMPLATES.
+    """
+
+    def __init__(self, root, fail_rate=0.0, port=0):
+        fail_rate = float(fail_rate)
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                if fail_rate and random.random() < fail_rate:
+                    self.send_error(503)
+                    return
+                super().do_GET()
+
+        self.root = root
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), partial(Handler, directory=root))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url_templates(self):
+        """Templates mirroring DEFAULT_URL_TEMPLATES paths under root/<source>/."""
+        return {source: f"{self.url}/{source}/" + template.split('://', 1)[1].split('/', 1)[1]
+                for source, template in DEFAULT_URL_TEMPLATES.items()}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def tardis_headers():
+    """Authorization header for the Tardis datasets API from TARDIS_API_KEY, if set."""
+    key = os.environ.get('TARDIS_API_KEY')
+    return {'tardis': {'Authorization': f'Bearer {key}'}} if key else {}
+
+
+def run_retries(paths=FAILED_DOWNLOAD_FILES, fetcher=None, concurrency=DEFAULT_CONCURRENCY, dry_run=False, **kwargs):
+    """Retry every non-permanent failure recorded in paths; returns the outcome counts."""
+    states, jobs = load_jobs(paths)
+    print("🔁 Failed Download Retry Scheduler")
+    print("=" * 60)
+    print(f"Pending (non-permanent) failures: {len(jobs):,}")
+    for source in sorted({job.source for job in jobs}):
+        print(f"  {source}: {sum(job.source == source for job in jobs):,} (concurrency {concurrency.get(source, 1)})")
+    print(f"HTTP client: {'aiohttp' if aiohttp is not None else 'urllib'}")
+    print()
+    if dry_run or not jobs:
+        return {'recovered': 0, 'failed': 0, 'permanent': 0}
+
+    start = time.perf_counter()
+    scheduler = RetryScheduler(fetcher or HttpFetcher(headers=tardis_headers()), states, concurrency, **kwargs)
+    counts = asyncio.run(scheduler.run(jobs))
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("📊 RETRY SUMMARY")
+    print("-" * 60)
+    print(f"Recovered: {counts['recovered']:,}")
+    print(f"Still failing: {counts['failed']:,}")
+    print(f"Newly permanent: {counts['permanent']:,}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    paths = [os.path.expanduser(p) for p in args] or FAILED_DOWNLOAD_FILES
+    dry_run = '--dry-run' in sys.argv[1:]
+    stand_in = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--stand-in=')), None)
+
+    if stand_in:
+        # Rehearse against local files: --stand-in=<dir> serves <dir>/<source>/... over HTTP
+        with LocalStandInServer(os.path.expanduser(stand_in)) as server:
+            run_retries(paths, HttpFetcher(server.url_templates()), dry_run=dry_run)
+    else:
+        run_retries(paths, dry_run=dry_run)
+    print()
+    print("✅ Retry run complete")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Streaming Row-Group Reader
+Generator-based batch reader with column projection and running aggregators that carry state across batches
+"""
+
+import os
+import sys
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from instrumentation import count, enabled, init_from_cli, span
+
+from snapshot_histogram import (
+    ACTIVITY_EDGES,
+    ACTIVITY_LABELS,
+    DEFAULT_QUANTILES,
+    US_PER_HOUR,
+    US_PER_MS,
+    bin_index,
+    histogram_quantiles,
+    log_interval_bins,
+)
+
+DEFAULT_BATCH_SIZE = 65_536
+
+
+def iter_row_group_batches(file_path, columns=None, batch_size=DEFAULT_BATCH_SIZE, row_groups=None):
+    """Yield pyarrow RecordBatches of at most batch_size rows, reading only the projected columns."""
+    with span('footer'):
+        pf = pq.ParquetFile(file_path)
+    metadata = pf.metadata
+    if metadata.num_row_groups == 0:
+        return
+    if enabled():
+        wanted = None if columns is None else set(columns)
+        for i in (range(metadata.num_row_groups) if row_groups is None else row_groups):
+            row_group = metadata.row_group(i)
+            count('compressed_bytes', sum(row_group.column(j).total_compressed_size for j in range(row_group.num_columns)
+                                          if wanted is None or row_group.column(j).path_in_schema in wanted))
+
+    batches = pf.iter_batches(batch_size=batch_size, columns=columns, row_groups=row_groups)
+    while True:
+        # Time only the decode, not the consumer's work between batches
+        with span('decode'):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        count('rows', batch.num_rows)
+        yield batch
+
+
+def batch_column(batch, name):
+    """Column of a RecordBatch as a numpy array (nulls become NaN for floats)."""
+    return batch.column(batch.schema.get_field_index(name)).to_numpy(zero_copy_only=False)
+
+
+class RunningMinMax:
+    """Running min/max/count of one column across batches, ignoring NaN."""
+
+    def __init__(self):
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        lo, hi = values.min(), values.max()
+        self.min = lo if np.isnan(self.min) or lo < self.min else self.min
+        self.max = hi if np.isnan(self.max) or hi > self.max else self.max
+
+
+class SpreadAggregator:
+    """Running best bid/ask ranges and bid-ask spread statistics."""
+
+    def __init__(self):
+        self.bid = RunningMinMax()
+        self.ask = RunningMinMax()
+        self.spread = RunningMinMax()
+        self.spread_sum = 0.0
+        self.crossed = 0
+
+    def update(self, bid, ask):
+        spread = np.asarray(ask) - np.asarray(bid)
+        self.bid.update(bid)
+        self.ask.update(ask)
+        self.spread.update(spread)
+        valid = spread[~np.isnan(spread)]
+        self.spread_sum += float(valid.sum())
+        self.crossed += int((valid < 0).sum())
+
+    @property
+    def spread_mean(self):
+        return self.spread_sum / self.spread.count if self.spread.count else np.nan
+
+
+class IntervalAggregator:
+    """Running snapshot-interval histogram that carries the last timestamp across batch boundaries.
+
+    Intervals are binned twice: on the display edges (log_interval_bins by
+    default) and on a fine 100-bins-per-decade grid used only for quantiles,
+    which keeps interpolated quantiles within a few percent without holding the
+    intervals in memory. Timestamps that go backwards are counted in
+    out_of_order and excluded; callers needing exact results on unsorted data
+    should fall back to an in-memory sort.
+    """
+
+    def __init__(self, edges=None, quantiles=DEFAULT_QUANTILES):
+        self.edges = log_interval_bins() if edges is None else np.asarray(edges, dtype=np.float64)
+        self.fine_edges = log_interval_bins(0.001, 1_000_000.0, bins_per_decade=100)
+        self.quantiles = quantiles
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.fine_counts = np.zeros(len(self.fine_edges) - 1, dtype=np.int64)
+        self.activity_counts = np.zeros(len(ACTIVITY_LABELS), dtype=np.int64)
+        self.hourly = {}
+        self.snapshots = 0
+        self.intervals = 0
+        self.out_of_order = 0
+        self.start_us = None
+        self.end_us = None
+        self.last_ts = None
+        self.sum_ms = 0.0
+        self.sumsq_ms = 0.0
+        self.min_ms = np.inf
+        self.max_ms = -np.inf
+
+    def update(self, timestamps):
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if ts.size == 0:
+            return
+        self.snapshots += ts.size
+        self.start_us = int(ts.min()) if self.start_us is None else min(self.start_us, int(ts.min()))
+        self.end_us = int(ts.max()) if self.end_us is None else max(self.end_us, int(ts.max()))
+
+        chained = ts if self.last_ts is None else np.concatenate(([self.last_ts], ts))
+        self.last_ts = int(ts[-1])
+        if chained.size < 2:
+            return
+
+        later = chained[1:]
+        deltas = np.diff(chained)
+        backwards = deltas < 0
+        if backwards.any():
+            self.out_of_order += int(backwards.sum())
+            deltas = deltas[~backwards]
+            later = later[~backwards]
+        if deltas.size == 0:
+            return
+
+        intervals_ms = deltas / US_PER_MS
+        bins = bin_index(intervals_ms, self.edges)
+        n_bins = len(self.edges) - 1
+        self.counts += np.bincount(bins, minlength=n_bins)
+        self.fine_counts += np.bincount(bin_index(intervals_ms, self.fine_edges), minlength=len(self.fine_counts))
+        self.activity_counts += np.bincount(bin_index(intervals_ms, ACTIVITY_EDGES), minlength=len(ACTIVITY_LABELS))
+        self.intervals += intervals_ms.size
+        self.sum_ms += float(intervals_ms.sum())
+        self.sumsq_ms += float(np.square(intervals_ms).sum())
+        self.min_ms = min(self.min_ms, float(intervals_ms.min()))
+        self.max_ms = max(self.max_ms, float(intervals_ms.max()))
+
+        hours, inverse = np.unique(later // US_PER_HOUR, return_inverse=True)
+        per_hour = np.bincount(inverse * n_bins + bins, minlength=hours.size * n_bins).reshape(hours.size, n_bins)
+        for hour, counts in zip(hours.tolist(), per_hour):
+            if hour in self.hourly:
+                self.hourly[hour] += counts
+            else:
+                self.hourly[hour] = counts
+
+    def result(self):
+        """Profile dict with the same keys as snapshot_histogram.profile_intervals."""
+        n = self.intervals
+        hours = sorted(self.hourly)
+        n_bins = len(self.edges) - 1
+        if n:
+            mean = self.sum_ms / n
+            variance = (self.sumsq_ms - n * mean * mean) / (n - 1) if n > 1 else 0.0
+            quantiles = histogram_quantiles(self.fine_counts, self.fine_edges, self.quantiles)
+        else:
+            mean = variance = np.nan
+            quantiles = {q: np.nan for q in self.quantiles}
+        return {
+            'snapshots': self.snapshots,
+            'intervals': n,
+            'out_of_order': self.out_of_order,
+            'start_us': self.start_us,
+            'end_us': self.end_us,
+            'edges_ms': self.edges,
+            'counts': self.counts.copy(),
+            'quantiles_ms': quantiles,
+            'mean_ms': mean,
+            'std_ms': float(np.sqrt(max(variance, 0.0))) if n else np.nan,
+            'min_ms': self.min_ms if n else np.nan,
+            'max_ms': self.max_ms if n else np.nan,
+            'activity_counts': self.activity_counts.copy(),
+            'hours': np.array(hours, dtype=np.int64),
+            'hourly_counts': np.array([self.hourly[h] for h in hours], dtype=np.int64).reshape(len(hours), n_bins),
+        }
+
+
+def stream_interval_profile(file_path, batch_size=DEFAULT_BATCH_SIZE, edges=None):
+    """Interval profile of a snapshot file in bounded memory, reading only the timestamp column."""
+    aggregator = IntervalAggregator(edges=edges)
+    for batch in iter_row_group_batches(file_path, columns=['timestamp'], batch_size=batch_size):
+        aggregator.update(batch_column(batch, 'timestamp'))
+    return aggregator.result()
+
+
+def stream_top_of_book(file_path, batch_size=DEFAULT_BATCH_SIZE):
+    """Timestamp range plus best bid/ask and spread statistics, reading three columns in batches."""
+    timestamps = RunningMinMax()
+    spread = SpreadAggregator()
+    for batch in iter_row_group_batches(file_path, columns=['timestamp', 'bid_price_1', 'ask_price_1'], batch_size=batch_size):
+        timestamps.update(batch_column(batch, 'timestamp'))
+        spread.update(batch_column(batch, 'bid_price_1'), batch_column(batch, 'ask_price_1'))
+    return timestamps, spread
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    if len(sys.argv) > 1:
+        file_path = sys.argv[1]
+    else:
+        file_path = "~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet"
+    file_path = os.path.expanduser(file_path)
+
+    timestamps, spread = stream_top_of_book(file_path)
+    profile = stream_interval_profile(file_path)
+
+    print("🌊 Streaming Top-of-Book Summary")
+    print("=" * 60)
+    print(f"File: {os.path.basename(file_path)}")
+    print(f"Snapshots: {timestamps.count:,}")
+    print(f"Bid price range: {spread.bid.min:.6f} - {spread.bid.max:.6f}")
+    print(f"Ask price range: {spread.ask.min:.6f} - {spread.ask.max:.6f}")
+    print(f"Spread range: {spread.spread.min:.6f} - {spread.spread.max:.6f} (mean {spread.spread_mean:.6f})")
+    print(f"Crossed snapshots: {spread.crossed:,}")
+    print(f"Median interval: {profile['quantiles_ms'][0.5]:.1f} ms")
+    print(f"Out-of-order timestamps: {profile['out_of_order']:,}")
@@ -7,28 +7,70 @@ Analyzes the frequency patterns of order book snapshots
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-def analyze_snapshot_frequency():
-    """Analyze the frequency of order book snapshots."""
-    file_path = os.path.expanduser('~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet')
-    
+from analysis_results import SnapshotFrequencyResult, results_root_from_argv, write_results
+from instrumentation import init_from_cli, phase
+from rowgroup_stream import stream_interval_profile
+from snapshot_histogram import ACTIVITY_LABELS, histogram_quantiles, profile_snapshot_file
+
+def collect_snapshot_frequency(file_path):
+    """Profile snapshot intervals of one file into a SnapshotFrequencyResult."""
+    # Stream the timestamp column in batches; sort in memory only if the file is out of order
+    phase('compute')
+    profile = stream_interval_profile(file_path)
+    out_of_order = int(profile['out_of_order'])
+    if out_of_order:
+        profile = profile_snapshot_file(file_path)
+    edges = profile['edges_ms']
+    hourly_p50 = [histogram_quantiles(counts, edges, (0.5,))[0.5] for counts in profile['hourly_counts']]
+
+    start_us, end_us = profile['start_us'], profile['end_us']
+    duration_s = (end_us - start_us) / 1e6 if start_us is not None and end_us is not None else None
+    return SnapshotFrequencyResult(
+        path=os.path.abspath(file_path),
+        file=os.path.basename(file_path),
+        snapshots=int(profile['snapshots']),
+        intervals=int(profile['intervals']),
+        out_of_order=out_of_order,
+        start_us=None if start_us is None else int(start_us),
+        end_us=None if end_us is None else int(end_us),
+        duration_s=duration_s,
+        snapshots_per_second=profile['snapshots'] / duration_s if duration_s else None,
+        mean_ms=float(profile['mean_ms']),
+        std_ms=float(profile['std_ms']),
+        min_ms=float(profile['min_ms']),
+        max_ms=float(profile['max_ms']),
+        p50_ms=float(profile['quantiles_ms'][0.5]),
+        p90_ms=float(profile['quantiles_ms'][0.9]),
+        p99_ms=float(profile['quantiles_ms'][0.99]),
+        p999_ms=float(profile['quantiles_ms'][0.999]),
+        activity_labels=list(ACTIVITY_LABELS),
+        activity_counts=[int(c) for c in profile['activity_counts']],
+        histogram_edges_ms=[float(e) for e in edges],
+        histogram_counts=[int(c) for c in profile['counts']],
+        hourly_hours=[int(h) for h in profile['hours']],
+        hourly_p50_ms=[float(q) for q in hourly_p50],
+    )
+
+
+def render_snapshot_frequency_report(result):
+    """Print the frequency report for a SnapshotFrequencyResult."""
+    phase('report')
     print("📊 Order Book Snapshot Frequency Analysis")
     print("=" * 60)
-    
-    # Load data
-    df = pd.read_parquet(file_path)
-    df_sorted = df.sort_values('timestamp')
-    
-    # Calculate intervals
-    intervals = df_sorted['timestamp'].diff().dropna() / 1000  # Convert to milliseconds
-    
-    print(f"📁 File: {os.path.basename(file_path)}")
-    print(f"📏 Total snapshots: {len(df):,}")
+    if result.out_of_order:
+        print(f"⚠️ {result.out_of_order:,} out-of-order timestamps, re-profiled with an in-memory sort")
+
+    total = result.snapshots
+    n_intervals = max(result.intervals, 1)
+    print(f"📁 File: {result.file}")
+    print(f"📏 Total snapshots: {total:,}")
     print()
     
     # Time range
-    start_time = pd.to_datetime(df['timestamp'].min(), unit='us')
-    end_time = pd.to_datetime(df['timestamp'].max(), unit='us')
+    start_time = pd.to_datetime(result.start_us, unit='us')
+    end_time = pd.to_datetime(result.end_us, unit='us')
     duration = end_time - start_time
     
     print("⏰ TIME RANGE")
@@ -38,58 +80,101 @@ def analyze_snapshot_frequency():
     print(f"Duration: {duration}")
     print()
     
-    # Frequency analysis
+    # Frequency analysis over the file's own time span
     print("⏱️ FREQUENCY ANALYSIS")
     print("-" * 60)
-    print(f"Average snapshots per second: {len(df) / (24*60*60):.1f}")
-    print(f"Average snapshots per minute: {len(df) / (24*60):.1f}")
-    print(f"Average snapshots per hour: {len(df) / 24:.1f}")
+    per_second = result.snapshots_per_second
+    if per_second is not None:
+        print(f"Average snapshots per second: {per_second:.1f}")
+        print(f"Average snapshots per minute: {per_second * 60:.1f}")
+        print(f"Average snapshots per hour: {per_second * 3600:.1f}")
+    else:
+        print("Average snapshots per second: N/A (zero duration)")
     print()
     
     # Interval statistics
     print("📈 INTERVAL STATISTICS (milliseconds)")
     print("-" * 60)
-    print(f"Mean interval: {intervals.mean():.1f} ms")
-    print(f"Median interval: {intervals.median():.1f} ms")
-    print(f"Min interval: {intervals.min():.1f} ms")
-    print(f"Max interval: {intervals.max():.1f} ms")
-    print(f"Std deviation: {intervals.std():.1f} ms")
+    print(f"Mean interval: {result.mean_ms:.1f} ms")
+    print(f"Median interval: {result.p50_ms:.1f} ms")
+    print(f"Min interval: {result.min_ms:.1f} ms")
+    print(f"Max interval: {result.max_ms:.1f} ms")
+    print(f"Std deviation: {result.std_ms:.1f} ms")
+    for label, value in (('p90', result.p90_ms), ('p99', result.p99_ms), ('p99.9', result.p999_ms)):
+        print(f"{label} interval: {value:.1f} ms")
     print()
     
     # Frequency distribution
     print("📊 FREQUENCY DISTRIBUTION")
     print("-" * 60)
-    very_fast = len(intervals[intervals < 10])
-    fast = len(intervals[(intervals >= 10) & (intervals < 50)])
-    normal = len(intervals[(intervals >= 50) & (intervals < 100)])
-    slow = len(intervals[intervals >= 100])
+    very_fast, fast, normal, slow = result.activity_counts
+    for label, count in zip(result.activity_labels, result.activity_counts):
+        print(f"{label}: {count:,} ({count/n_intervals*100:.1f}%)")
+    print()
     
-    print(f"Very fast (< 10ms): {very_fast:,} ({very_fast/len(intervals)*100:.1f}%)")
-    print(f"Fast (10-50ms): {fast:,} ({fast/len(intervals)*100:.1f}%)")
-    print(f"Normal (50-100ms): {normal:,} ({normal/len(intervals)*100:.1f}%)")
-    print(f"Slow (> 100ms): {slow:,} ({slow/len(intervals)*100:.1f}%)")
+    # Log-spaced histogram
+    print("📉 INTERVAL HISTOGRAM (log-spaced bins)")
+    print("-" * 60)
+    edges = result.histogram_edges_ms
+    peak = max(max(result.histogram_counts, default=0), 1)
+    for lo, hi, count in zip(edges[:-1], edges[1:], result.histogram_counts):
+        if count == 0:
+            continue
+        bar = "#" * int(round(40 * count / peak))
+        print(f"{lo:>9.1f} - {hi:>9.1f} ms {count:>10,} {bar}")
     print()
     
     # Market activity patterns
     print("🎯 MARKET ACTIVITY PATTERNS")
     print("-" * 60)
-    print("• High-frequency trading periods: 73.7% of snapshots are 10-50ms apart")
-    print("• Normal trading periods: 16.0% of snapshots are 50-100ms apart")
-    print("• Low activity periods: 10.3% of snapshots are >100ms apart")
-    print("• Burst activity: 0.0% of snapshots are <10ms apart (very rare)")
+    print(f"• High-frequency trading periods: {fast/n_intervals*100:.1f}% of snapshots are 10-50ms apart")
+    print(f"• Normal trading periods: {normal/n_intervals*100:.1f}% of snapshots are 50-100ms apart")
+    print(f"• Low activity periods: {slow/n_intervals*100:.1f}% of snapshots are >100ms apart")
+    print(f"• Burst activity: {very_fast/n_intervals*100:.1f}% of snapshots are <10ms apart")
     print()
     
+    # Busiest and quietest hours by median interval
+    if result.hourly_hours:
+        hourly_p50 = result.hourly_p50_ms
+        busiest = int(np.nanargmin(hourly_p50))
+        quietest = int(np.nanargmax(hourly_p50))
+        print("🕐 HOURLY CADENCE")
+        print("-" * 60)
+        print(f"Busiest hour: {result.hourly_hours[busiest] % 24:02d}:00 UTC (median ~{hourly_p50[busiest]:.1f} ms)")
+        print(f"Quietest hour: {result.hourly_hours[quietest] % 24:02d}:00 UTC (median ~{hourly_p50[quietest]:.1f} ms)")
+        print()
+    
     # What this means
     print("💡 WHAT THIS MEANS")
     print("-" * 60)
-    print("• Average frequency: ~18 snapshots per second")
-    print("• Typical interval: ~56ms between snapshots")
-    print("• Most common: 10-50ms intervals (high-frequency trading)")
-    print("• Occasional gaps: Up to 16+ seconds (market pauses)")
+    most_common = result.activity_labels[int(np.argmax(result.activity_counts))]
+    if per_second is not None:
+        print(f"• Average frequency: ~{per_second:.0f} snapshots per second")
+    print(f"• Typical interval: ~{result.p50_ms:.0f}ms between snapshots")
+    print(f"• Most common: {most_common}")
+    print(f"• Occasional gaps: Up to {result.max_ms / 1000:.1f} seconds (market pauses)")
     print("• Real-time data: Microsecond precision timestamps")
     print()
     
     print("✅ Frequency analysis complete")
 
+
+def analyze_snapshot_frequency(file_path=None, render=True):
+    """Analyze the frequency of order book snapshots; returns a SnapshotFrequencyResult."""
+    if file_path is None:
+        file_path = os.path.expanduser('~/data/raw.binance-usdt-futures.BookDepth/date=2022-07-07/symbol=DOTUSDT/book_snapshot_5-20250707000000-0.parquet')
+    result = collect_snapshot_frequency(file_path)
+    if render:
+        render_snapshot_frequency_report(result)
+    return result
+
 if __name__ == "__main__":
-    analyze_snapshot_frequency() 
\ No newline at end of file
+    # snapshot_frequency_analyzer.py [paths...] [--quiet] [--results[=dir]]
+    init_from_cli()
+    paths = [os.path.expanduser(arg) for arg in sys.argv[1:] if not arg.startswith('--')] or [None]
+    render = '--quiet' not in sys.argv[1:]
+    results_root = results_root_from_argv()
+
+    records = [analyze_snapshot_frequency(path, render=render) for path in paths]
+    if results_root is not None:
+        write_results(records, results_root)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Snapshot Interval Histogram Engine
+Log-spaced interval histograms and quantiles of snapshot cadence, per symbol and per hour across the lake
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from instrumentation import init_from_cli
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+US_PER_MS = 1_000
+US_PER_HOUR = 3_600_000_000
+
+# Buckets used by the original frequency report (milliseconds)
+ACTIVITY_EDGES = np.array([0.0, 10.0, 50.0, 100.0, np.inf])
+ACTIVITY_LABELS = ('Very fast (< 10ms)', 'Fast (10-50ms)', 'Normal (50-100ms)', 'Slow (> 100ms)')
+
+
+def log_interval_bins(min_ms=1.0, max_ms=60_000.0, bins_per_decade=10):
+    """Bin edges in milliseconds: [0, log-spaced min_ms..max_ms, inf]."""
+    decades = np.log10(max_ms) - np.log10(min_ms)
+    n_edges = int(np.ceil(decades * bins_per_decade)) + 1
+    inner = np.logspace(np.log10(min_ms), np.log10(max_ms), n_edges)
+    return np.concatenate(([0.0], inner, [np.inf]))
+
+
+def sorted_timestamps(timestamps):
+    """Return timestamps as int64 in ascending order, skipping the sort when already monotonic."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if ts.size > 1 and not (ts[1:] >= ts[:-1]).all():
+        ts = np.sort(ts, kind='stable')
+    return ts
+
+
+def bin_index(intervals_ms, edges):
+    """Bin number of each interval for half-open [edge_i, edge_i+1) bins."""
+    idx = np.searchsorted(edges, intervals_ms, side='right') - 1
+    return np.clip(idx, 0, len(edges) - 2)
+
+
+def histogram_quantiles(counts, edges, quantiles=DEFAULT_QUANTILES):
+    """Approximate quantiles from binned counts by linear interpolation inside the bin."""
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return {q: np.nan for q in quantiles}
+    cumulative = np.cumsum(counts)
+    result = {}
+    for q in quantiles:
+        target = q * total
+        b = int(np.searchsorted(cumulative, target, side='left'))
+        b = min(b, len(counts) - 1)
+        lo, hi = edges[b], edges[b + 1]
+        if not np.isfinite(hi):
+            result[q] = lo
+            continue
+        before = cumulative[b - 1] if b > 0 else 0.0
+        frac = (target - before) / counts[b] if counts[b] else 0.0
+        result[q] = lo + frac * (hi - lo)
+    return result
+
+
+def profile_intervals(timestamps, edges=None, quantiles=DEFAULT_QUANTILES, per_hour=True):
+    """Profile the cadence of a timestamp column (Unix microseconds).
+
+    Returns a dict with the interval histogram over edges, exact quantiles,
+    summary moments, the original four activity buckets and, with per_hour, an
+    (hours x bins) count matrix keyed by the hour of the later snapshot.
+    """
+    edges = log_interval_bins() if edges is None else np.asarray(edges, dtype=np.float64)
+    n_bins = len(edges) - 1
+    ts = sorted_timestamps(timestamps)
+    intervals_ms = np.diff(ts) / US_PER_MS
+
+    profile = {
+        'snapshots': int(ts.size),
+        'intervals': int(intervals_ms.size),
+        'start_us': int(ts[0]) if ts.size else None,
+        'end_us': int(ts[-1]) if ts.size else None,
+        'edges_ms': edges,
+        'counts': np.zeros(n_bins, dtype=np.int64),
+        'quantiles_ms': {q: np.nan for q in quantiles},
+        'mean_ms': np.nan,
+        'std_ms': np.nan,
+        'min_ms': np.nan,
+        'max_ms': np.nan,
+        'activity_counts': np.zeros(len(ACTIVITY_LABELS), dtype=np.int64),
+        'hours': np.zeros(0, dtype=np.int64),
+        'hourly_counts': np.zeros((0, n_bins), dtype=np.int64),
+    }
+    if intervals_ms.size == 0:
+        return profile
+
+    bins = bin_index(intervals_ms, edges)
+    profile['counts'] = np.bincount(bins, minlength=n_bins)
+    profile['activity_counts'] = np.bincount(bin_index(intervals_ms, ACTIVITY_EDGES), minlength=len(ACTIVITY_LABELS))
+    profile['quantiles_ms'] = dict(zip(quantiles, np.quantile(intervals_ms, quantiles)))
+    profile['mean_ms'] = float(intervals_ms.mean())
+    profile['std_ms'] = float(intervals_ms.std(ddof=1)) if intervals_ms.size > 1 else 0.0
+    profile['min_ms'] = float(intervals_ms.min())
+    profile['max_ms'] = float(intervals_ms.max())
+
+    if per_hour:
+        # One bincount over combined (hour, bin) codes gives the whole hourly matrix
+        hour = ts[1:] // US_PER_HOUR
+        first_hour = hour[0]
+        hour_offset = hour - first_hour
+        n_hours = int(hour_offset[-1]) + 1
+        combined = np.bincount(hour_offset * n_bins + bins, minlength=n_hours * n_bins).reshape(n_hours, n_bins)
+        present = combined.sum(axis=1) > 0
+        profile['hours'] = (np.arange(n_hours) + first_hour)[present]
+        profile['hourly_counts'] = combined[present]
+
+    return profile
+
+
+def profile_snapshot_file(path, edges=None):
+    """Read only the timestamp column of one snapshot file and profile it."""
+    import pyarrow.parquet as pq
+
+    timestamps = pq.read_table(path, columns=['timestamp']).column('timestamp').to_numpy()
+    return profile_intervals(timestamps, edges=edges)
+
+
+def _profile_partition(args):
+    date, symbol, path, edges = args
+    try:
+        profile = profile_snapshot_file(path, edges)
+    except Exception as e:
+        return date, symbol, path, None, f"{type(e).__name__}: {e}"
+    return date, symbol, path, profile, None
+
+
+def profile_lake(files, edges=None, workers=None):
+    """Profile (date, symbol, path) files in parallel.
+
+    Returns (hourly, symbols): a long DataFrame with one row per symbol/date/hour
+    and a per-symbol DataFrame whose histograms are merged exactly across days.
+    """
+    import pandas as pd
+
+    edges = log_interval_bins() if edges is None else np.asarray(edges, dtype=np.float64)
+    n_bins = len(edges) - 1
+    tasks = [(date, symbol, path, edges) for date, symbol, path in files]
+
+    hourly_rows = []
+    symbol_counts = {}
+    symbol_snapshots = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, path, profile, error in pool.map(_profile_partition, tasks, chunksize=4):
+            if error is not None:
+                print(f"❌ {path}: {error}")
+                continue
+            symbol_counts[symbol] = symbol_counts.get(symbol, np.zeros(n_bins, dtype=np.int64)) + profile['counts']
+            symbol_snapshots[symbol] = symbol_snapshots.get(symbol, 0) + profile['snapshots']
+            for hour, counts in zip(profile['hours'], profile['hourly_counts']):
+                q = histogram_quantiles(counts, edges)
+                hourly_rows.append({
+                    'symbol': symbol,
+                    'date': date,
+                    'hour': int(hour % 24),
+                    'intervals': int(counts.sum()),
+                    'p50_ms': q[0.5],
+                    'p90_ms': q[0.9],
+                    'p99_ms': q[0.99],
+                    'p999_ms': q[0.999],
+                })
+
+    symbol_rows = []
+    for symbol in sorted(symbol_counts):
+        counts = symbol_counts[symbol]
+        q = histogram_quantiles(counts, edges)
+        symbol_rows.append({
+            'symbol': symbol,
+            'snapshots': symbol_snapshots[symbol],
+            'intervals': int(counts.sum()),
+            'p50_ms': q[0.5],
+            'p90_ms': q[0.9],
+            'p99_ms': q[0.99],
+            'p999_ms': q[0.999],
+        })
+    return pd.DataFrame(hourly_rows), pd.DataFrame(symbol_rows)
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    from partition_engine import RESULTS_ROOT, discover_partition_files, write_results_table
+
+    dataset_root = os.path.expanduser(sys.argv[1]) if len(sys.argv) > 1 else os.path.expanduser("~/data/raw.binance-usdt-futures.BookDepth")
+    symbols = set(sys.argv[2].split(',')) if len(sys.argv) > 2 and sys.argv[2] != 'all' else None
+
+    files = [f for f in discover_partition_files(dataset_root) if symbols is None or f[1] in symbols]
+
+    print("📊 Snapshot Cadence Profile")
+    print("=" * 60)
+    print(f"Files: {len(files):,}")
+    print()
+
+    hourly, per_symbol = profile_lake(files)
+    write_results_table(hourly, os.path.join(RESULTS_ROOT, 'snapshot_cadence_hourly.parquet'))
+    write_results_table(per_symbol, os.path.join(RESULTS_ROOT, 'snapshot_cadence_symbols.parquet'))
+
+    print("📈 PER-SYMBOL INTERVAL QUANTILES (milliseconds)")
+    print("-" * 60)
+    print(f"{'Symbol':<15} {'Snapshots':>12} {'p50':>8} {'p90':>8} {'p99':>9} {'p99.9':>10}")
+    for row in per_symbol.itertuples(index=False):
+        print(f"{row.symbol:<15} {row.snapshots:>12,} {row.p50_ms:>8.1f} {row.p90_ms:>8.1f} {row.p99_ms:>9.1f} {row.p999_ms:>10.1f}")
+    print()
+    print("✅ Snapshot cadence profile complete")
@@ -4,77 +4,38 @@ Tardis Failed Downloads Viewer
 Simple script to view the essential structure of tardis_failed_downloads.json files.
 """
 
-import json
 import os
+import sys
 
+from analysis_results import results_root_from_argv, write_results
+from failed_downloads_store import collect_failed_downloads, read_json, render_failed_downloads_report
+from instrumentation import count, init_from_cli, phase
 
-def view_tardis_failed_downloads():
-    """Show a quick overview of the tardis failed downloads JSON structure."""
-    file_path = os.path.expanduser('~/data/tardis_failed_downloads.json')
-    
-    print("🔍 Tardis Failed Downloads Structure Viewer")
-    print("=" * 50)
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    print(f"📁 File: {os.path.basename(file_path)}")
-    print()
-    
-    # Display Table Format
-    print("📊 TABLE FORMAT")
-    print("-" * 50)
-    print(f"{'Field':<30} {'Type':<15} {'Value':<20} {'Description'}")
-    print("-" * 50)
-    
-    # Root level fields
-    print(f"{'tardis':<30} {'object':<15} {'{book_snapshot_5}':<20} {'Root object containing data types'}")
-    
-    print()
-    
-    # Display Organizational Chart
-    print("📋 ORGANIZATIONAL CHART")
-    print("-" * 50)
-    print("JSON Root Object")
-    print("+-- tardis: Object")
-    print("    +-- book_snapshot_5: Object")
-    print("    |   +-- EOSUSDT: Object")
-    print("    |   |   +-- 2025-05-22: Object")
-    print("    |   |   |   +-- reason: \"empty_data\"")
-    print("    |   |   |   +-- timestamp: \"2025-07-16T03:14:07.299760+00:00\"")
-    print("    |   |   |   +-- retry_count: 1")
-    print("    |   |   |   +-- permanent: true")
-    print("    |   |   |   +-- error_msg: \"Downloaded data is too small\"")
-    print("    |   +-- OMGUSDT: Object")
-    print("    |   |   +-- 2025-02-01: Object")
-    print("    |   |   |   +-- reason: \"empty_data\"")
-    print("    |   |   |   +-- timestamp: \"2025-07-16T03:14:50.544996+00:00\"")
-    print("    |   |   |   +-- retry_count: 1")
-    print("    |   |   |   +-- permanent: true")
-    print("    |   |   |   +-- error_msg: \"Downloaded data is too small\"")
-    print("    |   +-- ... (more symbols)")
-    print("    +-- derivative_ticker: Object")
-    print("    |   +-- CVCUSDT: Object")
-    print("    |   |   +-- 2022-12-01: Object")
-    print("    |   |   |   +-- reason: \"empty_data\"")
-    print("    |   |   |   +-- timestamp: \"2025-07-16T03:14:52.390422+00:00\"")
-    print("    |   |   |   +-- retry_count: 1")
-    print("    |   |   |   +-- permanent: true")
-    print("    |   |   |   +-- error_msg: \"Downloaded data is too small\"")
-    print("    |   +-- ... (more symbols)")
-    print("    +-- trades: Object")
-    print("        +-- EOSUSDT: Object")
-    print("        |   +-- 2025-05-22: Object")
-    print("        |   |   +-- reason: \"empty_data\"")
-    print("        |   |   +-- timestamp: \"2025-07-16T03:14:06.298060+00:00\"")
-    print("        |   |   +-- retry_count: 1")
-    print("        |   |   +-- permanent: true")
-    print("        |   |   +-- error_msg: \"Downloaded data is too small\"")
-    print("        +-- ... (more symbols)")
-    
-    print()
-    print("✅ Tardis failed downloads structure overview complete")
+
+def view_tardis_failed_downloads(file_path=None, render=True):
+    """Show a quick overview of the tardis failed downloads JSON structure; returns a FailedDownloadsResult."""
+    if file_path is None:
+        file_path = os.path.expanduser('~/data/tardis_failed_downloads.json')
+    
+    phase('decode')
+    count('bytes', os.path.getsize(file_path))
+    data = read_json(file_path)
+    phase('compute')
+    result = collect_failed_downloads(data, file_path, 'tardis')
+    
+    if render:
+        phase('report')
+        render_failed_downloads_report(result, data, "🔍 Tardis Failed Downloads Structure Viewer")
+        print("✅ Tardis failed downloads structure overview complete")
+    return result
 
 
 if __name__ == "__main__":
-    view_tardis_failed_downloads() 
\ No newline at end of file
+    # tardis_failed_viewer.py [path] [--quiet] [--results[=dir]]
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    results_root = results_root_from_argv()
+    result = view_tardis_failed_downloads(os.path.expanduser(args[0]) if args else None,
+                                          render='--quiet' not in sys.argv[1:])
+    if results_root is not None:
+        write_results([result], results_root)
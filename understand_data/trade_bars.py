@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Trade Bar Aggregator
+Builds OHLCV / VWAP / buy-sell volume bars from trades-*.parquet with segment reductions, appending only new dates
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from atomic_io import write_feature_table
+from bar_kernels import (
+    bar_segments,
+    parse_bar,
+    segment_first,
+    segment_last,
+    segment_max,
+    segment_min,
+    segment_sum,
+    sort_order,
+)
+from instrumentation import init_from_cli
+from lake_catalog import DATA_ROOT, LakeCatalog
+
+SOURCE_DATASET = 'raw.binance-usdt-futures.Trade'
+BARS_DATASET = 'bars.binance-usdt-futures.Trade'
+DEFAULT_BARS = ('1s', '1m', '5m')
+
+SIZE_COLUMNS = ('amount', 'quantity', 'qty', 'volume')
+
+
+def resolve_trade_columns(names):
+    """(price, size, side) column names present in a trades schema.
+
+    side is 'side' ('buy'/'sell' aggressor) or 'is_buyer_maker' (True when the
+    seller was the aggressor), or None if neither exists.
+    """
+    size = next((name for name in SIZE_COLUMNS if name in names), None)
+    if 'price' not in names or size is None:
+        raise ValueError(f"Trades schema has no price/size columns: {sorted(names)}")
+    side = 'side' if 'side' in names else 'is_buyer_maker' if 'is_buyer_maker' in names else None
+    return 'price', size, side
+
+
+def load_trades(paths):
+    """Read timestamp, price, size and aggressor side from one partition's files, sorted by timestamp."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    price_col, size_col, side_col = resolve_trade_columns(set(pq.read_schema(paths[0]).names))
+    columns = ['timestamp', price_col, size_col] + ([side_col] if side_col else [])
+    tables = [pq.read_table(path, columns=columns) for path in paths]
+    table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+    trades = {
+        'timestamp': table.column('timestamp').to_numpy().astype(np.int64),
+        'price': table.column(price_col).to_numpy().astype(np.float64),
+        'size': table.column(size_col).to_numpy().astype(np.float64),
+    }
+    if side_col == 'side':
+        trades['buy'] = np.asarray(table.column('side').to_numpy(zero_copy_only=False) == 'buy')
+    elif side_col == 'is_buyer_maker':
+        trades['buy'] = ~table.column('is_buyer_maker').to_numpy(zero_copy_only=False).astype(bool)
+    order = sort_order(trades['timestamp'])
+    if order is not None:
+        trades = {name: values[order] for name, values in trades.items()}
+    return trades
+
+
+def trade_bars(trades, bar_us):
+    """Aggregate sorted trades into bars of bar_us in one pass of segment reductions."""
+    bar_start, starts, counts = bar_segments(trades['timestamp'], bar_us)
+    price, size = trades['price'], trades['size']
+    volume = segment_sum(size, starts)
+    quote_volume = segment_sum(price * size, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(volume > 0, quote_volume / volume, np.nan)
+    bars = {
+        'bar_start': bar_start,
+        'open': segment_first(price, starts),
+        'high': segment_max(price, starts),
+        'low': segment_min(price, starts),
+        'close': segment_last(price, starts, counts),
+        'volume': volume,
+        'quote_volume': quote_volume,
+        'vwap': vwap,
+        'trades': counts,
+    }
+    if 'buy' in trades:
+        buy_volume = segment_sum(np.where(trades['buy'], size, 0.0), starts)
+        bars['buy_volume'] = buy_volume
+        bars['sell_volume'] = volume - buy_volume
+    return bars
+
+
+def bars_path(data_root, date, symbol, bar):
+    """Output path of one day's bars for one symbol."""
+    return os.path.join(data_root, BARS_DATASET, f'date={date}', f'symbol={symbol}', f'bars-{bar}-0.parquet')
+
+
+def process_partition(task):
+    """Aggregate one (date, symbol) partition into every requested bar size; up-to-date outputs are skipped."""
+    date, symbol, paths, source_mtime_ns, data_root, bars = task
+    pending = [bar for bar in bars
+               if not (os.path.exists(bars_path(data_root, date, symbol, bar))
+                       and os.stat(bars_path(data_root, date, symbol, bar)).st_mtime_ns >= source_mtime_ns)]
+    if not pending:
+        return date, symbol, 'skipped', 0
+    try:
+        trades = load_trades(paths)
+        for bar in pending:
+            write_feature_table(trade_bars(trades, parse_bar(bar)), bars_path(data_root, date, symbol, bar), symbol)
+        return date, symbol, 'written', len(trades['timestamp'])
+    except Exception as e:
+        return date, symbol, f"error: {type(e).__name__}: {e}", 0
+
+
+def run_bar_aggregation(symbols=None, start_date=None, end_date=None, bars=DEFAULT_BARS,
+                        data_root=DATA_ROOT, workers=None):
+    """Aggregate every matching Trade partition; dates whose bars are newer than their trades are skipped."""
+    for bar in bars:
+        parse_bar(bar)
+    with LakeCatalog(data_root) as catalog:
+        catalog.refresh([SOURCE_DATASET])
+        records = catalog.file_records(SOURCE_DATASET, start_date=start_date, end_date=end_date)
+
+    partitions = {}
+    for record in records:
+        if symbols is not None and record['symbol'] not in symbols:
+            continue
+        paths, mtime_ns = partitions.get((record['date'], record['symbol']), ([], 0))
+        paths.append(record['path'])
+        partitions[(record['date'], record['symbol'])] = (paths, max(mtime_ns, record['mtime_ns']))
+
+    print("🕯️ Trade Bar Aggregation")
+    print("=" * 60)
+    print(f"Partitions: {len(partitions):,}")
+    print(f"Bars: {', '.join(bars)}")
+    print(f"Output: {os.path.join(data_root, BARS_DATASET)}")
+    print()
+
+    start = time.perf_counter()
+    tasks = [(date, symbol, paths, mtime_ns, data_root, tuple(bars))
+             for (date, symbol), (paths, mtime_ns) in sorted(partitions.items())]
+    written = skipped = trades = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for date, symbol, status, rows in pool.map(process_partition, tasks, chunksize=1):
+            if status == 'written':
+                written += 1
+                trades += rows
+            elif status == 'skipped':
+                skipped += 1
+            else:
+                print(f"❌ {date} {symbol}: {status}")
+    elapsed = time.perf_counter() - start
+
+    print("📊 AGGREGATION SUMMARY")
+    print("-" * 60)
+    print(f"Written: {written:,}  Skipped (up to date): {skipped:,}")
+    print(f"Trades aggregated: {trades:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({trades / elapsed if elapsed > 0 else 0:,.0f} trades/s)")
+    print()
+    print("✅ Bar aggregation complete")
+
+
+def load_bars(symbol, bar='1m', start_date=None, end_date=None, data_root=DATA_ROOT):
+    """Concatenate stored bars for one symbol over a date range into a DataFrame."""
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    root = os.path.join(data_root, BARS_DATASET)
+    dates = sorted(name[len('date='):] for name in os.listdir(root) if name.startswith('date=')) if os.path.isdir(root) else []
+    frames = [pq.read_table(bars_path(data_root, date, symbol, bar)).to_pandas()
+              for date in dates
+              if (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+              and os.path.exists(bars_path(data_root, date, symbol, bar))]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    init_from_cli()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    symbols = set(args[0].split(',')) if len(args) > 0 and args[0] != 'all' else None
+    start_date = args[1] if len(args) > 1 else None
+    end_date = args[2] if len(args) > 2 else None
+    bars = tuple(args[3].split(',')) if len(args) > 3 else DEFAULT_BARS
+
+    run_bar_aggregation(symbols, start_date, end_date, bars)